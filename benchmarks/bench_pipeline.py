@@ -0,0 +1,321 @@
+"""
+Benchmark delle fasi della pipeline su dataset scalati.
+
+Ogni fase viene misurata a 1x, 10x e 100x le righe di data/dataset_salvato.csv
+(le righe in piu sono generate da src.generatore, cosi non ci sono
+duplicati esatti). Ogni misura gira in un processo nuovo, quindi il picco di
+memoria (RSS) non e influenzato dalle misure precedenti; la preparazione dei
+dati (scalatura, divisione, normalizzazione) non rientra nei tempi.
+
+Utilizzo:
+python -m benchmarks.bench_pipeline esegui --output benchmarks/risultati/corrente.json
+python -m benchmarks.bench_pipeline esegui --fattori 1 10 --fasi statistiche_descrittive addestra_knn
+python -m benchmarks.bench_pipeline confronta benchmarks/risultati/baseline.json benchmarks/risultati/corrente.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+PERCORSO_DATASET = "data/dataset_salvato.csv"
+PERCORSO_RISULTATI = "benchmarks/risultati/corrente.json"
+FATTORI = [1, 10, 100]
+# Secondi concessi a una singola misura prima di interrompere il processo
+TIMEOUT_MISURA = 3600
+
+# Fattore massimo per le fasi che non scalano linearmente: oltre vengono saltate
+FATTORE_MASSIMO = {
+    'avvio_cli': 1,
+    'addestra_knn': 10,
+    'addestra_svr': 1,
+    'addestra_svr_approssimato': 10,
+}
+
+
+def dataset_scalato(df, fattore: int, seed: int = 42):
+    """
+    Restituisce il dataset originale seguito da (fattore - 1) * len(df) righe
+    sintetiche di GeneratoreSintetico (bootstrap con rumore correlato), cosi
+    KNN e alberi non vedono punti esattamente duplicati.
+    """
+    if fattore == 1:
+        return df.copy()
+    from src.generatore import GeneratoreSintetico
+    sintetiche = GeneratoreSintetico(df).genera_blocco((fattore - 1) * len(df), np.random.default_rng(seed))
+    return pd.concat([df, sintetiche], ignore_index=True)
+
+
+def _dati_modelli(df):
+    from src.data_cleaning import Normalizzatore
+    from src.modelli import dividi_dataset
+    X_train, X_test, y_train, y_test = dividi_dataset(df, df.columns[-1])
+    normalizzatore = Normalizzatore("minmax").fit(X_train)
+    return normalizzatore.transform(X_train), normalizzatore.transform(X_test), y_train, y_test
+
+
+def _prepara_fase(nome: str, df, cartella: str):
+    """Restituisce una funzione senza argomenti che esegue la fase (preparazione esclusa)."""
+    from src import analisi_esplorativa, data_cleaning, modelli, valutazione
+
+    if nome == 'avvio_cli':
+        # Avvio a freddo di main.py: interprete, import e parsing degli argomenti
+        import subprocess
+        return lambda: subprocess.run([sys.executable, "main.py", "--help"], stdout=subprocess.DEVNULL, check=True)
+    if nome == 'statistiche_descrittive':
+        return lambda: analisi_esplorativa.statistiche_descrittive(df)
+    if nome == 'rileva_outlier':
+        return lambda: [data_cleaning.rileva_outlier(df, colonna) for colonna in df.columns]
+    if nome == 'normalizza_colonne':
+        return lambda: data_cleaning.normalizza_colonne(df, list(df.columns[:-1]))
+    if nome == 'genera_report_testuale':
+        return lambda: analisi_esplorativa.genera_report_testuale(df, os.path.join(cartella, "report.txt"))
+    if nome == 'genera_report_modelli':
+        _, _, _, y_test = _dati_modelli(df)
+        rng = np.random.default_rng(0)
+        risultati = {nome_modello: {'predizioni': np.asarray(y_test) + rng.normal(scale=0.5, size=len(y_test))}
+                     for nome_modello in ("Linear Regression", "KNN", "Decision Tree", "SVR")}
+        return lambda: valutazione.genera_report_modelli(risultati, y_test, os.path.join(cartella, "report.txt"))
+
+    funzione = getattr(modelli, nome)
+    X_train, X_test, y_train, _ = _dati_modelli(df)
+    return lambda: funzione(X_train, y_train, X_test)
+
+
+FASI = [
+    'avvio_cli',
+    'statistiche_descrittive', 'rileva_outlier', 'normalizza_colonne',
+    'addestra_regressione_lineare', 'addestra_knn', 'addestra_decision_tree',
+    'addestra_svr', 'addestra_svr_approssimato',
+    'genera_report_testuale', 'genera_report_modelli',
+]
+
+
+def _rss_mb() -> float:
+    # ru_maxrss e in KB su Linux e in byte su macOS
+    picco = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return picco / (1024 * 1024) if sys.platform == "darwin" else picco / 1024
+
+
+def _misura(nome: str, fattore: int, percorso_dataset: str, coda) -> None:
+    """Eseguita in un processo dedicato: prepara i dati, esegue la fase e invia la misura."""
+    from contextlib import redirect_stdout
+
+    df = dataset_scalato(pd.read_csv(percorso_dataset), fattore)
+    with tempfile.TemporaryDirectory() as cartella, open(os.devnull, "w") as nulla, redirect_stdout(nulla):
+        esegui = _prepara_fase(nome, df, cartella)
+        rss_iniziale = _rss_mb()
+        inizio_cpu = time.process_time()
+        inizio = time.perf_counter()
+        esegui()
+        durata = time.perf_counter() - inizio
+        durata_cpu = time.process_time() - inizio_cpu
+    rss_picco = _rss_mb()
+    coda.put({
+        'fase': nome,
+        'fattore': fattore,
+        'righe': len(df),
+        'wall_s': durata,
+        'cpu_s': durata_cpu,
+        'rss_picco_mb': rss_picco,
+        'rss_incremento_mb': rss_picco - rss_iniziale
+    })
+
+
+def _misura_in_processo(contesto, nome: str, fattore: int, percorso_dataset: str, timeout: float) -> tuple:
+    """
+    Esegue _misura in un processo dedicato e ne attende il risultato per al
+    piu timeout secondi. Un processo che termina senza inviare la misura
+    (eccezione o crash) o che supera il timeout non blocca il benchmark.
+
+    Returns:
+    tuple (misura, None) oppure (None, descrizione dell'errore)
+    """
+    coda = contesto.Queue()
+    processo = contesto.Process(target=_misura, args=(nome, fattore, percorso_dataset, coda))
+    processo.start()
+    scadenza = time.monotonic() + timeout
+    misura = None
+    while misura is None and time.monotonic() < scadenza:
+        attivo = processo.is_alive()
+        try:
+            misura = coda.get(timeout=min(1.0, max(scadenza - time.monotonic(), 0.01)))
+        except queue.Empty:
+            # La misura viene inviata prima dell'uscita: se il processo era gia
+            # terminato e la coda e vuota, non arrivera piu
+            if not attivo:
+                break
+    if misura is None and processo.is_alive():
+        processo.terminate()
+        processo.join()
+        return None, f"timeout dopo {timeout:.0f} s"
+    processo.join()
+    if processo.exitcode != 0:
+        return None, f"codice di uscita {processo.exitcode}"
+    if misura is None:
+        return None, "nessuna misura ricevuta"
+    return misura, None
+
+
+def esegui_benchmark(fasi: list = None, fattori: list = None, percorso_dataset: str = PERCORSO_DATASET,
+                     ripetizioni: int = 1, timeout: float = TIMEOUT_MISURA) -> dict:
+    """
+    Misura tempo reale, tempo CPU e picco di memoria di ogni fase per ogni
+    fattore di scala. Con ripetizioni > 1 viene tenuta la misura piu veloce.
+
+    Args:
+    timeout: secondi concessi a ogni misura (default TIMEOUT_MISURA)
+
+    Returns:
+    dict con: 'metadati' (ambiente e data) e 'risultati' (una voce per
+    coppia fase/fattore; le fasi oltre FATTORE_MASSIMO hanno 'saltata': True,
+    quelle senza alcuna misura riuscita 'fallita': True e 'errore')
+    """
+    fasi = fasi or FASI
+    fattori = fattori or FATTORI
+    contesto = multiprocessing.get_context("spawn")
+    risultati = []
+    for fattore in fattori:
+        for nome in fasi:
+            if fattore > FATTORE_MASSIMO.get(nome, max(fattori)):
+                risultati.append({'fase': nome, 'fattore': fattore, 'saltata': True})
+                continue
+            misure, errore = [], None
+            for _ in range(ripetizioni):
+                misura, errore_misura = _misura_in_processo(contesto, nome, fattore, percorso_dataset, timeout)
+                if misura is None:
+                    errore = errore_misura
+                else:
+                    misure.append(misura)
+            if not misure:
+                print(f"{nome:30s} {fattore:4d}x  FALLITA ({errore})")
+                risultati.append({'fase': nome, 'fattore': fattore, 'fallita': True, 'errore': errore})
+                continue
+            misura = min(misure, key=lambda m: m['wall_s'])
+            print(f"{nome:30s} {fattore:4d}x {misura['righe']:>9d} righe  "
+                  f"wall {misura['wall_s']:8.3f} s  cpu {misura['cpu_s']:8.3f} s  "
+                  f"rss {misura['rss_picco_mb']:8.1f} MB")
+            risultati.append(misura)
+
+    import sklearn
+    return {
+        'metadati': {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'scikit-learn': sklearn.__version__,
+            'piattaforma': platform.platform(),
+            'cpu': os.cpu_count(),
+            'dataset': percorso_dataset
+        },
+        'risultati': risultati
+    }
+
+
+def _misurata(risultato: dict) -> bool:
+    return not (risultato.get('saltata') or risultato.get('fallita'))
+
+
+def confronta_benchmark(baseline: dict, corrente: dict, soglia: float = 0.25, minimo_s: float = 0.05) -> list:
+    """
+    Confronta due esecuzioni di esegui_benchmark e restituisce le regressioni:
+    le coppie fase/fattore il cui tempo reale o picco di memoria e cresciuto
+    di piu di soglia (default 25%). Le misure sotto minimo_s secondi sono
+    escluse dal confronto dei tempi, perche dominate dal rumore; le fasi
+    saltate o fallite in una delle due esecuzioni non vengono confrontate.
+
+    Returns:
+    list di dict con: 'fase', 'fattore', 'metrica', 'baseline', 'corrente', 'variazione'
+    """
+    riferimento = {(r['fase'], r['fattore']): r for r in baseline['risultati'] if _misurata(r)}
+    regressioni = []
+    for misura in corrente['risultati']:
+        base = riferimento.get((misura['fase'], misura['fattore']))
+        if base is None or not _misurata(misura):
+            continue
+        for metrica in ('wall_s', 'rss_picco_mb'):
+            if metrica == 'wall_s' and max(base[metrica], misura[metrica]) < minimo_s:
+                continue
+            variazione = misura[metrica] / base[metrica] - 1
+            if variazione > soglia:
+                regressioni.append({
+                    'fase': misura['fase'],
+                    'fattore': misura['fattore'],
+                    'metrica': metrica,
+                    'baseline': base[metrica],
+                    'corrente': misura[metrica],
+                    'variazione': variazione
+                })
+    return regressioni
+
+
+def _stampa_confronto(baseline: dict, corrente: dict) -> None:
+    riferimento = {(r['fase'], r['fattore']): r for r in baseline['risultati'] if _misurata(r)}
+    for misura in corrente['risultati']:
+        if misura.get('fallita'):
+            print(f"{misura['fase']:30s} {misura['fattore']:4d}x  FALLITA ({misura.get('errore')})")
+            continue
+        base = riferimento.get((misura['fase'], misura['fattore']))
+        if base is None or not _misurata(misura):
+            continue
+        print(f"{misura['fase']:30s} {misura['fattore']:4d}x  "
+              f"wall {base['wall_s']:8.3f} -> {misura['wall_s']:8.3f} s  "
+              f"({misura['wall_s'] / base['wall_s'] - 1:+7.1%})  "
+              f"rss {base['rss_picco_mb']:7.1f} -> {misura['rss_picco_mb']:7.1f} MB")
+
+
+def main(argomenti: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark delle fasi della pipeline")
+    comandi = parser.add_subparsers(dest="comando", required=True)
+
+    esegui = comandi.add_parser("esegui", help="misura le fasi e salva i risultati in JSON")
+    esegui.add_argument("--fasi", nargs="+", choices=FASI, default=FASI)
+    esegui.add_argument("--fattori", nargs="+", type=int, default=FATTORI)
+    esegui.add_argument("--ripetizioni", type=int, default=1)
+    esegui.add_argument("--dataset", default=PERCORSO_DATASET)
+    esegui.add_argument("--timeout", type=float, default=TIMEOUT_MISURA,
+                        help="secondi concessi a ogni misura")
+    esegui.add_argument("--output", default=PERCORSO_RISULTATI)
+
+    confronta = comandi.add_parser("confronta", help="segnala le regressioni rispetto a una baseline")
+    confronta.add_argument("baseline")
+    confronta.add_argument("corrente")
+    confronta.add_argument("--soglia", type=float, default=0.25)
+
+    argomenti = parser.parse_args(argomenti)
+    if argomenti.comando == "esegui":
+        risultati = esegui_benchmark(argomenti.fasi, argomenti.fattori, argomenti.dataset, argomenti.ripetizioni,
+                                     argomenti.timeout)
+        os.makedirs(os.path.dirname(argomenti.output) or ".", exist_ok=True)
+        with open(argomenti.output, "w", encoding="utf-8") as f:
+            json.dump(risultati, f, indent=2)
+        print(f"Risultati salvati in: {argomenti.output}")
+        return 0
+
+    with open(argomenti.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(argomenti.corrente, "r", encoding="utf-8") as f:
+        corrente = json.load(f)
+    _stampa_confronto(baseline, corrente)
+    regressioni = confronta_benchmark(baseline, corrente, soglia=argomenti.soglia)
+    for r in regressioni:
+        print(f"REGRESSIONE: {r['fase']} {r['fattore']}x {r['metrica']}: "
+              f"{r['baseline']:.3f} -> {r['corrente']:.3f} ({r['variazione']:+.1%})")
+    if not regressioni:
+        print("Nessuna regressione oltre la soglia.")
+    return 1 if regressioni else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,34 +7,66 @@ Script principale che orchestra l' intero pipeline di analisi.
 Utilizzo:
 python main.py --fase tutte
 python main.py --fase caricamento
+python main.py --fase pulizia
 python main.py --fase analisi
 python main.py --fase modelli
+python main.py --fase predici --input nuovi.csv --output output/predizioni.csv
+python main.py --fase servizio --porta 8000
+python main.py --fase aggiorna_report --input nuove_righe.csv
 python main.py --help
 
+Le fasi successive al caricamento salvano il proprio output come artefatto
+in data/artefatti/, identificato da un'impronta dei dati di input, dei
+parametri e dei moduli usati: un'esecuzione senza modifiche riutilizza gli
+artefatti invece di ricalcolare tutto. L'opzione --ricalcola li ignora.
+
+La fase modelli salva il modello migliore, con i parametri di pulizia e
+normalizzazione, in data/modelli/; la fase predici lo usa per predire un
+CSV di qualsiasi dimensione leggendolo a blocchi, la fase servizio lo
+espone su un endpoint HTTP/JSON locale. La fase aggiorna_report unisce un
+nuovo lotto di righe allo stato salvato del report (data/stato_report.pkl)
+e riscrive output/report_incrementale.txt senza rileggere lo storico.
+
 Autore: Marco Garlappi
 Data: 06/03/2026
 """
 
+import os
 import sys
+import time
+
+# I moduli del progetto (e con loro pandas, scipy e scikit-learn) vengono
+# importati dentro le funzioni delle fasi che li usano: --help, gli errori
+# sugli argomenti e le fasi leggere non pagano il loro tempo di importazione.
+# src.utils usa solo la libreria standard.
+from src.utils import TRACCIATORE, traccia, timestamp_corrente
+
 
-import pandas as pd
-
-# Importazione dei moduli del progetto
-from src.data_loader import carica_dataset, salva_csv
-from src.data_cleaning import (
-    info_dataset, gestisci_valori_nulli,
-    normalizza_colonne
-    )
-from src.analisi_esplorativa import (
-    statistiche_descrittive, matrice_correlazione,
-    genera_report_testuale
-    )
-from src.modelli import addestra_tutti_i_modelli, dividi_dataset
-from src.valutazione import (
-    calcola_metriche, cross_validation_modello,
-    confronta_modelli, genera_report_modelli
-    )
-from src.utils import calcola_tempo_esecuzione, timestamp_corrente
+PERCORSO_DATASET = "data/dataset_salvato.csv"
+PERCORSO_REPORT = "output/report.txt"
+PERCORSO_REPORT_MODELLI = "output/report_modelli.txt"
+PERCORSO_MODELLO = "data/modelli/modello_migliore.pkl"
+PERCORSO_PREDIZIONI = "output/predizioni.csv"
+PERCORSO_STATO_REPORT = "data/stato_report.pkl"
+PERCORSO_REPORT_INCREMENTALE = "output/report_incrementale.txt"
+PERCORSO_TRACCIA = "output/traccia.txt"
+PERCORSO_TRACCIA_CHROME = "output/traccia.json"
+
+PARAMETRI_PULIZIA = {'strategia': 'media'}
+# k_vicinato: vicini della feature di vicinato sulle coordinate (None = non usata)
+# campione_tuning: righe del sottocampione stratificato per la ricerca di C della
+# SVR approssimata (None = tutto il training set)
+PARAMETRI_MODELLI = {'test_size': 0.2, 'random_state': 42, 'normalizzazione': 'minmax', 'svr': 'esatto',
+                     'k_vicinato': 10, 'campione_tuning': None}
+
+# Moduli da cui dipende l'output di ciascuna fase: una loro modifica invalida gli artefatti
+# (insieme al sorgente della funzione fase_<nome> di questo file)
+_CARTELLA_SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src")
+DIPENDENZE_FASI = {
+    'pulizia': ['data_loader.py', 'data_cleaning.py'],
+    'analisi': ['analisi_esplorativa.py', 'data_cleaning.py'],
+    'modelli': ['modelli.py', 'valutazione.py', 'predizione.py', 'geospaziale.py', 'data_cleaning.py']
+}
 
 
 def mostra_aiuto():
@@ -42,32 +74,282 @@ def mostra_aiuto():
     print("Utilizzo:")
     print("python main.py --fase tutte")
     print("python main.py --fase caricamento")
+    print("python main.py --fase pulizia")
     print("python main.py --fase analisi")
     print("python main.py --fase modelli")
+    print("python main.py --fase <fase> --ricalcola   (ignora gli artefatti salvati)")
+    print("python main.py --fase modelli --n-jobs 8   (processi per la ricerca degli iperparametri, -1 = tutti)")
+    print("python main.py --fase modelli --svr approssimato   (SVR: esatto, approssimato o entrambi)")
+    print("python main.py --fase modelli --svr approssimato --campione-tuning 5000   (C scelto su un sottocampione)")
+    print("python main.py --fase predici --input nuovi.csv [--output output/predizioni.csv] [--blocco 100000]")
+    print("python main.py --fase servizio [--porta 8000] [--attesa-ms 5]   (servizio di predizione su localhost)")
+    print("python main.py --fase aggiorna_report --input nuove_righe.csv   (report incrementale sui nuovi dati)")
+    print("python main.py --fase <fase> --traccia [--traccia-memoria]   (tempi per fase, modello e fold in output/)")
     print("python main.py --help")
 
+@traccia()
 def fase_caricamento():
-    """ Fase 1: Caricamento e salvataggio dei dati. """
+    """
+    Fase 1: Caricamento e salvataggio dei dati.
+    Se il CSV e gia presente viene letto (tramite la cache binaria) senza
+    scaricare di nuovo il dataset, quindi la fase funziona anche offline.
+    """
+    import pandas as pd
+    from src.data_loader import carica_dataset, salva_csv, carica_csv
+
+    percorso = PERCORSO_DATASET
+    if os.path.exists(percorso):
+        return carica_csv(percorso)
+
     data, target = carica_dataset()
     df_completo = pd.concat([data, target], axis=1)
-    salva_csv(df_completo, "data/dataset_salvato.csv")
+    salva_csv(df_completo, percorso)
     return df_completo
 
+@traccia()
 def fase_pulizia(df):
     """ Fase 2: Pulizia e preprocessing dei dati. """
-    df = gestisci_valori_nulli(df, strategia="media")
-    df = normalizza_colonne(df, df.columns[:-1]) # Normalizziamo tutte le colonne tranne l'ultima (target)
+    from src.data_cleaning import gestisci_valori_nulli
+
+    df = gestisci_valori_nulli(df, strategia=PARAMETRI_PULIZIA['strategia'])
     return df
 
+@traccia()
 def fase_analisi(df):
     """ Fase 3: Analisi esplorativa dei dati. """
-    genera_report_testuale(df, "output/report.txt")
+    from src.analisi_esplorativa import matrice_correlazione, genera_report_testuale
+
+    # La matrice di correlazione viene calcolata una sola volta e riusata nel report
+    correlazione = matrice_correlazione(df)
+    genera_report_testuale(df, PERCORSO_REPORT, correlazione=correlazione)
+
+@traccia()
+def fase_modelli(df, n_jobs: int = 1, parametri: dict = PARAMETRI_MODELLI):
+    """
+    Fase 4: Addestramento e valutazione dei modelli.
+    La normalizzazione viene stimata solo sul training set e poi applicata
+    al test set, cosi i suoi parametri possono essere riusati in predizione.
+    Se il dataset ha le coordinate, i modelli usano anche la feature di
+    vicinato (mediana del target dei distretti di training piu vicini).
+    Il modello migliore viene salvato in PERCORSO_MODELLO insieme ai valori
+    di riempimento dei dati mancanti, alla normalizzazione e alle metriche.
+    """
+    from src.data_cleaning import Normalizzatore, valori_riempimento
+    from src.geospaziale import COLONNE_COORDINATE
+    from src.modelli import addestra_tutti_i_modelli, dividi_dataset
+    from src.valutazione import metriche_modelli, confronta_modelli, genera_report_modelli
+    from src.predizione import crea_pacchetto, salva_modello
+
+    X_train, X_test, y_train, y_test = dividi_dataset(
+        df, df.columns[-1],
+        test_size=parametri['test_size'], random_state=parametri['random_state'])
+    riempimento = valori_riempimento(X_train, strategia=PARAMETRI_PULIZIA['strategia'])
+    coordinate_train = coordinate_test = None
+    if parametri['k_vicinato'] and all(c in X_train.columns for c in COLONNE_COORDINATE):
+        coordinate_train, coordinate_test = X_train[list(COLONNE_COORDINATE)], X_test[list(COLONNE_COORDINATE)]
+    normalizzatore = Normalizzatore(parametri['normalizzazione']).fit(X_train)
+    X_train = normalizzatore.transform(X_train)
+    X_test = normalizzatore.transform(X_test)
+
+    risultati = addestra_tutti_i_modelli(X_train, y_train, X_test, n_jobs=n_jobs, modalita_svr=parametri['svr'],
+                                         coordinate_train=coordinate_train, coordinate_test=coordinate_test,
+                                         k_vicinato=parametri['k_vicinato'],
+                                         dimensione_campione_tuning=parametri['campione_tuning'],
+                                         normalizzazione=parametri['normalizzazione'])
+    metriche = metriche_modelli(risultati, y_test)
+    genera_report_modelli(risultati, y_test, PERCORSO_REPORT_MODELLI, metriche=metriche)
+
+    migliore = confronta_modelli(risultati, y_test, metriche=metriche)
+    pacchetto = crea_pacchetto(
+        migliore, risultati[migliore]['modello'], list(X_train.columns), df.columns[-1],
+        normalizzatore, riempimento, metriche[migliore],
+        parametri={**PARAMETRI_PULIZIA, **parametri}, vicinato=risultati[migliore].get('vicinato'))
+    salva_modello(pacchetto, PERCORSO_MODELLO)
+    return risultati, normalizzatore, pacchetto
+
+@traccia()
+def fase_predici(percorso_input: str, percorso_output: str = PERCORSO_PREDIZIONI,
+                 dimensione_blocco: int = 100_000):
+    """
+    Fase 5: Predizione a blocchi di un CSV con il modello salvato dalla fase modelli.
+    """
+    from src.predizione import carica_modello, predici_csv
+
+    pacchetto = carica_modello(PERCORSO_MODELLO)
+    if pacchetto is None:
+        print("Eseguire prima: python main.py --fase modelli")
+        return None
+
+    inizio = time.perf_counter()
+    n_righe = predici_csv(pacchetto, percorso_input, percorso_output, dimensione_blocco=dimensione_blocco)
+    if n_righe is None:
+        return None
+    durata = time.perf_counter() - inizio
+    print(f"Modello {pacchetto['nome']} (creato il {pacchetto['versione']['creato_il']}): "
+          f"{n_righe} righe predette in {durata:.2f} s ({n_righe / max(durata, 1e-9):,.0f} righe/s)")
+    print(f"Predizioni salvate in: {percorso_output}")
+    return n_righe
+
+@traccia()
+def fase_aggiorna_report(percorso_input: str):
+    """
+    Fase 7: Aggiornamento incrementale del report con un nuovo lotto di righe.
+    Alla prima esecuzione lo stato viene inizializzato dal dataset salvato.
+    """
+    from src.analisi_esplorativa import aggiorna_report_testuale
+
+    stato = aggiorna_report_testuale(percorso_input, PERCORSO_STATO_REPORT, PERCORSO_REPORT_INCREMENTALE,
+                                     percorso_iniziale=PERCORSO_DATASET)
+    if stato is not None:
+        print(f"Stato del report aggiornato: {stato.n_campioni} righe totali")
+    return stato
+
+def fase_servizio(porta: int = 8000, attesa_ms: float = 5.0):
+    """
+    Fase 6: Servizio HTTP/JSON di predizione su localhost con il modello
+    salvato dalla fase modelli (vedi src.servizio). Resta attivo fino a Ctrl+C.
+    """
+    from src.predizione import carica_modello
+    from src.servizio import crea_servizio
+
+    pacchetto = carica_modello(PERCORSO_MODELLO)
+    if pacchetto is None:
+        print("Eseguire prima: python main.py --fase modelli")
+        return
+
+    server = crea_servizio(pacchetto, porta=porta, attesa_massima=attesa_ms / 1000)
+    host, porta = server.server_address[:2]
+    print(f"Servizio del modello {pacchetto['nome']} attivo su http://{host}:{porta}")
+    print("POST /predici  (oggetto o lista di oggetti JSON con le feature)")
+    print("GET  /statistiche  (latenze p50/p99 e throughput)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.raggruppatore.chiudi()
+
+
+def _leggi_file(percorso: str) -> str:
+    with open(percorso, "r", encoding="utf-8") as f:
+        return f.read()
 
-def fase_modelli(df):
-    """ Fase 4: Addestramento e valutazione dei modelli. """
-    X_train, X_test, y_train, y_test = dividi_dataset(df, df.columns[-1], test_size=0.2, random_state=42)
-    risultati = addestra_tutti_i_modelli(X_train, y_train, X_test)
-    genera_report_modelli(risultati, y_test, "output/report_modelli.txt")
+def _ripristina_file(percorso: str, contenuto: str) -> None:
+    """ Riscrive un file generato da un artefatto se manca o e stato modificato. """
+    if os.path.exists(percorso) and _leggi_file(percorso) == contenuto:
+        return
+    os.makedirs(os.path.dirname(percorso), exist_ok=True)
+    with open(percorso, "w", encoding="utf-8") as f:
+        f.write(contenuto)
+
+def _ripristina_modello(pacchetto: dict) -> None:
+    """ Riscrive il modello salvato se manca o non e quello dell'artefatto della fase modelli. """
+    from src.predizione import leggi_metadati, salva_modello
+
+    metadati = leggi_metadati(PERCORSO_MODELLO)
+    if (os.path.exists(PERCORSO_MODELLO) and metadati is not None
+            and metadati['versione'] == pacchetto['versione']):
+        return
+    salva_modello(pacchetto, PERCORSO_MODELLO)
+
+def _chiave_fase(fase: str, *parti) -> str:
+    """
+    Chiave dell'artefatto di una fase: input a monte, parametri, sorgenti dei
+    moduli usati e sorgente della funzione della fase in main.py.
+    """
+    import hashlib
+    import inspect
+    from src.data_loader import impronta_file, chiave_artefatto
+
+    sorgenti = [impronta_file(os.path.join(_CARTELLA_SRC, nome)) for nome in DIPENDENZE_FASI[fase]]
+    funzione = hashlib.sha1(inspect.getsource(globals()[f"fase_{fase}"]).encode("utf-8")).hexdigest()
+    return chiave_artefatto(fase, *parti, sorgenti, funzione)
+
+def esegui_con_cache(nome: str, chiave: str, calcola, ricalcola: bool = False):
+    """
+    Restituisce l'artefatto della fase se esiste con la chiave attesa,
+    altrimenti esegue calcola() e ne salva il risultato.
+
+    Args:
+    nome: nome della fase
+    chiave: chiave dell'artefatto
+    calcola: funzione senza argomenti che produce l'artefatto
+    ricalcola: se True ignora l'artefatto salvato
+
+    Returns:
+    l'artefatto della fase
+    """
+    from src.data_loader import salva_artefatto, carica_artefatto
+
+    if not ricalcola:
+        artefatto = carica_artefatto(nome, chiave)
+        if artefatto is not None:
+            print(f"Fase '{nome}': riutilizzato l'artefatto {chiave[:12]}")
+            return artefatto
+    artefatto = calcola()
+    salva_artefatto(artefatto, nome, chiave)
+    return artefatto
+
+def esegui_pipeline(fase: str, ricalcola: bool = False, n_jobs: int = 1, modalita_svr: str = "esatto",
+                    campione_tuning: int = None) -> None:
+    """
+    Esegue la fase richiesta caricando gli artefatti delle fasi a monte.
+    I dati grezzi e il dataset pulito vengono letti solo se servono
+    davvero, cioe se un artefatto a valle manca o non e piu valido.
+
+    Args:
+    fase: "caricamento", "pulizia", "analisi", "modelli" o "tutte"
+    ricalcola: se True ricalcola tutte le fasi ignorando gli artefatti
+    n_jobs: processi usati per la ricerca degli iperparametri (-1 = tutti i core)
+    modalita_svr: "esatto", "approssimato" o "entrambi" (vedi addestra_tutti_i_modelli)
+    campione_tuning: righe del sottocampione per la ricerca di C della SVR
+    approssimata (None = tutto il training set)
+    """
+    from src.data_loader import impronta_file, chiave_artefatto
+
+    if fase == 'caricamento' or not os.path.exists(PERCORSO_DATASET):
+        fase_caricamento()
+        if fase == 'caricamento':
+            return
+
+    chiave_caricamento = chiave_artefatto(impronta_file(PERCORSO_DATASET))
+    chiave_pulizia = _chiave_fase('pulizia', chiave_caricamento, PARAMETRI_PULIZIA)
+
+    dataset_pulito = {}
+    def df_pulito():
+        if 'df' not in dataset_pulito:
+            dataset_pulito['df'] = esegui_con_cache(
+                'pulizia', chiave_pulizia,
+                lambda: fase_pulizia(fase_caricamento()), ricalcola)
+        return dataset_pulito['df']
+
+    if fase == 'pulizia':
+        df_pulito()
+
+    if fase in ('analisi', 'tutte'):
+        def calcola_analisi():
+            fase_analisi(df_pulito())
+            return {'report': _leggi_file(PERCORSO_REPORT)}
+        artefatto = esegui_con_cache('analisi', _chiave_fase('analisi', chiave_pulizia),
+                                     calcola_analisi, ricalcola)
+        _ripristina_file(PERCORSO_REPORT, artefatto['report'])
+
+    if fase in ('modelli', 'tutte'):
+        def calcola_modelli():
+            risultati, normalizzatore, pacchetto = fase_modelli(df_pulito(), n_jobs=n_jobs,
+                                                                parametri=parametri_modelli)
+            return {
+                'risultati': risultati,
+                'normalizzatore': normalizzatore.a_dizionario(),
+                'pacchetto': pacchetto,
+                'report': _leggi_file(PERCORSO_REPORT_MODELLI)
+            }
+        parametri_modelli = {**PARAMETRI_MODELLI, 'svr': modalita_svr, 'campione_tuning': campione_tuning}
+        artefatto = esegui_con_cache('modelli', _chiave_fase('modelli', chiave_pulizia, parametri_modelli),
+                                     calcola_modelli, ricalcola)
+        _ripristina_file(PERCORSO_REPORT_MODELLI, artefatto['report'])
+        _ripristina_modello(artefatto['pacchetto'])
 
 def main():
     """ Funzione principale che gestisce il flusso del programma. """
@@ -94,9 +376,13 @@ def main():
     # Esecuzione della fase richiesta
     fasi_disponibili = {
         'caricamento': fase_caricamento,
+        'pulizia': fase_pulizia,
         'analisi': fase_analisi,
         'modelli': fase_modelli,
-        'tutte': None # Gestito separatamente
+        'predici': fase_predici,
+        'servizio': fase_servizio,
+        'aggiorna_report': fase_aggiorna_report,
+        'tutte': None # Esegue tutte le fasi in sequenza
     }
 
     if fase not in fasi_disponibili :
@@ -104,14 +390,82 @@ def main():
         print (f"Fasi disponibili: {', '.join(fasi_disponibili.keys())}")
         return
 
-    if fase == 'tutte':
-        df = fase_caricamento()
-        df = fase_pulizia(df)
-        fase_analisi(df)
-        fase_modelli(df)
+    n_jobs = 1
+    if '--n-jobs' in sys.argv:
+        try:
+            n_jobs = int(sys.argv[sys.argv.index('--n-jobs') + 1])
+        except (ValueError, IndexError):
+            n_jobs = 0
+        if n_jobs < 1 and n_jobs != -1:
+            print("Errore: --n-jobs richiede un numero intero positivo o -1 (tutti i core)")
+            mostra_aiuto ()
+            return
+
+    modalita_svr = "esatto"
+    if '--svr' in sys.argv:
+        indice = sys.argv.index('--svr')
+        modalita_svr = sys.argv[indice + 1] if indice + 1 < len(sys.argv) else ""
+        if modalita_svr not in ("esatto", "approssimato", "entrambi"):
+            print("Errore: --svr deve essere 'esatto', 'approssimato' o 'entrambi'")
+            mostra_aiuto ()
+            return
+
+    campione_tuning = None
+    if '--campione-tuning' in sys.argv:
+        try:
+            campione_tuning = int(sys.argv[sys.argv.index('--campione-tuning') + 1])
+        except (ValueError, IndexError):
+            campione_tuning = 0
+        if campione_tuning < 1:
+            print("Errore: --campione-tuning richiede un numero intero positivo")
+            mostra_aiuto ()
+            return
+
+    if '--traccia' in sys.argv or '--traccia-memoria' in sys.argv:
+        TRACCIATORE.attiva(memoria='--traccia-memoria' in sys.argv)
+
+    if fase in ('predici', 'aggiorna_report') and (
+            '--input' not in sys.argv or sys.argv.index('--input') + 1 >= len(sys.argv)):
+        print(f"Errore: la fase {fase} richiede --input seguito da un CSV")
+        mostra_aiuto ()
+        return
+
+    if fase == 'aggiorna_report':
+        fase_aggiorna_report(sys.argv[sys.argv.index('--input') + 1])
+    elif fase == 'predici':
+        percorso_input = sys.argv[sys.argv.index('--input') + 1]
+        percorso_output = PERCORSO_PREDIZIONI
+        if '--output' in sys.argv and sys.argv.index('--output') + 1 < len(sys.argv):
+            percorso_output = sys.argv[sys.argv.index('--output') + 1]
+        dimensione_blocco = 100_000
+        if '--blocco' in sys.argv:
+            try:
+                dimensione_blocco = int(sys.argv[sys.argv.index('--blocco') + 1])
+            except (ValueError, IndexError):
+                dimensione_blocco = 0
+            if dimensione_blocco < 1:
+                print("Errore: --blocco richiede un numero intero positivo")
+                mostra_aiuto ()
+                return
+        fase_predici(percorso_input, percorso_output, dimensione_blocco=dimensione_blocco)
+    elif fase == 'servizio':
+        try:
+            porta = int(sys.argv[sys.argv.index('--porta') + 1]) if '--porta' in sys.argv else 8000
+            attesa_ms = float(sys.argv[sys.argv.index('--attesa-ms') + 1]) if '--attesa-ms' in sys.argv else 5.0
+        except (ValueError, IndexError):
+            print("Errore: --porta e --attesa-ms richiedono un numero")
+            mostra_aiuto ()
+            return
+        fase_servizio(porta, attesa_ms)
     else:
-        # Implementare la logica per eseguire una singola fase
-        pass
+        esegui_pipeline(fase, ricalcola='--ricalcola' in sys.argv, n_jobs=n_jobs, modalita_svr=modalita_svr,
+                        campione_tuning=campione_tuning)
+
+    if TRACCIATORE.attivo:
+        TRACCIATORE.salva_riassunto(PERCORSO_TRACCIA)
+        TRACCIATORE.esporta_chrome(PERCORSO_TRACCIA_CHROME)
+        TRACCIATORE.disattiva()
+        print(f"Traccia salvata in: {PERCORSO_TRACCIA} e {PERCORSO_TRACCIA_CHROME} (formato Chrome)")
 
     print(f"\n{'=' * 55}")
     print(f"ESECUZIONE COMPLETATA")
@@ -1,10 +1,251 @@
 import numpy as np
+import pandas as pd
 from scipy import stats
 import os
+import pickle
 import datetime
-from src.data_cleaning import rileva_outlier
+from concurrent.futures import ProcessPoolExecutor
+from src.data_cleaning import conta_outlier, statistiche_ordine, SketchQuantili
+from src.data_loader import carica_csv, FeatureStore
+from src.utils import numero_processi, traccia
 
+# Valori minimi per colonna dei test di normalita: K^2 e Jarque-Bera usano
+# approssimazioni asintotiche, Anderson-Darling la correzione per n piccolo
+# di D'Agostino e Stephens, Shapiro-Wilk e definito da 3 valori
+MINIMO_K2 = 20
+MINIMO_ANDERSON = 8
+MINIMO_SHAPIRO = 3
 
+class AccumulatoreMomenti:
+    """
+    Accumulatore unibile di conteggio, minimo/massimo e momenti centrali
+    fino al quarto per piu colonne contemporaneamente.
+
+    I blocchi vengono combinati con le formule di aggiornamento a coppie
+    di Welford/Pebay, quindi due accumulatori calcolati su porzioni diverse
+    dei dati possono essere uniti senza rileggere i dati. I valori NaN
+    vengono ignorati colonna per colonna.
+
+    Args:
+    colonne: nomi delle colonne accumulate
+    """
+
+    def __init__(self, colonne):
+        p = len(colonne)
+        self.colonne = list(colonne)
+        self.n = np.zeros(p)
+        self.media = np.zeros(p)
+        self.M2 = np.zeros(p)
+        self.M3 = np.zeros(p)
+        self.M4 = np.zeros(p)
+        self.minimo = np.full(p, np.inf)
+        self.massimo = np.full(p, -np.inf)
+
+    def aggiorna(self, blocco) -> None:
+        """
+        Aggiunge un blocco di righe (array 2-D righe x colonne).
+
+        Args:
+        blocco: array o DataFrame con le stesse colonne dell'accumulatore
+        """
+        # Layout colonna per riga (colonne x righe) per operazioni contigue
+        T = np.ascontiguousarray(np.asarray(blocco, dtype=np.float64).T)
+        validi = ~np.isnan(T)
+        completo = bool(validi.all())
+        parziale = AccumulatoreMomenti(self.colonne)
+        parziale.n = validi.sum(axis=1).astype(np.float64)
+        if not completo:
+            T = np.where(validi, T, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            parziale.media = np.where(parziale.n > 0, T.sum(axis=1) / parziale.n, 0.0)
+        scarti = T - parziale.media[:, None]
+        if not completo:
+            scarti[~validi] = 0.0
+        quadrati = scarti * scarti
+        parziale.M2 = quadrati.sum(axis=1)
+        parziale.M3 = np.einsum("ij,ij->i", quadrati, scarti)
+        parziale.M4 = np.einsum("ij,ij->i", quadrati, quadrati)
+        if T.shape[1]:
+            if completo:
+                parziale.minimo, parziale.massimo = T.min(axis=1), T.max(axis=1)
+            else:
+                parziale.minimo = np.where(validi, T, np.inf).min(axis=1)
+                parziale.massimo = np.where(validi, T, -np.inf).max(axis=1)
+        self.unisci(parziale)
+
+    def unisci(self, altro: "AccumulatoreMomenti") -> None:
+        """
+        Unisce in place un altro accumulatore sulle stesse colonne.
+
+        Args:
+        altro: accumulatore da unire
+        """
+        na, nb = self.n, altro.n
+        n = na + nb
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = altro.media - self.media
+            d_n = np.where(n > 0, delta / n, 0.0)
+            media = self.media + nb * d_n
+            M2 = self.M2 + altro.M2 + delta * d_n * na * nb
+            M3 = (self.M3 + altro.M3 + delta * d_n * d_n * na * nb * (na - nb)
+                  + 3.0 * d_n * (na * altro.M2 - nb * self.M2))
+            M4 = (self.M4 + altro.M4 + delta * d_n * d_n * d_n * na * nb * (na * na - na * nb + nb * nb)
+                  + 6.0 * d_n * d_n * (na * na * altro.M2 + nb * nb * self.M2)
+                  + 4.0 * d_n * (na * altro.M3 - nb * self.M3))
+        self.n, self.media, self.M2, self.M3, self.M4 = n, media, M2, M3, M4
+        self.minimo = np.minimum(self.minimo, altro.minimo)
+        self.massimo = np.maximum(self.massimo, altro.massimo)
+
+    def statistiche(self) -> dict:
+        """
+        Restituisce le statistiche derivate dai momenti per ogni colonna.
+        Varianza e deviazione standard usano ddof=1; skewness e kurtosis
+        (di Fisher) sono le stime distorte, come scipy.stats.skew e kurtosis.
+
+        Returns:
+        dict : { nome_colonna : { statistica : valore }}
+        """
+        n = self.n
+        with np.errstate(invalid="ignore", divide="ignore"):
+            varianza = np.where(n > 1, self.M2 / (n - 1), np.nan)
+            skewness = np.sqrt(n) * self.M3 / self.M2 ** 1.5
+            kurtosis = n * self.M4 / (self.M2 * self.M2) - 3.0
+        risultato = {}
+        for j, colonna in enumerate(self.colonne):
+            vuota = n[j] == 0
+            risultato[colonna] = {
+                'conteggio': int(n[j]),
+                'media': np.nan if vuota else self.media[j],
+                'deviazione_standard': np.sqrt(varianza[j]),
+                'varianza': varianza[j],
+                'minimo': np.nan if vuota else self.minimo[j],
+                'massimo': np.nan if vuota else self.massimo[j],
+                'range': np.nan if vuota else self.massimo[j] - self.minimo[j],
+                'skewness': skewness[j],
+                'kurtosis': kurtosis[j]
+            }
+        return risultato
+
+
+class CampioneQuantili:
+    """
+    Campione casuale uniforme di dimensione fissa delle righe viste
+    (reservoir sampling), da cui si stimano le statistiche d'ordine con
+    statistiche_ordine: esatte finche le righe viste sono al piu dimensione,
+    approssimate oltre.
+
+    Due campioni calcolati su porzioni diverse dei dati si uniscono senza
+    rileggere i dati: da ciascuno si estrae un numero di righe con legge
+    ipergeometrica (proporzionale alle righe viste), quindi il risultato e
+    ancora un campione uniforme dell'unione.
+
+    Args:
+    n_colonne: numero di colonne delle righe campionate
+    dimensione: righe massime conservate (default 100000)
+    seed: seed del campionamento per la riproducibilita
+    """
+
+    def __init__(self, n_colonne: int, dimensione: int = 100_000, seed: int = 42):
+        self.dimensione = dimensione
+        self.campione = np.empty((0, n_colonne))
+        self.visti = 0
+        self.rng = np.random.default_rng(seed)
+
+    def aggiorna(self, X) -> None:
+        """Aggiunge un blocco di righe (array 2-D righe x colonne)."""
+        X = np.asarray(X, dtype=np.float64)
+        # Reservoir sampling vettorizzato (algoritmo R): la riga in posizione t
+        # sostituisce uno slot casuale con probabilita dimensione / (t + 1)
+        posizioni = self.visti + np.arange(len(X))
+        liberi = posizioni < self.dimensione
+        if liberi.any():
+            self.campione = np.concatenate([self.campione, X[liberi]])
+        slot = self.rng.integers(0, posizioni[~liberi] + 1)
+        scelti = slot < self.dimensione
+        self.campione[slot[scelti]] = X[~liberi][scelti]
+        self.visti += len(X)
+
+    def unisci(self, altro: "CampioneQuantili") -> None:
+        """
+        Unisce in place un altro campione sulle stesse colonne.
+
+        Raises:
+        ValueError: se i due campioni hanno dimensione diversa
+        """
+        if altro.dimensione != self.dimensione:
+            raise ValueError("I campioni da unire devono avere la stessa dimensione")
+        k = min(self.dimensione, self.visti + altro.visti)
+        da_questo = int(self.rng.hypergeometric(self.visti, altro.visti, k)) if k else 0
+        self.campione = np.concatenate([
+            self.campione[self.rng.choice(len(self.campione), da_questo, replace=False)],
+            altro.campione[self.rng.choice(len(altro.campione), k - da_questo, replace=False)]
+        ])
+        self.visti += altro.visti
+
+    def statistiche(self, moda: bool = True) -> dict:
+        """Statistiche d'ordine del campione (vedi statistiche_ordine)."""
+        return statistiche_ordine(self.campione, moda=moda)
+
+    def frazione_fuori(self, limite_inferiore, limite_superiore):
+        """Stima per colonna della frazione di valori fuori da [limite_inferiore, limite_superiore]."""
+        fuori = (self.campione < limite_inferiore) | (self.campione > limite_superiore)
+        return fuori.sum(axis=0) / max(len(self.campione), 1)
+
+
+def _nuovo_campione(n_colonne: int, dimensione_campione: int, seed: int, errore_quantili: float = None):
+    """Campione casuale o, con errore_quantili, sketch KLL per le statistiche d'ordine."""
+    if errore_quantili is not None:
+        return SketchQuantili(n_colonne, errore_quantili, seed)
+    return CampioneQuantili(n_colonne, dimensione_campione, seed)
+
+
+def _sketch_intervallo(cartella: str, colonne: list, inizio: int, fine: int,
+                       errore: float, seed: int) -> SketchQuantili:
+    sketch = SketchQuantili(len(colonne), errore, seed)
+    sketch.aggiorna(FeatureStore(cartella).matrice(slice(inizio, fine), colonne, dtype=np.float64))
+    return sketch
+
+
+def sketch_feature_store(cartella: str, colonne: list = None, errore: float = 0.01,
+                         dimensione_blocco: int = 1_000_000, n_jobs: int = 1) -> SketchQuantili:
+    """
+    Calcola gli sketch dei quantili delle colonne di un feature store (vedi
+    src.data_loader) a blocchi di righe, anche in parallelo: ogni processo
+    apre il feature store in memory-map, costruisce lo sketch dei propri
+    blocchi e gli sketch vengono poi uniti. Da quello risultante si leggono
+    Q1, mediana, Q3 (statistiche) e i limiti IQR (limiti_iqr) da passare a
+    maschera_outlier o conta_outlier come quartili.
+
+    Args:
+    cartella: cartella del feature store
+    colonne: colonne da analizzare (default tutte)
+    errore: errore di rango normalizzato (default 0.01)
+    dimensione_blocco: righe per compito (default 1000000)
+    n_jobs: numero di processi (1 = sequenziale, -1 = tutti i core)
+
+    Returns:
+    SketchQuantili con una colonna per colonna richiesta
+    """
+
+    store = FeatureStore(cartella)
+    colonne = store.colonne if colonne is None else list(colonne)
+    compiti = [(cartella, colonne, inizio, min(inizio + dimensione_blocco, len(store)), errore, seed)
+               for seed, inizio in enumerate(range(0, len(store), dimensione_blocco))]
+    n_jobs = numero_processi(n_jobs)
+
+    if n_jobs == 1 or len(compiti) <= 1:
+        parziali = [_sketch_intervallo(*compito) for compito in compiti]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(compiti))) as pool:
+            parziali = list(pool.map(_sketch_intervallo, *zip(*compiti)))
+
+    sketch = SketchQuantili(len(colonne), errore)
+    for parziale in parziali:
+        sketch.unisci(parziale)
+    return sketch
+
+
+@traccia()
 def statistiche_descrittive(df) -> dict:
     """
     Calcola statistiche descrittive per ogni colonna numerica :
@@ -14,34 +255,193 @@ def statistiche_descrittive(df) -> dict:
     - primo quartile (Q1), terzo quartile (Q3), IQR
     - skewness , kurtosis
 
-    Utilizza NumPy e SciPy per i calcoli .
+    Utilizza NumPy per i calcoli : le statistiche d'ordine derivano da un
+    solo ordinamento per colonna (statistiche_ordine) e i momenti da un solo
+    passaggio vettorizzato su tutte le colonne (AccumulatoreMomenti).
+    Per le colonne continue la moda e il picco della densita stimata
+    (vedi moda_colonne in data_cleaning).
 
     Returns :
     dict : dizionario annidato { nome_colonna : { statistica : valore }}
     """
 
+    colonne = df.select_dtypes(include=[np.number]).columns
+    X = df[colonne].to_numpy(dtype=np.float64)
+
+    # Un solo ordinamento per colonna per tutte le statistiche d'ordine e un
+    # solo passaggio vettorizzato per i momenti
+    ordine = statistiche_ordine(X)
+    accumulatore = AccumulatoreMomenti(colonne)
+    accumulatore.aggiorna(X)
+    momenti = accumulatore.statistiche()
+
+    statistiche = {}
+    for j, colonna in enumerate(colonne):
+        m = momenti[colonna]
+        statistiche[colonna] = {
+            'media': m['media'],
+            'mediana': ordine['mediana'][j],
+            'moda': ordine['moda'][j],     #valore che appare più volte (picco della densita se continua)
+            'deviazione_standard': m['deviazione_standard'],
+            'varianza': m['varianza'],
+            'minimo': ordine['minimo'][j],
+            'massimo': ordine['massimo'][j],
+            'range': ordine['massimo'][j] - ordine['minimo'][j],
+            'Q1': ordine['Q1'][j],
+            'Q3': ordine['Q3'][j],
+            'IQR': ordine['IQR'][j],
+            'skewness': m['skewness'],       #asimmetria dei dati, sbilancio a destra o a sinistra rispetto alla media
+            'kurtosis': m['kurtosis']    #appiattimento o picco dei dati rispetto alla distribuzione normale
+        }
+    return statistiche
+
+
+def statistiche_descrittive_a_blocchi(percorso: str, dimensione_blocco: int = 100_000,
+                                      dimensione_campione: int = 100_000, seed: int = 42,
+                                      errore_quantili: float = None) -> dict:
+    """
+    Calcola le statistiche descrittive di un CSV leggendolo a blocchi con
+    carica_csv, in un solo passaggio e con memoria costante rispetto al
+    numero di righe. Restituisce un dizionario con la stessa forma di
+    statistiche_descrittive.
+
+    Media, varianza, minimo, massimo, skewness e kurtosis sono esatte
+    (AccumulatoreMomenti). Mediana, moda, Q1, Q3 e IQR sono calcolate su un
+    campione casuale uniforme di dimensione fissa (reservoir sampling):
+    sono esatte se il file ha al piu dimensione_campione righe,
+    altrimenti approssimate. Con errore_quantili sono invece stimate con
+    uno sketch KLL per colonna (SketchQuantili), con errore di rango
+    garantito e memoria di poche migliaia di valori per colonna; la moda
+    in questo caso non e stimata (NaN).
+
+    Args:
+    percorso: percorso del file CSV
+    dimensione_blocco: numero di righe lette per blocco (default 100000)
+    dimensione_campione: dimensione del campione per le statistiche d'ordine
+    seed: seed del campionamento per la riproducibilita
+    errore_quantili: errore di rango normalizzato dello sketch (es. 0.01);
+    None per il campione casuale
+
+    Returns:
+    dict : dizionario annidato { nome_colonna : { statistica : valore }}
+    """
+
+    blocchi = carica_csv(percorso, dimensione_blocco=dimensione_blocco)
+    if blocchi is None:
+        return {}
+
+    accumulatore = None
+    campione = None
+    for blocco in blocchi:
+        if accumulatore is None:
+            colonne = blocco.select_dtypes(include=[np.number]).columns
+            accumulatore = AccumulatoreMomenti(colonne)
+            campione = _nuovo_campione(len(colonne), dimensione_campione, seed, errore_quantili)
+        X = blocco[colonne].to_numpy(dtype=np.float64)
+        accumulatore.aggiorna(X)
+        campione.aggiorna(X)
+
+    if accumulatore is None:
+        return {}
+
+    ordine = campione.statistiche()
+    momenti = accumulatore.statistiche()
     statistiche = {}
-    for colonna in df.select_dtypes(include=[np.number]).columns:
-        dati = df[colonna].dropna()
-        mode_result = stats.mode(dati, keepdims=True)
+    for j, colonna in enumerate(accumulatore.colonne):
+        m = momenti[colonna]
         statistiche[colonna] = {
-            'media': np.mean(dati),
-            'mediana': np.median(dati),
-            'moda': mode_result.mode[0],     #valore che appare più volte
-            'deviazione_standard': np.std(dati, ddof=1),
-            'varianza': np.var(dati, ddof=1),
-            'minimo': np.min(dati),
-            'massimo': np.max(dati),
-            'range': np.ptp(dati),
-            'Q1': np.percentile(dati, 25),
-            'Q3': np.percentile(dati, 75),
-            'IQR': stats.iqr(dati),
-            'skewness': stats.skew(dati),       #asimmetria dei dati, sbilancio a destra o a sinistra rispetto alla media
-            'kurtosis': stats.kurtosis(dati)    #appiattimento o picco dei dati rispetto alla distribuzione normale
+            'media': m['media'],
+            'mediana': ordine['mediana'][j],
+            'moda': ordine['moda'][j],
+            'deviazione_standard': m['deviazione_standard'],
+            'varianza': m['varianza'],
+            'minimo': m['minimo'],
+            'massimo': m['massimo'],
+            'range': m['range'],
+            'Q1': ordine['Q1'][j],
+            'Q3': ordine['Q3'][j],
+            'IQR': ordine['IQR'][j],
+            'skewness': m['skewness'],
+            'kurtosis': m['kurtosis']
         }
     return statistiche
 
 
+def coppie_correlate(correlazione, soglia: float = 0.7) -> list:
+    """
+    Estrae le coppie di feature con |r| > soglia dal triangolo superiore
+    della matrice di correlazione (np.triu_indices + maschera, senza cicli).
+
+    Args:
+    correlazione: DataFrame (o array 2-D) con la matrice di correlazione
+    soglia: soglia sul valore assoluto della correlazione (default 0.7)
+
+    Returns:
+    list: tuple (colonna_a, colonna_b, r) nell'ordine della matrice
+    """
+
+    valori = np.asarray(correlazione, dtype=np.float64)
+    nomi = list(getattr(correlazione, "columns", range(valori.shape[1])))
+    righe, colonne = np.triu_indices(valori.shape[0], k=1)
+    r = valori[righe, colonne]
+    with np.errstate(invalid="ignore"):
+        forti = np.abs(r) > soglia
+    return [(nomi[i], nomi[j], v) for i, j, v in zip(righe[forti], colonne[forti], r[forti])]
+
+
+def coppie_correlate_a_blocchi(df, soglia: float = 0.7, dimensione_blocco: int = 256) -> list:
+    """
+    Trova le coppie di feature con |r| > soglia senza costruire la matrice
+    di correlazione completa p x p: le colonne vengono standardizzate a
+    blocchi e per ogni coppia di blocchi si calcola solo la sottomatrice
+    Zi^T Zj / (n - 1), da cui si tengono le coppie sopra soglia.
+    La memoria usata e O(n x dimensione_blocco + dimensione_blocco^2).
+
+    Args:
+    df: DataFrame con colonne numeriche senza valori nulli
+    soglia: soglia sul valore assoluto della correlazione (default 0.7)
+    dimensione_blocco: numero di colonne per blocco (default 256)
+
+    Returns:
+    list: tuple (colonna_a, colonna_b, r), lista sparsa delle coppie forti
+
+    Raises:
+    ValueError: se il DataFrame contiene valori nulli
+    """
+
+    colonne = list(df.select_dtypes(include=[np.number]).columns)
+    n = len(df)
+    inizi = list(range(0, len(colonne), dimensione_blocco))
+
+    def blocco_standardizzato(inizio):
+        X = df[colonne[inizio:inizio + dimensione_blocco]].to_numpy(dtype=np.float64)
+        if np.isnan(X).any():
+            raise ValueError("La correlazione a blocchi richiede dati senza valori nulli.")
+        X = X - X.mean(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return X / np.sqrt((X * X).sum(axis=0) / (n - 1))
+
+    coppie = []
+    for a in inizi:
+        Za = blocco_standardizzato(a)
+        for b in inizi:
+            if b < a:
+                continue
+            Zb = Za if b == a else blocco_standardizzato(b)
+            r = Za.T @ Zb / (n - 1)
+            with np.errstate(invalid="ignore"):
+                forti = np.abs(r) > soglia
+            if b == a:
+                forti &= np.triu(np.ones_like(forti), k=1)
+            for i, j in zip(*np.nonzero(forti)):
+                coppie.append((colonne[a + i], colonne[b + j], r[i, j]))
+    # Stesso ordine di coppie_correlate (riga per riga del triangolo superiore)
+    posizione = {nome: k for k, nome in enumerate(colonne)}
+    coppie.sort(key=lambda c: (posizione[c[0]], posizione[c[1]]))
+    return coppie
+
+
+@traccia()
 def matrice_correlazione(df) -> "DataFrame":
     """
     Calcola e restituisce la matrice di correlazione.
@@ -53,13 +453,8 @@ def matrice_correlazione(df) -> "DataFrame":
     """
 
     correlazione = df.corr()
-    coppie_correlate = []
-    for i in range(len(correlazione.columns)):
-        for j in range(i + 1, len(correlazione.columns)):
-            if abs(correlazione.iloc[i, j]) > 0.7:
-                coppie_correlate.append((correlazione.columns[i], correlazione.columns[j], correlazione.iloc[i, j]))
     print("Coppie di feature con correlazione > 0.7 o < -0.7:")
-    for coppia in coppie_correlate:
+    for coppia in coppie_correlate(correlazione, 0.7):
         print(f"{coppia[0]} e {coppia[1]}: {coppia[2]:.2f}")
     return correlazione
 
@@ -72,34 +467,165 @@ def analisi_distribuzione(df, colonna: str) -> dict:
     - Test di normalita (Shapiro-Wilk se possibile, o altri)
     - Calcolo skewness e kurtosis
 
+    Per analizzare tutte le colonne insieme usare batteria_normalita, di cui
+    questa funzione restituisce il risultato per una sola colonna.
+
     Returns:
     dict con i risultati dell’analisi
     """
 
-    dati = df[colonna].dropna()
-    risultato = {
-        'shapiro_statistic': None,
-        'shapiro_pvalue': None,
-        'skewness': stats.skew(dati),
-        'kurtosis': stats.kurtosis(dati)
-    }
-    try:
-        shapiro_statistic, shapiro_pvalue = stats.shapiro(dati)
-        risultato['shapiro_statistic'] = shapiro_statistic
-        risultato['shapiro_pvalue'] = shapiro_pvalue
-    except Exception as e:
-        print(f"Shapiro-Wilk test non eseguibile: {e}")
+    return batteria_normalita(df, [colonna])[colonna]
+
+
+def _z_asimmetria(n, skewness):
+    # Trasformazione di D'Agostino della skewness campionaria (come scipy.stats.skewtest)
+    y = skewness * np.sqrt((n + 1) * (n + 3) / (6.0 * (n - 2)))
+    beta2 = 3.0 * (n * n + 27 * n - 70) * (n + 1) * (n + 3) / ((n - 2.0) * (n + 5) * (n + 7) * (n + 9))
+    W2 = -1 + np.sqrt(2 * (beta2 - 1))
+    delta = 1 / np.sqrt(0.5 * np.log(W2))
+    alpha = np.sqrt(2.0 / (W2 - 1))
+    y = np.where(y == 0, 1, y)
+    return delta * np.log(y / alpha + np.sqrt((y / alpha) ** 2 + 1))
+
+
+def _z_curtosi(n, kurtosis):
+    # Trasformazione di Anscombe-Glynn della kurtosis campionaria (come scipy.stats.kurtosistest)
+    b2 = kurtosis + 3
+    E = 3.0 * (n - 1) / (n + 1)
+    varb2 = 24.0 * n * (n - 2) * (n - 3) / ((n + 1) * (n + 1.0) * (n + 3) * (n + 5))
+    x = (b2 - E) / np.sqrt(varb2)
+    sqrtbeta1 = 6.0 * (n * n - 5 * n + 2) / ((n + 7) * (n + 9)) * np.sqrt(6.0 * (n + 3) * (n + 5) / (n * (n - 2) * (n - 3)))
+    A = 6.0 + 8.0 / sqrtbeta1 * (2.0 / sqrtbeta1 + np.sqrt(1 + 4.0 / sqrtbeta1 ** 2))
+    term1 = 1 - 2 / (9.0 * A)
+    denom = 1 + x * np.sqrt(2 / (A - 4.0))
+    term2 = np.sign(denom) * np.where(denom == 0.0, np.nan, ((1 - 2.0 / A) / np.abs(np.where(denom == 0.0, 1, denom))) ** (1 / 3.0))
+    return (term1 - term2) / np.sqrt(2 / (9.0 * A))
+
+
+def _anderson_darling(campione):
+    """Statistica A^2 e p-value (D'Agostino e Stephens, 1986) per ogni colonna senza NaN del campione."""
+    n = len(campione)
+    ordinati = np.sort(campione, axis=0)
+    z = (ordinati - ordinati.mean(axis=0)) / ordinati.std(axis=0, ddof=1)
+    pesi = (2 * np.arange(1, n + 1) - 1)[:, None] / n
+    A2 = -n - np.sum(pesi * (stats.norm.logcdf(z) + stats.norm.logsf(z[::-1])), axis=0)
+    A = A2 * (1 + 0.75 / n + 2.25 / n ** 2)
+    # Il polinomio del primo ramo ha il minimo in A = 153: oltre il p-value e gia ~1e-190
+    B = np.minimum(A, 153.0)
+    pvalue = np.select(
+        [A >= 0.6, A >= 0.34, A >= 0.2],
+        [np.exp(1.2937 - 5.709 * B + 0.0186 * B ** 2),
+         np.exp(0.9177 - 4.279 * B - 1.38 * B ** 2),
+         1 - np.exp(-8.318 + 42.796 * B - 59.938 * B ** 2)],
+        1 - np.exp(-13.436 + 101.14 * B - 223.73 * B ** 2))
+    return A2, np.clip(pvalue, 0.0, 1.0)
+
+
+def batteria_normalita(df, colonne: list = None, statistiche: dict = None,
+                       dimensione_campione: int = 5000, seed: int = 42, alpha: float = 0.05) -> dict:
+    """
+    Esegue una batteria di test di normalita su tutte le colonne numeriche
+    insieme:
+    - D'Agostino K^2 e Jarque-Bera, calcolati su tutti i dati dalla
+      skewness e dalla kurtosis di ogni colonna, vettorizzati su tutte le
+      colonne (le stesse formule di scipy.stats.normaltest e jarque_bera);
+    - Anderson-Darling e Shapiro-Wilk, che richiedono i dati ordinati, su un
+      campione casuale di righe (seed fisso) di al piu dimensione_campione
+      righe: Shapiro-Wilk non e affidabile oltre circa 5000 valori.
+
+    Skewness e kurtosis possono essere passate con statistiche (il
+    risultato di statistiche_descrittive), per non ricalcolare i momenti.
+    Ogni test richiede un numero minimo di valori (MINIMO_K2 per K^2 e
+    Jarque-Bera, MINIMO_ANDERSON e MINIMO_SHAPIRO per gli altri): sotto
+    la soglia, o con colonne costanti, il suo risultato e NaN.
+
+    Args:
+    df: DataFrame
+    colonne: colonne da analizzare (default tutte le colonne numeriche)
+    statistiche: statistiche_descrittive(df) gia calcolate (opzionale)
+    dimensione_campione: righe del campione per Anderson-Darling e Shapiro-Wilk
+    seed: seed del campionamento
+    alpha: livello di significativita per l'esito
+
+    Returns:
+    dict : { nome_colonna : { 'n', 'skewness', 'kurtosis', 'k2_statistic',
+    'k2_pvalue', 'jb_statistic', 'jb_pvalue', 'ad_statistic', 'ad_pvalue',
+    'shapiro_statistic', 'shapiro_pvalue', 'n_campione', 'normale' }};
+    'normale' e True se almeno un test e stato eseguito e nessuno rifiuta
+    la normalita al livello alpha
+    """
+
+    if colonne is None:
+        colonne = df.select_dtypes(include=[np.number]).columns
+    colonne = list(colonne)
+    if statistiche is not None:
+        # Nessuna copia dei dati: i momenti arrivano da statistiche_descrittive
+        n = df[colonne].count().to_numpy(dtype=np.float64)
+        skewness = np.array([statistiche[c]['skewness'] for c in colonne], dtype=np.float64)
+        kurtosis = np.array([statistiche[c]['kurtosis'] for c in colonne], dtype=np.float64)
+    else:
+        accumulatore = AccumulatoreMomenti(colonne)
+        accumulatore.aggiorna(df[colonne].to_numpy(dtype=np.float64))
+        momenti = accumulatore.statistiche()
+        n = accumulatore.n
+        skewness = np.array([momenti[c]['skewness'] for c in colonne])
+        kurtosis = np.array([momenti[c]['kurtosis'] for c in colonne])
+
+    validi = (n >= MINIMO_K2) & np.isfinite(skewness) & np.isfinite(kurtosis)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        m = np.where(validi, n, float(MINIMO_K2))
+        k2 = _z_asimmetria(m, skewness) ** 2 + _z_curtosi(m, kurtosis) ** 2
+        jb = n / 6 * (skewness ** 2 + kurtosis ** 2 / 4)
+    k2 = np.where(validi, k2, np.nan)
+    jb = np.where(validi, jb, np.nan)
 
-    return risultato
+    rng = np.random.default_rng(seed)
+    righe = np.sort(rng.choice(len(df), min(dimensione_campione, len(df)), replace=False))
+    campione = df[colonne].iloc[righe].to_numpy(dtype=np.float64)
 
+    risultati = {}
+    for j, colonna in enumerate(colonne):
+        valori = campione[:, j][~np.isnan(campione[:, j])]
+        ad = sw = (np.nan, np.nan)
+        variabile = len(valori) >= MINIMO_SHAPIRO and valori.std() > 0
+        if variabile and len(valori) >= MINIMO_ANDERSON:
+            ad = tuple(float(v[0]) for v in _anderson_darling(valori[:, None]))
+        if variabile:
+            sw = tuple(float(v) for v in stats.shapiro(valori))
+        pvalori = [stats.chi2.sf(k2[j], 2), stats.chi2.sf(jb[j], 2), ad[1], sw[1]]
+        risultati[colonna] = {
+            'n': int(n[j]),
+            'skewness': float(skewness[j]),
+            'kurtosis': float(kurtosis[j]),
+            'k2_statistic': float(k2[j]),
+            'k2_pvalue': float(pvalori[0]),
+            'jb_statistic': float(jb[j]),
+            'jb_pvalue': float(pvalori[1]),
+            'ad_statistic': ad[0],
+            'ad_pvalue': ad[1],
+            'shapiro_statistic': sw[0],
+            'shapiro_pvalue': sw[1],
+            'n_campione': len(valori),
+            'normale': (not np.isnan(pvalori).all()) and all(p >= alpha for p in pvalori if not np.isnan(p))
+        }
+    return risultati
 
-def genera_report_testuale(df ,percorso_output: str) -> None:
+
+@traccia()
+def genera_report_testuale(df ,percorso_output: str, correlazione=None,
+                           blocchi_correlazione: int = None) -> None:
     """
     Genera un report completo in formato testo (.txt) con:
     - Riepilogo del dataset
     - Statistiche descrittive formattate
     - Correlazioni significative
     - Osservazioni sugli outlier
+    - Test di normalita per colonna (batteria_normalita)
+
+    La matrice di correlazione gia calcolata (ad esempio da
+    matrice_correlazione) puo essere passata con correlazione, per non
+    ricalcolarla; con blocchi_correlazione le coppie forti vengono cercate
+    con coppie_correlate_a_blocchi, utile con migliaia di feature.
 
     Utilizza f-string e string.format() per la formattazione.
     Salva il report nella cartella output/.
@@ -126,12 +652,298 @@ def genera_report_testuale(df ,percorso_output: str) -> None:
         ...
     """
 
-    # Assicuriamoci che la cartella output/ esista
-    os.makedirs(os.path.dirname(percorso_output), exist_ok=True)
-
     # Raccogliamo i dati dalle funzioni precedenti
     stats_dict = statistiche_descrittive(df)
-    corr_matrix = df.corr()  # Chiamata interna per semplicità nel report
+
+    colonne_numeriche = list(stats_dict.keys())
+    quartili = ([stats_dict[c]['Q1'] for c in colonne_numeriche], [stats_dict[c]['Q3'] for c in colonne_numeriche])
+    conteggi_outlier = conta_outlier(df, colonne_numeriche, metodo="iqr", quartili=quartili)
+
+    if blocchi_correlazione is not None:
+        coppie = coppie_correlate_a_blocchi(df, 0.7, blocchi_correlazione)
+    else:
+        if correlazione is None:
+            correlazione = df.corr()
+        coppie = coppie_correlate(correlazione, 0.7)
+
+    normalita = batteria_normalita(df, colonne_numeriche, statistiche=stats_dict)
+
+    _scrivi_report_testuale(percorso_output, len(df), list(df.columns),
+                            stats_dict, conteggi_outlier, coppie, normalita)
+
+
+def genera_report_testuale_a_blocchi(percorso_csv: str, percorso_output: str,
+                                     dimensione_blocco: int = 100_000,
+                                     errore_quantili: float = None) -> None:
+    """
+    Genera lo stesso report di genera_report_testuale leggendo il CSV a
+    blocchi, quindi anche per file piu grandi della memoria disponibile.
+
+    - Statistiche descrittive: statistiche_descrittive_a_blocchi (un passaggio)
+    - Outlier e correlazioni: un secondo passaggio che conta i valori fuori
+      dai limiti IQR e accumula i co-momenti delle righe senza valori nulli
+
+    Args:
+    percorso_csv: percorso del CSV da analizzare
+    percorso_output: percorso del report di output
+    dimensione_blocco: numero di righe lette per blocco (default 100000)
+    errore_quantili: se indicato, quartili e limiti IQR sono stimati con uno
+    sketch KLL (vedi statistiche_descrittive_a_blocchi)
+    """
+
+    stats_dict = statistiche_descrittive_a_blocchi(percorso_csv, dimensione_blocco,
+                                                   errore_quantili=errore_quantili)
+    if not stats_dict:
+        return
+
+    colonne = list(stats_dict.keys())
+    Q1 = np.array([stats_dict[c]['Q1'] for c in colonne])
+    Q3 = np.array([stats_dict[c]['Q3'] for c in colonne])
+    limite_inferiore = Q1 - 1.5 * (Q3 - Q1)
+    limite_superiore = Q3 + 1.5 * (Q3 - Q1)
+    medie = np.array([stats_dict[c]['media'] for c in colonne])
+
+    n_campioni = 0
+    tutte_le_colonne = None
+    conteggi = np.zeros(len(colonne), dtype=np.int64)
+    n_completi = 0
+    somme = np.zeros(len(colonne))
+    prodotti = np.zeros((len(colonne), len(colonne)))
+    for blocco in carica_csv(percorso_csv, dimensione_blocco=dimensione_blocco):
+        if tutte_le_colonne is None:
+            tutte_le_colonne = list(blocco.columns)
+        X = blocco[colonne].to_numpy(dtype=np.float64)
+        n_campioni += len(X)
+        conteggi += ((X < limite_inferiore) | (X > limite_superiore)).sum(axis=0)
+        # Co-momenti sugli scarti dalla media globale (numericamente stabili)
+        Z = X[~np.isnan(X).any(axis=1)] - medie
+        n_completi += len(Z)
+        somme += Z.sum(axis=0)
+        prodotti += Z.T @ Z
+
+    coppie = []
+    if n_completi > 1:
+        covarianza = (prodotti - np.outer(somme, somme) / n_completi) / (n_completi - 1)
+        deviazioni = np.sqrt(np.diag(covarianza))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            correlazione = covarianza / np.outer(deviazioni, deviazioni)
+        coppie = coppie_correlate(pd.DataFrame(correlazione, index=colonne, columns=colonne), 0.7)
+
+    conteggi_outlier = dict(zip(colonne, conteggi.tolist()))
+    _scrivi_report_testuale(percorso_output, n_campioni, tutte_le_colonne,
+                            stats_dict, conteggi_outlier, coppie)
+
+
+class StatoReport:
+    """
+    Stato persistente e unibile del report testuale: conteggi, momenti e
+    minimo/massimo per colonna (AccumulatoreMomenti), un campione per le
+    statistiche d'ordine (CampioneQuantili) e i co-momenti delle righe senza
+    valori nulli per le correlazioni. Un nuovo lotto di righe viene unito
+    allo stato con aggiorna, quindi il costo di un aggiornamento dipende
+    dalla dimensione del lotto e non dallo storico; la memoria e quella del
+    campione piu una matrice colonne x colonne.
+
+    Media, deviazione standard, minimo, massimo e correlazioni sono esatte;
+    mediana, quartili e conteggi degli outlier (frazione del campione fuori
+    dai limiti IQR per le righe viste) sono esatti finche le righe sono al
+    piu dimensione_campione, approssimati oltre.
+
+    Args:
+    colonne: colonne numeriche analizzate
+    tutte_le_colonne: tutte le colonne del dataset, per il riepilogo
+    dimensione_campione: righe del campione per le statistiche d'ordine
+    seed: seed del campionamento
+    errore_quantili: se indicato, le statistiche d'ordine usano uno sketch
+    KLL con questo errore di rango (SketchQuantili) invece del campione
+    """
+
+    def __init__(self, colonne, tutte_le_colonne: list = None,
+                 dimensione_campione: int = 100_000, seed: int = 42, errore_quantili: float = None):
+        p = len(colonne)
+        self.colonne = list(colonne)
+        self.tutte_le_colonne = list(tutte_le_colonne or colonne)
+        self.n_campioni = 0
+        self.momenti = AccumulatoreMomenti(colonne)
+        self.campione = _nuovo_campione(p, dimensione_campione, seed, errore_quantili)
+        self.n_completi = 0
+        self.media_completi = np.zeros(p)
+        self.comomenti = np.zeros((p, p))
+
+    def aggiorna(self, blocco) -> None:
+        """
+        Aggiunge un blocco di righe.
+
+        Args:
+        blocco: DataFrame con (almeno) le colonne dello stato
+
+        Raises:
+        KeyError: se manca una delle colonne dello stato
+        """
+        X = blocco[self.colonne].to_numpy(dtype=np.float64)
+        self.n_campioni += len(X)
+        self.momenti.aggiorna(X)
+        self.campione.aggiorna(X)
+        completi = X[~np.isnan(X).any(axis=1)]
+        if len(completi):
+            media = completi.mean(axis=0)
+            scarti = completi - media
+            self._unisci_comomenti(len(completi), media, scarti.T @ scarti)
+
+    def unisci(self, altro: "StatoReport") -> None:
+        """Unisce in place lo stato di un'altra porzione dei dati con le stesse colonne."""
+        self.n_campioni += altro.n_campioni
+        self.momenti.unisci(altro.momenti)
+        self.campione.unisci(altro.campione)
+        self._unisci_comomenti(altro.n_completi, altro.media_completi, altro.comomenti)
+
+    def _unisci_comomenti(self, n: int, media, comomenti) -> None:
+        # Formula a coppie di Chan et al. estesa alla matrice dei co-momenti
+        if n == 0:
+            return
+        totale = self.n_completi + n
+        delta = media - self.media_completi
+        self.comomenti = self.comomenti + comomenti + np.outer(delta, delta) * (self.n_completi * n / totale)
+        self.media_completi = self.media_completi + delta * (n / totale)
+        self.n_completi = totale
+
+    def statistiche(self) -> dict:
+        """Statistiche descrittive, con la stessa forma di statistiche_descrittive_a_blocchi."""
+        ordine = self.campione.statistiche()
+        momenti = self.momenti.statistiche()
+        statistiche = {}
+        for j, colonna in enumerate(self.colonne):
+            m = momenti[colonna]
+            statistiche[colonna] = {
+                'media': m['media'],
+                'mediana': ordine['mediana'][j],
+                'moda': ordine['moda'][j],
+                'deviazione_standard': m['deviazione_standard'],
+                'varianza': m['varianza'],
+                'minimo': m['minimo'],
+                'massimo': m['massimo'],
+                'range': m['range'],
+                'Q1': ordine['Q1'][j],
+                'Q3': ordine['Q3'][j],
+                'IQR': ordine['IQR'][j],
+                'skewness': m['skewness'],
+                'kurtosis': m['kurtosis']
+            }
+        return statistiche
+
+    def correlazione(self) -> "DataFrame":
+        """Matrice di correlazione di Pearson delle righe senza valori nulli."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            deviazioni = np.sqrt(np.diag(self.comomenti))
+            correlazione = self.comomenti / np.outer(deviazioni, deviazioni)
+        return pd.DataFrame(correlazione, index=self.colonne, columns=self.colonne)
+
+    def scrivi_report(self, percorso_output: str) -> None:
+        """Scrive il report testuale (stesso formato di genera_report_testuale) dallo stato."""
+        stats_dict = self.statistiche()
+        Q1 = np.array([stats_dict[c]['Q1'] for c in self.colonne])
+        Q3 = np.array([stats_dict[c]['Q3'] for c in self.colonne])
+        frazioni = self.campione.frazione_fuori(Q1 - 1.5 * (Q3 - Q1), Q3 + 1.5 * (Q3 - Q1))
+        conteggi_outlier = {c: int(round(f * self.n_campioni)) for c, f in zip(self.colonne, frazioni)}
+        coppie = coppie_correlate(self.correlazione(), 0.7) if self.n_completi > 1 else []
+        _scrivi_report_testuale(percorso_output, self.n_campioni, self.tutte_le_colonne,
+                                stats_dict, conteggi_outlier, coppie)
+
+    def salva(self, percorso: str) -> None:
+        """Salva lo stato (pickle) con una scrittura atomica."""
+        os.makedirs(os.path.dirname(percorso) or ".", exist_ok=True)
+        with open(percorso + ".tmp", "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(percorso + ".tmp", percorso)
+
+    @classmethod
+    def carica(cls, percorso: str):
+        """
+        Carica uno stato salvato con salva.
+
+        Returns:
+        StatoReport oppure None se il file non esiste
+        """
+        if not os.path.exists(percorso):
+            return None
+        with open(percorso, "rb") as f:
+            return pickle.load(f)
+
+
+def aggiorna_stato_report(percorso_csv: str, stato: StatoReport = None,
+                          dimensione_blocco: int = 100_000, errore_quantili: float = None):
+    """
+    Unisce le righe di un CSV, lette a blocchi, a uno stato del report.
+
+    Args:
+    percorso_csv: CSV con le nuove righe
+    stato: stato da aggiornare; se None viene creato dalle colonne numeriche del CSV
+    dimensione_blocco: numero di righe lette per blocco (default 100000)
+    errore_quantili: errore dello sketch dei quantili di un nuovo stato (vedi StatoReport)
+
+    Returns:
+    StatoReport aggiornato, oppure stato (eventualmente None) se il CSV non esiste
+    """
+    blocchi = carica_csv(percorso_csv, dimensione_blocco=dimensione_blocco)
+    if blocchi is None:
+        return stato
+    for blocco in blocchi:
+        if stato is None:
+            stato = StatoReport(blocco.select_dtypes(include=[np.number]).columns, list(blocco.columns),
+                                errore_quantili=errore_quantili)
+        stato.aggiorna(blocco)
+    return stato
+
+
+@traccia()
+def aggiorna_report_testuale(percorso_lotto: str, percorso_stato: str, percorso_output: str,
+                             percorso_iniziale: str = None, dimensione_blocco: int = 100_000,
+                             errore_quantili: float = None):
+    """
+    Aggiornamento incrementale del report testuale: carica lo stato salvato,
+    vi unisce il nuovo lotto di righe, salva lo stato e riscrive il report.
+    Lo storico non viene riletto: se lo stato non esiste ancora viene
+    inizializzato da percorso_iniziale (se indicato) prima del lotto.
+
+    Args:
+    percorso_lotto: CSV con le nuove righe
+    percorso_stato: file dello stato (vedi StatoReport.salva)
+    percorso_output: percorso del report di output
+    percorso_iniziale: CSV dello storico usato solo alla prima esecuzione
+    dimensione_blocco: numero di righe lette per blocco (default 100000)
+    errore_quantili: errore dello sketch dei quantili, usato solo alla
+    creazione dello stato (vedi StatoReport)
+
+    Returns:
+    StatoReport aggiornato, oppure None se il lotto non esiste o non ci
+    sono dati; in questi casi stato e report non vengono modificati
+
+    Raises:
+    KeyError: se al lotto manca una delle colonne dello stato
+    """
+    if not os.path.exists(percorso_lotto):
+        print(f"Errore : il file {percorso_lotto} non esiste.")
+        return None
+    stato = StatoReport.carica(percorso_stato)
+    if stato is None and percorso_iniziale is not None:
+        stato = aggiorna_stato_report(percorso_iniziale, dimensione_blocco=dimensione_blocco,
+                                      errore_quantili=errore_quantili)
+    stato = aggiorna_stato_report(percorso_lotto, stato, dimensione_blocco=dimensione_blocco,
+                                  errore_quantili=errore_quantili)
+    if stato is None:
+        return None
+    stato.salva(percorso_stato)
+    stato.scrivi_report(percorso_output)
+    return stato
+
+
+def _scrivi_report_testuale(percorso_output: str, n_campioni: int, colonne: list,
+                            stats_dict: dict, conteggi_outlier: dict,
+                            coppie: list, normalita: dict = None) -> None:
+    """Scrive su file il report testuale a partire dai risultati gia calcolati."""
+
+    # Assicuriamoci che la cartella output/ esista
+    os.makedirs(os.path.dirname(percorso_output), exist_ok=True)
     data_ora = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     with open(percorso_output, "w", encoding="utf-8") as f:
@@ -144,9 +956,9 @@ def genera_report_testuale(df ,percorso_output: str) -> None:
         # 2. RIEPILOGO DATASET
         f.write("RIEPILOGO DATASET\n")
         f.write("-" * 55 + "\n")
-        f.write(f"Numero di campioni: {len(df):,}\n")
-        f.write(f"Numero di feature:  {len(df.columns)}\n")
-        f.write(f"Colonne presenti:   {', '.join(df.columns[:5])}...\n\n")
+        f.write(f"Numero di campioni: {n_campioni:,}\n")
+        f.write(f"Numero di feature:  {len(colonne)}\n")
+        f.write(f"Colonne presenti:   {', '.join(colonne[:5])}...\n\n")
 
         # 3. STATISTICHE DESCRITTIVE (Tabellare)
         f.write("STATISTICHE DESCRITTIVE\n")
@@ -167,24 +979,30 @@ def genera_report_testuale(df ,percorso_output: str) -> None:
         # 4. OSSERVAZIONI OUTLIER
         f.write("ANALISI OUTLIER (Metodo IQR)\n")
         f.write("-" * 55 + "\n")
-        for col in df.select_dtypes(include=[np.number]).columns:
-            outliers_indices = rileva_outlier(df, col, metodo="iqr")
-            n_outliers = len(outliers_indices)
-            percentuale = (n_outliers / len(df)) * 100
+        for col, n_outliers in conteggi_outlier.items():
+            percentuale = (n_outliers / n_campioni) * 100
             f.write(f"- {col:<15}: {n_outliers:>6} outlier rilevati ({percentuale:>5.2f}%)\n")
         f.write("\n")
 
         # 5. CORRELAZIONI SIGNIFICATIVE
         f.write("CORRELAZIONI SIGNIFICATIVE (|r| > 0.7)\n")
         f.write("-" * 55 + "\n")
-        trovate = False
-        for i in range(len(corr_matrix.columns)):
-            for j in range(i + 1, len(corr_matrix.columns)):
-                r = corr_matrix.iloc[i, j]
-                if abs(r) > 0.7:
-                    f.write(f"- {corr_matrix.columns[i]} vs {corr_matrix.columns[j]}: {r:.4f}\n")
-                    trovate = True
-        if not trovate:
+        for colonna_a, colonna_b, r in coppie:
+            f.write(f"- {colonna_a} vs {colonna_b}: {r:.4f}\n")
+        if not coppie:
             f.write("Nessuna correlazione forte rilevata.\n")
 
-    print(f"Report generato con successo in: {percorso_output}")
\ No newline at end of file
+        # 6. TEST DI NORMALITA
+        if normalita:
+            n_campione = max(r['n_campione'] for r in normalita.values())
+            f.write("\n")
+            f.write(f"TEST DI NORMALITA (p-value; AD e Shapiro su {n_campione:,} righe campionate)\n")
+            f.write("-" * 55 + "\n")
+            f.write("{:<15} {:>10} {:>10} {:>10} {:>10}  {}\n".format(
+                "Colonna", "K2", "JB", "AD", "Shapiro", "Esito"))
+            for col, r in normalita.items():
+                f.write("{:<15} {:>10.3g} {:>10.3g} {:>10.3g} {:>10.3g}  {}\n".format(
+                    col[:14], r['k2_pvalue'], r['jb_pvalue'], r['ad_pvalue'], r['shapiro_pvalue'],
+                    "normale" if r['normale'] else "non normale"))
+
+    print(f"Report generato con successo in: {percorso_output}")
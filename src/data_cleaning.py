@@ -1,3 +1,9 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+
 def info_dataset(df) -> dict:
     """
     Restituisce un dizionario con le informazioni di base del dataset :
@@ -46,7 +52,391 @@ def gestisci_valori_nulli(df, strategia: str = "media") -> "DataFrame":
         raise ValueError(f"Strategia non supportata: {strategia}")
 
 
-def rileva_outlier(df, colonna: str, metodo: str = "iqr") -> list:
+def valori_riempimento(df, strategia: str = "media"):
+    """
+    Restituisce i valori con cui gestisci_valori_nulli riempie i NaN di ogni
+    colonna, da salvare per applicare la stessa pulizia a dati nuovi.
+
+    Args:
+    df: DataFrame di riferimento (es. il training set)
+    strategia : " media ", " mediana ", " elimina " o " zero "
+
+    Returns:
+    dict {colonna: valore} oppure None per la strategia "elimina"
+
+    Raises:
+    ValueError : se la strategia non e tra quelle supportate
+    """
+    if strategia == "media":
+        valori = df.mean()
+    elif strategia == "mediana":
+        valori = df.median()
+    elif strategia == "elimina":
+        return None
+    elif strategia == "zero":
+        valori = pd.Series(0.0, index=df.columns)
+    else:
+        raise ValueError(f"Strategia non supportata: {strategia}")
+    return {colonna: float(valore) for colonna, valore in valori.items()}
+
+
+_QUANTILI = {'minimo': 0.0, 'Q1': 0.25, 'mediana': 0.5, 'Q3': 0.75, 'massimo': 1.0}
+
+
+def statistiche_ordine(matrice, moda: bool = True) -> dict:
+    """
+    Calcola tutte le statistiche d'ordine di ogni colonna con un solo
+    ordinamento per colonna.
+
+    Con moda=True ogni colonna viene ordinata una volta (np.sort) e la moda
+    si ricava dalla sequenza di valori uguali piu lunga; con moda=False basta
+    un solo np.partition sulle posizioni dei quartili.
+    I valori NaN vengono ignorati colonna per colonna. I quantili usano
+    l'interpolazione lineare, come np.percentile e Series.quantile; la moda
+    segue le regole di moda_colonne (esatta per le colonne discrete, picco
+    della densita stimata per quelle continue) sfruttando l'ordinamento.
+
+    Args:
+    matrice: array 2-D (righe x colonne) o 1-D (una sola colonna)
+    moda: se calcolare anche la moda (default True)
+
+    Returns:
+    dict con array di lunghezza n_colonne: 'conteggio', 'minimo', 'Q1',
+    'mediana', 'Q3', 'massimo', 'IQR' e, se richiesta, 'moda'
+    """
+
+    matrice = np.asarray(matrice, dtype=np.float64).reshape(len(matrice), -1)
+    # Layout colonne x righe: ogni colonna e un blocco contiguo di memoria
+    trasposta = np.ascontiguousarray(matrice.T)
+    n = (~np.isnan(trasposta)).sum(axis=1)
+    q = np.array(list(_QUANTILI.values()))
+
+    risultati = np.full((len(q), len(trasposta)), np.nan)
+    mode = np.full(len(trasposta), np.nan)
+    for j, valori in enumerate(trasposta):
+        if n[j] == 0:
+            continue
+        posizioni = (n[j] - 1) * q
+        basso = np.floor(posizioni).astype(np.intp)
+        alto = np.ceil(posizioni).astype(np.intp)
+        if moda:
+            ordinati = np.sort(valori)[:n[j]]  # i NaN finiscono in fondo
+            mode[j] = _moda_colonna(ordinati, N_BIN_MODA, ordinata=True)
+        else:
+            ordinati = np.partition(valori, np.unique(np.r_[basso, alto]))
+        a, b = ordinati[basso], ordinati[alto]
+        risultati[:, j] = a + (b - a) * (posizioni - basso)
+
+    statistiche = {'conteggio': n}
+    statistiche.update(zip(_QUANTILI.keys(), risultati))
+    statistiche['IQR'] = statistiche['Q3'] - statistiche['Q1']
+    if moda:
+        statistiche['moda'] = mode
+    return statistiche
+
+
+# Ampiezza massima dell'intervallo di una colonna intera contata con np.bincount
+LIMITE_BINCOUNT = 1 << 20
+# Valori usati per decidere se una colonna non intera e discreta
+CAMPIONE_DISCRETE = 10_000
+# Sotto questi valori finiti, o con al piu questi valori distinti nel campione,
+# la moda e sempre quella esatta
+MINIMO_MODA_CONTINUA = 200
+MASSIMO_DISTINTI_DISCRETE = 100
+N_BIN_MODA = 512
+
+
+def moda_colonne(matrice, n_bin: int = N_BIN_MODA) -> np.ndarray:
+    """
+    Calcola la moda di ogni colonna in tempo lineare, senza ordinare.
+
+    - Colonne intere con intervallo ridotto: conteggio diretto con
+      np.bincount (moda esatta).
+    - Colonne con pochi valori distinti (stimati su un campione a passo
+      fisso di CAMPIONE_DISCRETE valori: al piu MASSIMO_DISTINTI_DISCRETE o
+      il 5% del campione), con meno di MINIMO_MODA_CONTINUA valori finiti o
+      con deviazione standard nulla: conteggio con tabella hash
+      (value_counts di pandas), moda esatta.
+    - Colonne continue, dove quasi ogni valore e unico e la moda esatta non
+      ha significato: picco di una stima della densita a kernel gaussiano
+      calcolata sui valori finiti con un istogramma di n_bin classi in
+      media +- 4 deviazioni standard (entro minimo e massimo), affinato con
+      un'interpolazione parabolica.
+
+    A parita di frequenza vale il valore piu piccolo, come scipy.stats.mode.
+    I valori NaN vengono ignorati colonna per colonna.
+
+    Args:
+    matrice: array 2-D (righe x colonne) o 1-D (una sola colonna)
+    n_bin: classi dell'istogramma per le colonne continue (default 512)
+
+    Returns:
+    np.ndarray con la moda di ogni colonna (NaN se la colonna e vuota)
+    """
+
+    matrice = np.asarray(matrice, dtype=np.float64).reshape(len(matrice), -1)
+    return np.array([_moda_colonna(matrice[:, j], n_bin) for j in range(matrice.shape[1])])
+
+
+def _moda_colonna(valori, n_bin: int, ordinata: bool = False) -> float:
+    """Moda di una colonna (vedi moda_colonne); con ordinata=True valori e gia ordinato e senza NaN."""
+    if ordinata:
+        if not len(valori):
+            return np.nan
+        minimo, massimo = valori[0], valori[-1]
+    else:
+        minimo = valori.min() if len(valori) else np.nan
+        if np.isnan(minimo):
+            valori = valori[~np.isnan(valori)]
+            if not len(valori):
+                return np.nan
+            minimo = valori.min()
+        massimo = valori.max()
+    campione = valori[::max(1, len(valori) // CAMPIONE_DISCRETE)]
+
+    # Il controllo sul campione evita il passaggio completo sulle colonne continue
+    intera = (massimo - minimo < LIMITE_BINCOUNT and np.array_equal(campione, np.floor(campione))
+              and np.array_equal(valori, np.floor(valori)))
+    esatta = (intera or len(valori) < MINIMO_MODA_CONTINUA
+              or len(pd.unique(campione)) <= max(MASSIMO_DISTINTI_DISCRETE, 0.05 * len(campione)))
+    if not esatta:
+        finiti = valori if np.isfinite(minimo) and np.isfinite(massimo) else valori[np.isfinite(valori)]
+        if len(finiti) >= MINIMO_MODA_CONTINUA:
+            media, deviazione = finiti.mean(), finiti.std()
+            esatta = not (np.isfinite(deviazione) and deviazione > 0)
+        else:
+            esatta = True
+    if esatta:
+        if ordinata:
+            # Colonna ordinata: la moda e l'inizio della sequenza di valori uguali piu lunga
+            inizi = np.flatnonzero(np.r_[True, valori[1:] != valori[:-1]])
+            lunghezze = np.diff(np.r_[inizi, len(valori)])
+            return float(valori[inizi[np.argmax(lunghezze)]])
+        if intera:
+            conteggi = np.bincount((valori - minimo).astype(np.intp))
+            return float(minimo + np.argmax(conteggi))
+        conteggi = pd.Series(valori).value_counts(sort=False)
+        return float(conteggi.index[conteggi.to_numpy() == conteggi.max()].min())
+
+    basso = max(finiti.min() if finiti is not valori else minimo, media - 4 * deviazione)
+    alto = min(finiti.max() if finiti is not valori else massimo, media + 4 * deviazione)
+    # Classi 0 e n_bin + 1 raccolgono i valori fuori da [basso, alto] e vengono scartate;
+    # la larghezza appena maggiorata tiene alto nell'ultima classe valida
+    larghezza = (alto - basso) / n_bin * (1 + 1e-12)
+    indici = ((finiti - basso) / larghezza + 1).astype(np.intp)
+    np.clip(indici, 0, n_bin + 1, out=indici)
+    conteggi = np.bincount(indici, minlength=n_bin + 2)[1:n_bin + 1].astype(np.float64)
+
+    # KDE su dati raggruppati: convoluzione con un kernel gaussiano di 2 classi di deviazione standard
+    kernel = np.exp(-0.5 * (np.arange(-8, 9) / 2.0) ** 2)
+    densita = np.convolve(conteggi, kernel / kernel.sum(), mode="same")
+    picco = int(np.argmax(densita))
+    spostamento = 0.0
+    if 0 < picco < n_bin - 1:
+        a, b, c = densita[picco - 1:picco + 2]
+        if a - 2 * b + c < 0:
+            spostamento = 0.5 * (a - c) / (a - 2 * b + c)
+    return float(basso + (picco + 0.5 + spostamento) * larghezza)
+
+
+def errore_kll(k: int) -> float:
+    """
+    Errore di rango normalizzato di uno SketchKLL con parametro k: con
+    confidenza del 99% il rango stimato di un quantile dista dal vero al
+    piu errore * n posizioni (stima empirica di Apache DataSketches per
+    sketch KLL con gli stessi parametri).
+    """
+    return 2.296 / k ** 0.9723
+
+
+def k_per_errore(errore: float) -> int:
+    """
+    Parametro k minimo di uno SketchKLL per un errore di rango normalizzato
+    (vedi errore_kll).
+
+    Raises:
+    ValueError: se errore non e compreso tra 0 e 1
+    """
+    if not 0 < errore < 1:
+        raise ValueError(f"L'errore deve essere compreso tra 0 e 1: {errore}")
+    return max(8, int(np.ceil((2.296 / errore) ** (1 / 0.9723))))
+
+
+class SketchKLL:
+    """
+    Sketch KLL (Karnin, Lang, Liberty) dei quantili di una colonna: memoria
+    limitata (circa 3k valori) qualunque sia il numero di valori visti, con
+    errore di rango normalizzato configurabile (vedi errore_kll).
+
+    I valori sono conservati in livelli: un valore al livello h rappresenta
+    2^h valori originali. Quando lo sketch supera la capacita, il livello
+    piu basso pieno viene ordinato e dimezzato tenendo un valore ogni due
+    (con scarto iniziale casuale) che sale al livello successivo. Due
+    sketch si uniscono concatenando i livelli e comprimendo, quindi sketch
+    calcolati su blocchi o processi diversi si combinano senza rileggere i
+    dati. Finche nessun livello e stato compresso i quantili sono esatti.
+    I valori NaN vengono ignorati; minimo e massimo sono sempre esatti.
+
+    Args:
+    errore: errore di rango normalizzato desiderato (default 0.01)
+    seed: seed delle scelte casuali della compressione
+    """
+
+    def __init__(self, errore: float = 0.01, seed=42):
+        self.k = k_per_errore(errore)
+        self.livelli = [np.empty(0)]
+        self.n = 0
+        self.minimo = np.inf
+        self.massimo = -np.inf
+        self.rng = np.random.default_rng(seed)
+
+    @property
+    def errore(self) -> float:
+        return errore_kll(self.k)
+
+    def _capacita(self, h: int) -> int:
+        # I livelli alti (pesi maggiori) hanno capacita k, quelli bassi decrescono di 2/3 per livello
+        return max(8, int(np.ceil(self.k * (2 / 3) ** (len(self.livelli) - h - 1))))
+
+    def aggiorna(self, valori) -> None:
+        """Aggiunge un array 1-D di valori."""
+        valori = np.asarray(valori, dtype=np.float64).ravel()
+        valori = valori[~np.isnan(valori)]
+        if not len(valori):
+            return
+        self.n += len(valori)
+        self.minimo = min(self.minimo, valori.min())
+        self.massimo = max(self.massimo, valori.max())
+        self.livelli[0] = np.concatenate([self.livelli[0], valori])
+        self._comprimi()
+
+    def unisci(self, altro: "SketchKLL") -> None:
+        """
+        Unisce in place un altro sketch.
+
+        Raises:
+        ValueError: se i due sketch hanno k diversi
+        """
+        if altro.k != self.k:
+            raise ValueError("Gli sketch da unire devono avere lo stesso errore")
+        while len(self.livelli) < len(altro.livelli):
+            self.livelli.append(np.empty(0))
+        for h, livello in enumerate(altro.livelli):
+            self.livelli[h] = np.concatenate([self.livelli[h], livello])
+        self.n += altro.n
+        self.minimo = min(self.minimo, altro.minimo)
+        self.massimo = max(self.massimo, altro.massimo)
+        self._comprimi()
+
+    def _comprimi(self) -> None:
+        while (sum(len(livello) for livello in self.livelli)
+               > sum(self._capacita(h) for h in range(len(self.livelli)))):
+            h = next(h for h, livello in enumerate(self.livelli) if len(livello) >= self._capacita(h))
+            livello = np.sort(self.livelli[h])
+            resto, livello = livello[:len(livello) % 2], livello[len(livello) % 2:]
+            if h + 1 == len(self.livelli):
+                self.livelli.append(np.empty(0))
+            self.livelli[h + 1] = np.concatenate([self.livelli[h + 1], livello[self.rng.integers(2)::2]])
+            # copy: una vista terrebbe in memoria l'intero livello ordinato
+            self.livelli[h] = resto.copy()
+
+    def _ordinati(self) -> tuple:
+        """Valori conservati ordinati e posizione (esclusa) in cui finisce ciascuno nel rango pesato."""
+        valori = np.concatenate(self.livelli)
+        pesi = np.concatenate([np.full(len(livello), 2.0 ** h) for h, livello in enumerate(self.livelli)])
+        ordine = np.argsort(valori)
+        return valori[ordine], np.cumsum(pesi[ordine])
+
+    def quantili(self, q) -> np.ndarray:
+        """
+        Quantili stimati per le probabilita q, con interpolazione lineare
+        tra posizioni adiacenti come np.percentile (a cui coincidono finche
+        lo sketch non e stato compresso).
+        """
+        q = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        if self.n == 0:
+            return np.full(len(q), np.nan)
+        valori, fine = self._ordinati()
+        posizioni = q * (fine[-1] - 1)
+        basso, alto = np.floor(posizioni), np.ceil(posizioni)
+        a = valori[np.searchsorted(fine, basso, side="right")]
+        b = valori[np.searchsorted(fine, alto, side="right")]
+        risultato = a + (b - a) * (posizioni - basso)
+        risultato[q <= 0] = self.minimo
+        risultato[q >= 1] = self.massimo
+        return risultato
+
+    def frazione_fuori(self, limite_inferiore: float, limite_superiore: float) -> float:
+        """Stima della frazione di valori minori di limite_inferiore o maggiori di limite_superiore."""
+        if self.n == 0:
+            return 0.0
+        valori, fine = self._ordinati()
+        sotto = np.searchsorted(valori, limite_inferiore, side="left")
+        sopra = np.searchsorted(valori, limite_superiore, side="right")
+        peso_sotto = fine[sotto - 1] if sotto else 0.0
+        peso_sopra = fine[-1] - (fine[sopra - 1] if sopra else 0.0)
+        return (peso_sotto + peso_sopra) / fine[-1]
+
+
+class SketchQuantili:
+    """
+    Uno SketchKLL per colonna, con la stessa interfaccia di
+    CampioneQuantili (src.analisi_esplorativa): aggiorna con blocchi 2-D,
+    unisci, statistiche d'ordine e limiti IQR in memoria limitata.
+
+    Args:
+    n_colonne: numero di colonne
+    errore: errore di rango normalizzato di ogni colonna (default 0.01)
+    seed: seed delle scelte casuali della compressione
+    """
+
+    def __init__(self, n_colonne: int, errore: float = 0.01, seed: int = 42):
+        semi = np.random.SeedSequence(seed).spawn(n_colonne)
+        self.sketch = [SketchKLL(errore, seme) for seme in semi]
+
+    @property
+    def errore(self) -> float:
+        return self.sketch[0].errore if self.sketch else 0.0
+
+    def aggiorna(self, X) -> None:
+        """Aggiunge un blocco di righe (array 2-D righe x colonne)."""
+        X = np.asarray(X, dtype=np.float64).reshape(len(X), -1)
+        for j, sketch in enumerate(self.sketch):
+            sketch.aggiorna(X[:, j])
+
+    def unisci(self, altro: "SketchQuantili") -> None:
+        """Unisce in place gli sketch di un'altra porzione dei dati con le stesse colonne."""
+        for sketch, sketch_altro in zip(self.sketch, altro.sketch):
+            sketch.unisci(sketch_altro)
+
+    def statistiche(self, moda: bool = True) -> dict:
+        """
+        Statistiche d'ordine stimate, con le chiavi di statistiche_ordine.
+        La moda non si ricava da uno sketch: se richiesta vale NaN.
+        """
+        q = np.array(list(_QUANTILI.values()))
+        risultati = np.array([sketch.quantili(q) for sketch in self.sketch]).reshape(-1, len(q)).T
+        statistiche = {'conteggio': np.array([sketch.n for sketch in self.sketch])}
+        statistiche.update(zip(_QUANTILI.keys(), risultati))
+        statistiche['IQR'] = statistiche['Q3'] - statistiche['Q1']
+        if moda:
+            statistiche['moda'] = np.full(len(self.sketch), np.nan)
+        return statistiche
+
+    def limiti_iqr(self, fattore: float = 1.5) -> tuple:
+        """Limiti (inferiore, superiore) della regola IQR: Q1 - fattore * IQR e Q3 + fattore * IQR."""
+        ordine = self.statistiche(moda=False)
+        return ordine['Q1'] - fattore * ordine['IQR'], ordine['Q3'] + fattore * ordine['IQR']
+
+    def frazione_fuori(self, limite_inferiore, limite_superiore) -> np.ndarray:
+        """Stima per colonna della frazione di valori fuori da [limite_inferiore, limite_superiore]."""
+        inferiori = np.broadcast_to(limite_inferiore, len(self.sketch))
+        superiori = np.broadcast_to(limite_superiore, len(self.sketch))
+        return np.array([sketch.frazione_fuori(a, b) for sketch, a, b in zip(self.sketch, inferiori, superiori)])
+
+
+def rileva_outlier(df, colonna: str, metodo: str = "iqr", quartili: tuple = None,
+                   errore_quantili: float = None) -> list:
     """
     Rileva gli outlier in una colonna specifica.
 
@@ -54,33 +444,237 @@ def rileva_outlier(df, colonna: str, metodo: str = "iqr") -> list:
     df: DataFrame
     colonna: nome della colonna da analizzare
     metodo: "iqr" (InterQuartile Range) o " zscore "
+    quartili: (Q1, Q3) gia calcolati, ad esempio da statistiche_descrittive,
+    per evitare di ordinare di nuovo la colonna (solo per "iqr")
+    errore_quantili: se indicato, Q1 e Q3 sono stimati con uno SketchKLL
+    con questo errore di rango invece che ordinando la colonna
 
     Returns:
     Lista degli indici delle righe con outlier
     """
 
-    if metodo == "iqr":
-        Q1 = df[colonna].quantile(0.25)
-        Q3 = df[colonna].quantile(0.75)
-        IQR = Q3 - Q1
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
-        outliers = df[(df[colonna] < lower_bound) | (df[colonna] > upper_bound)].index.tolist()
-    elif metodo == "zscore":
-        mean = df[colonna].mean()
-        std = df[colonna].std()
-        z_scores = (df[colonna] - mean) / std
-        outliers = df[abs(z_scores) > 3].index.tolist()
-    else:
-        raise ValueError(f"Metodo non supportato: {metodo}")
+    maschera = maschera_outlier(df, [colonna], metodo=metodo, quartili=quartili,
+                                errore_quantili=errore_quantili)
+    return df.index[maschera.to_numpy()[:, 0]].tolist()
+
+
+def maschera_outlier(df, colonne: list = None, metodo: str = "iqr",
+                     quartili: tuple = None, soglia_zscore: float = 3.0,
+                     errore_quantili: float = None):
+    """
+    Rileva gli outlier di piu colonne in un solo passaggio vettorizzato.
+
+    Args:
+    df: DataFrame
+    colonne: colonne da analizzare (default tutte le colonne numeriche)
+    metodo: "iqr" (InterQuartile Range) o "zscore"
+    quartili: (Q1, Q3) gia calcolati, scalari o array con un valore per
+    colonna (solo per "iqr")
+    soglia_zscore: |z| oltre cui un valore e outlier (default 3)
+    errore_quantili: se indicato e quartili manca, Q1 e Q3 sono stimati con
+    SketchQuantili con questo errore di rango (solo per "iqr")
+
+    Returns:
+    DataFrame booleano (righe x colonne) con True in corrispondenza degli outlier
+
+    Raises:
+    ValueError: se il metodo non e supportato
+    KeyError: se una colonna non esiste
+    """
+
+    if colonne is None:
+        colonne = df.select_dtypes(include=[np.number]).columns
+    X = df[list(colonne)].to_numpy(dtype=np.float64)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if metodo == "iqr":
+            if quartili is None and errore_quantili is not None:
+                sketch = SketchQuantili(X.shape[1], errore_quantili)
+                sketch.aggiorna(X)
+                ordine = sketch.statistiche(moda=False)
+                quartili = (ordine['Q1'], ordine['Q3'])
+            elif quartili is None:
+                ordine = statistiche_ordine(X, moda=False)
+                quartili = (ordine['Q1'], ordine['Q3'])
+            Q1, Q3 = np.asarray(quartili[0], dtype=np.float64), np.asarray(quartili[1], dtype=np.float64)
+            IQR = Q3 - Q1
+            maschera = (X < Q1 - 1.5 * IQR) | (X > Q3 + 1.5 * IQR)
+        elif metodo == "zscore":
+            media = np.nanmean(X, axis=0) if len(X) else np.full(X.shape[1], np.nan)
+            std = np.nanstd(X, axis=0, ddof=1) if len(X) > 1 else np.full(X.shape[1], np.nan)
+            maschera = np.abs((X - media) / std) > soglia_zscore
+        else:
+            raise ValueError(f"Metodo non supportato: {metodo}")
+
+    return pd.DataFrame(maschera, index=df.index, columns=list(colonne))
+
+
+def conta_outlier(df, colonne: list = None, metodo: str = "iqr", quartili: tuple = None) -> dict:
+    """
+    Conta gli outlier per colonna senza costruire liste di indici.
+
+    Args:
+    df: DataFrame
+    colonne: colonne da analizzare (default tutte le colonne numeriche)
+    metodo: "iqr" o "zscore"
+    quartili: (Q1, Q3) gia calcolati (solo per "iqr")
+
+    Returns:
+    dict ( nome_colonna : numero di outlier )
+    """
+
+    maschera = maschera_outlier(df, colonne, metodo=metodo, quartili=quartili)
+    conteggi = maschera.to_numpy().sum(axis=0)
+    return dict(zip(maschera.columns, conteggi.tolist()))
 
-    return outliers
+
+def righe_con_outlier(df, colonne: list = None, metodo: str = "iqr", quartili: tuple = None):
+    """
+    Indica le righe che hanno un outlier in almeno una delle colonne.
+
+    Args:
+    df: DataFrame
+    colonne: colonne da analizzare (default tutte le colonne numeriche)
+    metodo: "iqr" o "zscore"
+    quartili: (Q1, Q3) gia calcolati (solo per "iqr")
+
+    Returns:
+    Series booleana con lo stesso indice del DataFrame
+    """
+
+    maschera = maschera_outlier(df, colonne, metodo=metodo, quartili=quartili)
+    return pd.Series(maschera.to_numpy().any(axis=1), index=df.index)
+
+
+class Normalizzatore:
+    """
+    Normalizzatore riutilizzabile con fit / transform.
+
+    fit calcola le statistiche di tutte le colonne in un solo passaggio
+    vettorizzato; transform applica (x - centro) / scala, anche in place su
+    un array float32. I parametri stimati si possono serializzare in JSON,
+    cosi la stessa trasformazione si applica in predizione senza i dati
+    di training.
+
+    Args:
+    metodo: "minmax" (centro = minimo, scala = massimo - minimo) o
+    "standard" (centro = media, scala = deviazione standard con ddof=1)
+
+    Raises:
+    ValueError: se il metodo non e supportato
+    """
+
+    METODI = ("minmax", "standard")
+
+    def __init__(self, metodo: str = "minmax"):
+        if metodo not in self.METODI:
+            raise ValueError(f"Metodo non supportato: {metodo}")
+        self.metodo = metodo
+        self.colonne = None
+        self.centro = None
+        self.scala = None
+
+    def fit(self, dati, colonne: list = None) -> "Normalizzatore":
+        """
+        Stima centro e scala di ogni colonna (i NaN vengono ignorati).
+
+        Args:
+        dati: DataFrame o array 2-D
+        colonne: colonne del DataFrame da normalizzare (default tutte)
+
+        Returns:
+        il normalizzatore stesso
+        """
+        if isinstance(dati, pd.DataFrame):
+            self.colonne = list(dati.columns if colonne is None else colonne)
+            X = dati[self.colonne].to_numpy(dtype=np.float64)
+        else:
+            X = np.asarray(dati, dtype=np.float64).reshape(len(dati), -1)
+            self.colonne = None if colonne is None else list(colonne)
+
+        if self.metodo == "minmax":
+            self.centro = np.nanmin(X, axis=0)
+            self.scala = np.nanmax(X, axis=0) - self.centro
+        else:
+            self.centro = np.nanmean(X, axis=0)
+            self.scala = np.nanstd(X, axis=0, ddof=1)
+        return self
+
+    def transform(self, dati, in_place: bool = False):
+        """
+        Applica la normalizzazione stimata con fit.
+
+        Args:
+        dati: DataFrame (vengono trasformate solo le colonne del fit) o
+        array 2-D con una colonna per ogni colonna del fit
+        in_place: se True e dati e un array float (es. float32), il risultato
+        viene scritto nell'array stesso senza allocare copie
+
+        Returns:
+        DataFrame o array normalizzato
+        """
+        if self.centro is None:
+            raise ValueError("Il normalizzatore non e stato addestrato: chiamare prima fit().")
+
+        if isinstance(dati, pd.DataFrame):
+            colonne = self.colonne if self.colonne is not None else list(dati.columns)
+            risultato = dati if in_place else dati.copy()
+            X = dati[colonne].to_numpy(dtype=np.float64)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                risultato[colonne] = (X - self.centro) / self.scala
+            return risultato
+
+        if in_place and isinstance(dati, np.ndarray) and np.issubdtype(dati.dtype, np.floating):
+            X = dati
+        else:
+            X = np.array(dati, dtype=np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            np.subtract(X, self.centro.astype(X.dtype), out=X)
+            np.divide(X, self.scala.astype(X.dtype), out=X)
+        return X
+
+    def fit_transform(self, dati, colonne: list = None, in_place: bool = False):
+        """Esegue fit e transform sugli stessi dati."""
+        return self.fit(dati, colonne).transform(dati, in_place=in_place)
+
+    def a_dizionario(self) -> dict:
+        """Restituisce i parametri stimati come dizionario serializzabile in JSON."""
+        return {
+            'metodo': self.metodo,
+            'colonne': self.colonne,
+            'centro': None if self.centro is None else self.centro.tolist(),
+            'scala': None if self.scala is None else self.scala.tolist()
+        }
+
+    @classmethod
+    def da_dizionario(cls, parametri: dict) -> "Normalizzatore":
+        """Ricostruisce un normalizzatore da un dizionario creato con a_dizionario."""
+        normalizzatore = cls(parametri['metodo'])
+        normalizzatore.colonne = parametri['colonne']
+        if parametri['centro'] is not None:
+            normalizzatore.centro = np.array(parametri['centro'], dtype=np.float64)
+            normalizzatore.scala = np.array(parametri['scala'], dtype=np.float64)
+        return normalizzatore
+
+    def salva(self, percorso: str) -> None:
+        """Salva i parametri stimati in un file JSON."""
+        with open(percorso, "w", encoding="utf-8") as f:
+            json.dump(self.a_dizionario(), f, indent=2)
+
+    @classmethod
+    def carica(cls, percorso: str) -> "Normalizzatore":
+        """Carica un normalizzatore salvato con salva."""
+        with open(percorso, "r", encoding="utf-8") as f:
+            return cls.da_dizionario(json.load(f))
 
 
 def normalizza_colonne(df, colonne: list, metodo: str = "minmax"):
     """
     Normalizza le colonne specificate.
 
+    Per riutilizzare le stesse statistiche su altri dati (ad esempio il
+    test set o nuove osservazioni) usare direttamente Normalizzatore.
+
     Args:
     df: DataFrame
     colonne: lista di nomi delle colonne
@@ -90,16 +684,4 @@ def normalizza_colonne(df, colonne: list, metodo: str = "minmax"):
     DataFrame con colonne normalizzate
     """
 
-    df_normalizzato = df.copy()
-    for colonna in colonne:
-        if metodo == "minmax":
-            min_val = df[colonna].min()
-            max_val = df[colonna].max()
-            df_normalizzato[colonna] = (df[colonna] - min_val) / (max_val - min_val)
-        elif metodo == "standard":
-            mean = df[colonna].mean()
-            std = df[colonna].std()
-            df_normalizzato[colonna] = (df[colonna] - mean) / std
-        else:
-            raise ValueError(f"Metodo non supportato: {metodo}")
-    return df_normalizzato
+    return Normalizzatore(metodo).fit_transform(df, colonne)
@@ -1,6 +1,12 @@
-from sklearn.datasets import fetch_california_housing
 import pandas as pd
+import numpy as np
+import hashlib
+import pickle
+import shutil
+import json
+import glob
 import os
+import re
 
 def carica_dataset() -> tuple:
     """
@@ -9,6 +15,9 @@ def carica_dataset() -> tuple:
     Returns:
     tuple: (DataFrame con le feature, Series con il target)
     """
+    # Import locale: scikit-learn serve solo per scaricare il dataset
+    from sklearn.datasets import fetch_california_housing
+
     data = fetch_california_housing(as_frame=True)
     tuple_data = (data.data, data.target)
     return tuple_data
@@ -30,18 +39,416 @@ def salva_csv(df, percorso: str) -> None:
     df.to_csv(percorso, index=False)
 
 
-def carica_csv(percorso: str):
+def percorso_cache(percorso: str) -> str:
+    """
+    Calcola il percorso del file di cache binario (.npz) associato a un CSV.
+
+    La chiave della cache dipende dalla sorgente (percorso assoluto,
+    dimensione e data di modifica del file) e dallo schema (riga di
+    intestazione), quindi qualsiasi modifica al CSV invalida la cache.
+    La cache viene salvata nella sottocartella cache/ accanto al CSV.
+
+    Args:
+    percorso: percorso del file CSV sorgente
+
+    Returns:
+    str: percorso del file .npz
+    """
+    info = os.stat(percorso)
+    with open(percorso, "r", encoding="utf-8") as f:
+        intestazione = f.readline().strip()
+
+    chiave = hashlib.sha1(
+        f"{os.path.abspath(percorso)}|{info.st_size}|{info.st_mtime_ns}|{intestazione}".encode("utf-8")
+    ).hexdigest()[:16]
+    nome = os.path.splitext(os.path.basename(percorso))[0]
+    cartella = os.path.join(os.path.dirname(percorso), "cache")
+    return os.path.join(cartella, f"{nome}-{chiave}.npz")
+
+
+def _versioni_precedenti(percorso: str, estensione: str = "") -> list:
+    """
+    Altre versioni della stessa sorgente accanto a percorso, che e nella
+    forma <nome>-<chiave di 16 cifre esadecimali><estensione> (vedi
+    percorso_cache). Il nome deve coincidere per intero: "dati-2-<chiave>"
+    e una sorgente diversa da "dati".
+    """
+    cartella, base = os.path.split(percorso)
+    nome = base[:-len(estensione) - 17] if estensione else base[:-17]
+    modello = re.compile(rf"{re.escape(nome)}-[0-9a-f]{{16}}{re.escape(estensione)}")
+    return [os.path.join(cartella, voce) for voce in os.listdir(cartella or ".")
+            if modello.fullmatch(voce) and voce != base]
+
+
+def salva_cache(df, percorso_npz: str) -> bool:
+    """
+    Salva un DataFrame numerico in formato binario colonnare (.npz).
+    Eventuali cache precedenti della stessa sorgente vengono rimosse.
+
+    Args:
+    df: DataFrame da salvare
+    percorso_npz: percorso del file di cache
+
+    Returns:
+    bool: True se la cache e stata scritta, False se il DataFrame
+    contiene colonne non numeriche (non memorizzabili senza pickle)
+    """
+    if any(not pd.api.types.is_numeric_dtype(tipo) for tipo in df.dtypes):
+        return False
+
+    cartella = os.path.dirname(percorso_npz)
+    os.makedirs(cartella, exist_ok=True)
+    for vecchio in _versioni_precedenti(percorso_npz, ".npz"):
+        os.remove(vecchio)
+
+    colonne = {f"c{i}": df[col].to_numpy() for i, col in enumerate(df.columns)}
+    np.savez(percorso_npz, __colonne__=np.array(df.columns, dtype=str), **colonne)
+    return True
+
+
+def carica_cache(percorso_npz: str):
+    """
+    Carica un DataFrame da un file di cache binario (.npz).
+
+    Args:
+    percorso_npz: percorso del file di cache
+
+    Returns:
+    DataFrame oppure None se la cache non esiste
+    """
+    if not os.path.exists(percorso_npz):
+        return None
+    with np.load(percorso_npz) as archivio:
+        nomi = archivio["__colonne__"].tolist()
+        return pd.DataFrame({nome: archivio[f"c{i}"] for i, nome in enumerate(nomi)})
+
+
+class FeatureStore:
+    """
+    Dataset su disco in formato colonnare, aperto in sola lettura con np.memmap.
+
+    Ogni colonna e un array contiguo (float32, un intero piu stretto o
+    float64) in un file .bin separato; lo schema (nomi, tipi, numero di
+    righe) e salvato in schema.json. L'apertura non legge i dati: solo le
+    righe effettivamente richieste vengono caricate in memoria.
+
+    Args:
+    cartella: cartella creata da salva_feature_store o csv_a_feature_store
+    """
+
+    def __init__(self, cartella: str):
+        with open(os.path.join(cartella, "schema.json"), "r", encoding="utf-8") as f:
+            schema = json.load(f)
+        self.cartella = cartella
+        self.righe = schema["righe"]
+        self.colonne = [c["nome"] for c in schema["colonne"]]
+        self._dati = {}
+        for c in schema["colonne"]:
+            percorso = os.path.join(cartella, c["file"])
+            if self.righe == 0:
+                self._dati[c["nome"]] = np.empty(0, dtype=c["dtype"])
+            else:
+                self._dati[c["nome"]] = np.memmap(percorso, dtype=c["dtype"], mode="r", shape=(self.righe,))
+
+    def __len__(self) -> int:
+        return self.righe
+
+    def __getitem__(self, colonna: str):
+        """Restituisce la colonna come vista np.memmap (nessuna copia)."""
+        if colonna not in self._dati:
+            raise KeyError(f"Colonna '{colonna}' non trovata nel feature store.")
+        return self._dati[colonna]
+
+    @property
+    def tipi_dati(self) -> dict:
+        return {nome: valori.dtype for nome, valori in self._dati.items()}
+
+    def matrice(self, indici=None, colonne: list = None, dtype="float32"):
+        """
+        Estrae una matrice 2-D (righe x colonne) copiando solo le righe richieste.
+
+        Args:
+        indici: slice, array di indici o maschera booleana (default tutte le righe)
+        colonne: colonne da estrarre (default tutte)
+        dtype: tipo della matrice risultante (default float32)
+
+        Returns:
+        np.ndarray di forma (n_righe, n_colonne)
+        """
+        colonne = self.colonne if colonne is None else list(colonne)
+        if indici is None:
+            indici = slice(None)
+        prima = self[colonne[0]][indici] if colonne else np.empty(0)
+        risultato = np.empty((len(prima), len(colonne)), dtype=dtype)
+        for j, colonna in enumerate(colonne):
+            risultato[:, j] = self[colonna][indici]
+        return risultato
+
+    def to_dataframe(self, indici=None, colonne: list = None):
+        """Materializza (una parte del) feature store come DataFrame."""
+        colonne = self.colonne if colonne is None else list(colonne)
+        if indici is None:
+            indici = slice(None)
+        return pd.DataFrame({colonna: np.asarray(self[colonna][indici]) for colonna in colonne})
+
+
+# Oltre 2**24 float32 non rappresenta piu tutti gli interi
+_MASSIMO_INTERO_FLOAT32 = 2 ** 24
+
+
+def _tipo_compatto(valori) -> str:
+    """
+    Sceglie il tipo piu stretto per una colonna: il piu piccolo intero che
+    contiene tutti i valori se la colonna e intera senza nulli, altrimenti
+    float32. Le colonne intere non passano mai da float32 se questo ne
+    arrotonda i valori: senza un intero adatto (o con dei nulli) diventano float64.
+    """
+    valori = np.asarray(valori)
+    if valori.size == 0 or not np.issubdtype(valori.dtype, np.number):
+        return "float32"
+    nulli = np.issubdtype(valori.dtype, np.floating) and np.isnan(valori).any()
+    presenti = valori[~np.isnan(valori)] if nulli else valori
+    if presenti.size == 0:
+        return "float32"
+    if np.issubdtype(valori.dtype, np.integer) or np.all(np.mod(presenti, 1) == 0):
+        minimo, massimo = presenti.min(), presenti.max()
+        if not nulli:
+            for tipo in ("int8", "int16", "int32", "int64"):
+                info = np.iinfo(tipo)
+                if info.min <= minimo and massimo <= info.max:
+                    return tipo
+        if max(abs(float(minimo)), abs(float(massimo))) > _MASSIMO_INTERO_FLOAT32:
+            return "float64"
+    return "float32"
+
+
+def _scrivi_schema(cartella: str, righe: int, tipi: dict) -> None:
+    schema = {
+        "righe": int(righe),
+        "colonne": [
+            {"nome": nome, "dtype": tipo, "file": f"c{i}.bin"}
+            for i, (nome, tipo) in enumerate(tipi.items())
+        ]
+    }
+    with open(os.path.join(cartella, "schema.json"), "w", encoding="utf-8") as f:
+        json.dump(schema, f, indent=2)
+
+
+def salva_feature_store(df, cartella: str, compatta: bool = True) -> FeatureStore:
+    """
+    Salva un DataFrame numerico come feature store colonnare.
+
+    Args:
+    df: DataFrame da salvare
+    cartella: cartella di destinazione (creata se non esiste)
+    compatta: se True usa l'intero piu stretto per le colonne intere,
+    altrimenti tutte le colonne sono salvate in float32
+
+    Returns:
+    FeatureStore aperto sulla cartella
+    """
+    os.makedirs(cartella, exist_ok=True)
+    tipi = {}
+    for i, colonna in enumerate(df.columns):
+        valori = df[colonna].to_numpy()
+        tipi[colonna] = _tipo_compatto(valori) if compatta else "float32"
+        valori.astype(tipi[colonna]).tofile(os.path.join(cartella, f"c{i}.bin"))
+    _scrivi_schema(cartella, len(df), tipi)
+    return FeatureStore(cartella)
+
+
+def scrivi_feature_store_a_blocchi(blocchi, cartella: str, colonne: list = None) -> FeatureStore:
+    """
+    Scrive un feature store (float32) accodando un DataFrame alla volta, senza
+    mai tenere in memoria l'intero dataset.
+
+    Args:
+    blocchi: iterabile di DataFrame con le stesse colonne
+    cartella: cartella di destinazione (creata se non esiste)
+    colonne: nomi delle colonne, usati se blocchi e vuoto
+
+    Returns:
+    FeatureStore aperto sulla cartella
+    """
+    os.makedirs(cartella, exist_ok=True)
+    righe = 0
+    tipi = None
+    for blocco in blocchi:
+        if tipi is None:
+            tipi = {colonna: "float32" for colonna in blocco.columns}
+            modalita = "wb"
+        else:
+            modalita = "ab"
+        for i, colonna in enumerate(blocco.columns):
+            with open(os.path.join(cartella, f"c{i}.bin"), modalita) as f:
+                blocco[colonna].to_numpy(dtype="float32").tofile(f)
+        righe += len(blocco)
+    if tipi is None:
+        tipi = {colonna: "float32" for colonna in (colonne or [])}
+        for i in range(len(tipi)):
+            open(os.path.join(cartella, f"c{i}.bin"), "wb").close()
+    _scrivi_schema(cartella, righe, tipi)
+    return FeatureStore(cartella)
+
+
+def csv_a_feature_store(percorso: str, cartella: str, dimensione_blocco: int = 100_000) -> FeatureStore:
+    """
+    Converte un CSV in feature store leggendolo a blocchi, senza mai
+    caricare l'intero file in memoria. Tutte le colonne sono salvate in float32.
+
+    Args:
+    percorso: percorso del CSV sorgente
+    cartella: cartella di destinazione
+    dimensione_blocco: numero di righe lette per blocco (default 100000)
+
+    Returns:
+    FeatureStore aperto sulla cartella
+    """
+    return scrivi_feature_store_a_blocchi(pd.read_csv(percorso, chunksize=dimensione_blocco), cartella,
+                                          colonne=list(pd.read_csv(percorso, nrows=0).columns))
+
+
+def apri_feature_store(percorso: str) -> FeatureStore:
+    """
+    Apre il feature store memory-mapped associato a un CSV, creandolo se
+    manca o se il CSV e stato modificato (stessa chiave di percorso_cache).
+
+    Args:
+    percorso: percorso del CSV sorgente
+
+    Returns:
+    FeatureStore oppure None se il CSV non esiste
+    """
+    if not os.path.exists(percorso):
+        print(f"Errore : il file {percorso} non esiste.")
+        return None
+
+    cartella = os.path.splitext(percorso_cache(percorso))[0]
+    if os.path.exists(os.path.join(cartella, "schema.json")):
+        return FeatureStore(cartella)
+
+    if os.path.isdir(os.path.dirname(cartella)):
+        for vecchia in _versioni_precedenti(cartella):
+            if os.path.isdir(vecchia):
+                shutil.rmtree(vecchia)
+    return csv_a_feature_store(percorso, cartella)
+
+
+def impronta_file(percorso: str) -> str:
+    """
+    Calcola l'impronta SHA-1 del contenuto di un file, leggendolo a blocchi.
+
+    Args:
+    percorso: percorso del file
+
+    Returns:
+    str: impronta esadecimale oppure "" se il file non esiste
+    """
+    if not os.path.exists(percorso):
+        return ""
+    impronta = hashlib.sha1()
+    with open(percorso, "rb") as f:
+        for blocco in iter(lambda: f.read(1 << 20), b""):
+            impronta.update(blocco)
+    return impronta.hexdigest()
+
+
+def chiave_artefatto(*parti) -> str:
+    """
+    Combina impronte di input e parametri in un'unica chiave di artefatto.
+    I dizionari sono serializzati con chiavi ordinate, quindi l'ordine di
+    inserimento dei parametri non cambia la chiave.
+
+    Args:
+    parti: impronte, chiavi di artefatti a monte o dizionari di parametri
+
+    Returns:
+    str: chiave esadecimale
+    """
+    testo = json.dumps(parti, sort_keys=True, default=str)
+    return hashlib.sha1(testo.encode("utf-8")).hexdigest()
+
+
+def salva_artefatto(oggetto, nome: str, chiave: str, cartella: str = "data/artefatti") -> str:
+    """
+    Salva l'output di una fase (pickle) come artefatto identificato da nome
+    e chiave. Gli artefatti precedenti con lo stesso nome vengono rimossi.
+
+    Args:
+    oggetto: oggetto da salvare
+    nome: nome dell'artefatto (es. "pulizia")
+    chiave: chiave calcolata con chiave_artefatto
+    cartella: cartella degli artefatti (default data/artefatti)
+
+    Returns:
+    str: percorso del file salvato
+    """
+    os.makedirs(cartella, exist_ok=True)
+    for vecchio in glob.glob(os.path.join(cartella, f"{nome}-*.pkl")):
+        os.remove(vecchio)
+    percorso = os.path.join(cartella, f"{nome}-{chiave[:16]}.pkl")
+    # Scrittura atomica: un'esecuzione interrotta non lascia artefatti corrotti
+    with open(percorso + ".tmp", "wb") as f:
+        pickle.dump(oggetto, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(percorso + ".tmp", percorso)
+    return percorso
+
+
+def carica_artefatto(nome: str, chiave: str, cartella: str = "data/artefatti"):
+    """
+    Carica un artefatto salvato con salva_artefatto.
+
+    Args:
+    nome: nome dell'artefatto
+    chiave: chiave attesa
+    cartella: cartella degli artefatti (default data/artefatti)
+
+    Returns:
+    l'oggetto salvato oppure None se non esiste un artefatto con quella chiave
+    """
+    percorso = os.path.join(cartella, f"{nome}-{chiave[:16]}.pkl")
+    if not os.path.exists(percorso):
+        return None
+    with open(percorso, "rb") as f:
+        return pickle.load(f)
+
+
+def carica_csv(percorso: str, usa_cache: bool = True, memmap: bool = False,
+               dimensione_blocco: int = None):
     """
     Carica un file CSV e lo restituisce come DataFrame.
     Gestisce il caso in cui il file non esista.
 
+    Se usa_cache e True viene letta prima la cache binaria associata al
+    file (vedi percorso_cache); se manca o non e aggiornata, il CSV viene
+    letto come testo e la cache viene rigenerata per le esecuzioni successive.
+
     Args:
     percorso: percorso del file da caricare
+    usa_cache: se utilizzare la cache binaria (default True)
+    memmap: se True restituisce un FeatureStore memory-mapped (float32)
+    invece di un DataFrame (vedi apri_feature_store)
+    dimensione_blocco: se specificato il file viene letto a blocchi di
+    questo numero di righe e viene restituito un iteratore di DataFrame
+    (la cache non viene usata)
 
     Returns:
-    DataFrame oppure None se il file non esiste
+    DataFrame (o FeatureStore, o iteratore di DataFrame) oppure None se
+    il file non esiste
     """
+    if memmap:
+        return apri_feature_store(percorso)
+    if dimensione_blocco is not None and os.path.exists(percorso):
+        return pd.read_csv(percorso, chunksize=dimensione_blocco)
     if not os.path.exists(percorso):
         print(f"Errore : il file {percorso} non esiste.")
         return None
-    return pd.read_csv(percorso)
+    if not usa_cache:
+        return pd.read_csv(percorso)
+
+    percorso_npz = percorso_cache(percorso)
+    df = carica_cache(percorso_npz)
+    if df is None:
+        df = pd.read_csv(percorso)
+        salva_cache(df, percorso_npz)
+    return df
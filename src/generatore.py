@@ -0,0 +1,203 @@
+"""
+Generatore di dataset sintetici con la forma del California Housing, per
+test di carico della pipeline.
+
+Utilizzo:
+python -m src.generatore --righe 10000000 --output data/sintetico.csv
+python -m src.generatore --righe 10000000 --output data/sintetico --formato feature_store --nan 0.01 --outlier 0.005
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import carica_csv, scrivi_feature_store_a_blocchi
+
+PERCORSO_SORGENTE = "data/dataset_salvato.csv"
+FORMATI = ("csv", "feature_store")
+
+
+class GeneratoreSintetico:
+    """
+    Genera righe sintetiche ricampionando (bootstrap) le righe di un dataset
+    reale e perturbandole:
+    - le colonne strettamente positive vengono perturbate in scala
+      logaritmica, le altre in scala lineare, con un rumore gaussiano la cui
+      covarianza e quella delle colonne (scalata per intensita_rumore), cosi
+      le correlazioni tra colonne restano quelle del dataset sorgente;
+    - le coordinate (colonne_geo) ricevono solo un piccolo spostamento in
+      gradi, cosi i punti restano nei cluster geografici originali;
+    - i valori vengono limitati all'intervallo osservato (ad esempio i tetti
+      di HouseAge e MedHouseVal) e le colonne intere restano intere.
+
+    Args:
+    df: dataset sorgente (numerico, senza valori mancanti)
+    intensita_rumore: deviazione standard del rumore relativa a quella delle
+    colonne (default 0.05)
+    rumore_geografico: deviazione standard dello spostamento delle
+    coordinate in gradi (default 0.01, circa 1 km)
+    colonne_geo: colonne di coordinate (quelle assenti vengono ignorate)
+    colonna_target: colonna esclusa dall'iniezione di NaN e outlier
+    (default l'ultima colonna)
+    """
+
+    def __init__(self, df, intensita_rumore: float = 0.05, rumore_geografico: float = 0.01,
+                 colonne_geo: tuple = ("Latitude", "Longitude"), colonna_target: str = None):
+        valori = df.to_numpy(dtype=np.float64)
+        if np.isnan(valori).any():
+            raise ValueError("Il dataset sorgente non deve contenere valori mancanti")
+        self.colonne = list(df.columns)
+        self.colonna_target = colonna_target if colonna_target is not None else self.colonne[-1]
+        self.intensita_rumore = intensita_rumore
+        self.rumore_geografico = rumore_geografico
+
+        self.geo = np.array([c in colonne_geo for c in self.colonne])
+        self.logaritmiche = (valori.min(axis=0) > 0) & ~self.geo
+        self.intere = np.all(np.mod(valori, 1) == 0, axis=0)
+        self.minimi = valori.min(axis=0)
+        self.massimi = valori.max(axis=0)
+
+        # Valori in scala di perturbazione, una riga per colonna (layout contiguo per colonna)
+        base = valori.copy()
+        base[:, self.logaritmiche] = np.log(valori[:, self.logaritmiche])
+        self.base = np.ascontiguousarray(base.T)
+        covarianza = np.atleast_2d(np.cov(self.base[~self.geo]))
+        autovalori = np.linalg.eigvalsh(covarianza)
+        regolarizzazione = max(autovalori.max(), 1.0) * 1e-9
+        self.cholesky = np.linalg.cholesky(covarianza + regolarizzazione * np.eye(len(covarianza)))
+        self.posizioni_rumore = np.flatnonzero(~self.geo)
+        self.posizioni_geo = np.flatnonzero(self.geo)
+
+        # Outlier iniettati oltre il baffo superiore della regola IQR (Q3 + 1.5 * IQR)
+        q1, q3 = np.percentile(valori, [25, 75], axis=0)
+        iqr = np.where(q3 > q1, q3 - q1, valori.std(axis=0))
+        self.q3 = q3
+        self.iqr = iqr
+        self.iniettabili = np.array([c != self.colonna_target for c in self.colonne])
+
+    def genera_blocco(self, n_righe: int, rng, tasso_nan: float = 0.0, tasso_outlier: float = 0.0):
+        """
+        Genera un blocco di righe sintetiche.
+
+        Args:
+        n_righe: numero di righe
+        rng: np.random.Generator
+        tasso_nan: frazione di celle (target escluso) impostate a NaN
+        tasso_outlier: frazione di celle (target e coordinate esclusi)
+        sostituite da un outlier tra Q3 + 3 IQR e Q3 + 10 IQR
+
+        Returns:
+        DataFrame con le colonne del dataset sorgente
+        """
+        indici = rng.integers(0, self.base.shape[1], size=n_righe)
+        valori = np.take(self.base, indici, axis=1)
+
+        # Rumore correlato: L @ Z ha covarianza L L^T = covarianza delle colonne
+        rumore = self.cholesky @ rng.standard_normal((len(self.posizioni_rumore), n_righe))
+        for riga, j in enumerate(self.posizioni_rumore):
+            colonna = valori[j]
+            colonna += self.intensita_rumore * rumore[riga]
+            if self.logaritmiche[j]:
+                np.exp(colonna, out=colonna)
+        for j in self.posizioni_geo:
+            valori[j] += rng.standard_normal(n_righe) * self.rumore_geografico
+        for j in range(len(self.colonne)):
+            np.clip(valori[j], self.minimi[j], self.massimi[j], out=valori[j])
+            if self.intere[j]:
+                np.round(valori[j], out=valori[j])
+
+        if tasso_outlier > 0:
+            for j in np.flatnonzero(self.iniettabili & ~self.geo):
+                righe = np.flatnonzero(rng.random(n_righe) < tasso_outlier)
+                valori[j, righe] = self.q3[j] + rng.uniform(3.0, 10.0, size=len(righe)) * self.iqr[j]
+        if tasso_nan > 0:
+            for j in np.flatnonzero(self.iniettabili):
+                valori[j, rng.random(n_righe) < tasso_nan] = np.nan
+
+        return pd.DataFrame({colonna: valori[j] for j, colonna in enumerate(self.colonne)}, copy=False)
+
+    def blocchi(self, n_righe: int, dimensione_blocco: int = 1_000_000, seed: int = 42,
+                tasso_nan: float = 0.0, tasso_outlier: float = 0.0):
+        """
+        Iteratore di blocchi per un totale di n_righe righe. Con lo stesso seed
+        e la stessa dimensione_blocco la sequenza generata e identica.
+        """
+        rng = np.random.default_rng(seed)
+        generate = 0
+        while generate < n_righe:
+            n = min(dimensione_blocco, n_righe - generate)
+            yield self.genera_blocco(n, rng, tasso_nan=tasso_nan, tasso_outlier=tasso_outlier)
+            generate += n
+
+
+def genera_dataset(percorso_output: str, n_righe: int, percorso_sorgente: str = PERCORSO_SORGENTE,
+                   formato: str = "csv", dimensione_blocco: int = 1_000_000, seed: int = 42,
+                   tasso_nan: float = 0.0, tasso_outlier: float = 0.0, **opzioni):
+    """
+    Genera un dataset sintetico e lo scrive su disco a blocchi: in memoria
+    c'e al piu un blocco alla volta, qualunque sia n_righe.
+
+    Args:
+    percorso_output: file CSV o cartella del feature store
+    n_righe: numero di righe da generare
+    percorso_sorgente: dataset reale da ricampionare
+    formato: "csv" o "feature_store" (formato binario colonnare di
+    data_loader, apribile con FeatureStore)
+    dimensione_blocco: righe generate e scritte per volta (default 1000000)
+    seed: seed del generatore casuale
+    tasso_nan: frazione di celle mancanti (vedi GeneratoreSintetico.genera_blocco)
+    tasso_outlier: frazione di celle outlier
+    opzioni: parametri di GeneratoreSintetico (es. intensita_rumore)
+
+    Returns:
+    int: numero di righe scritte, oppure None se il sorgente non esiste
+
+    Raises:
+    ValueError: se il formato non e supportato
+    """
+    if formato not in FORMATI:
+        raise ValueError(f"Formato non supportato: {formato}")
+    sorgente = carica_csv(percorso_sorgente)
+    if sorgente is None:
+        return None
+
+    generatore = GeneratoreSintetico(sorgente, **opzioni)
+    blocchi = generatore.blocchi(n_righe, dimensione_blocco=dimensione_blocco, seed=seed,
+                                 tasso_nan=tasso_nan, tasso_outlier=tasso_outlier)
+    if formato == "feature_store":
+        scrivi_feature_store_a_blocchi(blocchi, percorso_output, colonne=generatore.colonne)
+        return n_righe
+
+    os.makedirs(os.path.dirname(percorso_output) or ".", exist_ok=True)
+    with open(percorso_output + ".tmp", "w", encoding="utf-8", newline="") as f:
+        f.write(",".join(generatore.colonne) + "\n")
+        for blocco in blocchi:
+            # np.savetxt formatta circa il doppio piu veloce di DataFrame.to_csv; i NaN diventano "nan"
+            np.savetxt(f, blocco.to_numpy(), fmt="%.6g", delimiter=",")
+    os.replace(percorso_output + ".tmp", percorso_output)
+    return n_righe
+
+
+def main(argomenti: list = None) -> None:
+    parser = argparse.ArgumentParser(description="Generatore di dataset sintetici")
+    parser.add_argument("--righe", type=int, required=True)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--formato", choices=FORMATI, default="csv")
+    parser.add_argument("--sorgente", default=PERCORSO_SORGENTE)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--nan", type=float, default=0.0, help="frazione di celle mancanti")
+    parser.add_argument("--outlier", type=float, default=0.0, help="frazione di celle outlier")
+    parser.add_argument("--blocco", type=int, default=1_000_000)
+    argomenti = parser.parse_args(argomenti)
+
+    n_righe = genera_dataset(argomenti.output, argomenti.righe, argomenti.sorgente, argomenti.formato,
+                             dimensione_blocco=argomenti.blocco, seed=argomenti.seed,
+                             tasso_nan=argomenti.nan, tasso_outlier=argomenti.outlier)
+    if n_righe is not None:
+        print(f"{n_righe} righe generate in: {argomenti.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""
+Indice spaziale sulle coordinate dei distretti (Latitude/Longitude) e
+feature di vicinato per i modelli.
+
+Le distanze sono distanze sul globo (lungo il cerchio massimo) in km. I
+punti sono indicizzati come vettori unitari 3-D in un KDTree euclideo: la
+corda tra due punti cresce con la loro distanza sul globo, quindi i vicini
+sono gli stessi di un BallTree con metrica haversine, ma le interrogazioni
+sono circa 10 volte piu veloci. L'indice si costruisce una volta in
+O(n log n) e ogni interrogazione costa O(log n).
+"""
+
+import numpy as np
+from sklearn.neighbors import KDTree
+
+from src.data_cleaning import Normalizzatore
+
+
+# Raggio medio della Terra (IUGG)
+RAGGIO_TERRA_KM = 6371.0088
+COLONNE_COORDINATE = ("Latitude", "Longitude")
+COLONNA_VICINATO = "MedianaVicini"
+K_VICINATO = 10
+
+
+def _coordinate(dati, colonne: tuple = COLONNE_COORDINATE) -> np.ndarray:
+    """Array float64 (n, 2) di latitudini e longitudini in gradi da un DataFrame o da un array."""
+    if hasattr(dati, "columns"):
+        mancanti = [c for c in colonne if c not in dati.columns]
+        if mancanti:
+            raise KeyError(f"Colonne mancanti: {mancanti}")
+        return dati[list(colonne)].to_numpy(dtype=np.float64)
+    return np.asarray(dati, dtype=np.float64).reshape(-1, 2)
+
+
+def _vettori_unitari(gradi: np.ndarray) -> np.ndarray:
+    latitudine, longitudine = np.radians(gradi[:, 0]), np.radians(gradi[:, 1])
+    coseno = np.cos(latitudine)
+    return np.column_stack([coseno * np.cos(longitudine), coseno * np.sin(longitudine), np.sin(latitudine)])
+
+
+def _corda_in_km(corda: np.ndarray) -> np.ndarray:
+    return 2 * RAGGIO_TERRA_KM * np.arcsin(np.minimum(corda / 2, 1.0))
+
+
+class IndiceGeografico:
+    """
+    Indice dei punti di un dataset per ricerche di vicinato sul globo.
+
+    Args:
+    coordinate: DataFrame con le colonne di coordinate o array (n, 2) di
+    latitudini e longitudini in gradi
+    colonne: nomi delle colonne di latitudine e longitudine
+    leaf_size: dimensione delle foglie del KDTree (default 40)
+
+    Raises:
+    ValueError: se una coordinata manca o e fuori dall'intervallo valido
+    """
+
+    def __init__(self, coordinate, colonne: tuple = COLONNE_COORDINATE, leaf_size: int = 40):
+        gradi = _coordinate(coordinate, colonne)
+        if not np.isfinite(gradi).all():
+            raise ValueError("Le coordinate non devono contenere valori mancanti")
+        if (np.abs(gradi[:, 0]) > 90).any() or (np.abs(gradi[:, 1]) > 180).any():
+            raise ValueError("Latitudini in [-90, 90] e longitudini in [-180, 180] attese")
+        self.colonne = tuple(colonne)
+        self.punti = _vettori_unitari(gradi)
+        self.albero = KDTree(self.punti, leaf_size=leaf_size)
+
+    def __len__(self) -> int:
+        return len(self.punti)
+
+    def _interrogati(self, coordinate) -> np.ndarray:
+        return _vettori_unitari(_coordinate(coordinate, self.colonne))
+
+    def vicini(self, coordinate, k: int, escludi_se_stessi: bool = False) -> tuple:
+        """
+        I k punti dell'indice piu vicini a ogni punto interrogato, in ordine
+        di distanza.
+
+        Args:
+        coordinate: punti da interrogare (DataFrame o array (m, 2) in gradi)
+        k: numero di vicini
+        escludi_se_stessi: se True i punti interrogati sono quelli
+        dell'indice, nello stesso ordine, e ciascuno viene escluso dai
+        propri vicini (gli altri punti con le stesse coordinate restano)
+
+        Returns:
+        tuple (distanze in km, indici), due array (m, k)
+
+        Raises:
+        ValueError: se k non e tra 1 e il numero di punti disponibili
+        """
+        disponibili = len(self) - 1 if escludi_se_stessi else len(self)
+        if not 1 <= k <= disponibili:
+            raise ValueError(f"k deve essere tra 1 e {disponibili}")
+        if not escludi_se_stessi:
+            corde, indici = self.albero.query(self._interrogati(coordinate), k=k)
+            return _corda_in_km(corde), indici
+
+        corde, indici = self.albero.query(self.punti, k=k + 1)
+        # Con coordinate duplicate il punto stesso puo non essere il primo: si toglie
+        # la sua colonna, o l'ultima se non compare tra i k + 1 vicini
+        proprio = indici == np.arange(len(indici))[:, None]
+        proprio[~proprio.any(axis=1), -1] = True
+        tenuti = ~proprio
+        return _corda_in_km(corde[tenuti].reshape(-1, k)), indici[tenuti].reshape(-1, k)
+
+    def entro_raggio(self, coordinate, raggio_km: float, ordina: bool = False) -> list:
+        """
+        I punti dell'indice entro raggio_km da ogni punto interrogato.
+
+        Args:
+        coordinate: punti da interrogare (DataFrame o array (m, 2) in gradi)
+        raggio_km: raggio in km
+        ordina: se True gli indici di ogni punto sono ordinati per distanza
+
+        Returns:
+        list di m array di indici
+
+        Raises:
+        ValueError: se il raggio e negativo
+        """
+        if raggio_km < 0:
+            raise ValueError("Il raggio deve essere non negativo")
+        corda = 2 * np.sin(min(raggio_km / (2 * RAGGIO_TERRA_KM), np.pi / 2))
+        indici = self.albero.query_radius(self._interrogati(coordinate), r=corda,
+                                          sort_results=ordina, return_distance=ordina)
+        return list(indici[0] if ordina else indici)
+
+
+class FeatureVicinato:
+    """
+    Feature di vicinato: mediana del target dei k distretti di training piu
+    vicini, normalizzata come le altre feature.
+
+    Con fit_transform il valore di ogni riga di training esclude la riga
+    stessa, quindi il suo target non entra nella sua feature; le righe
+    nuove (transform) usano tutti i distretti di training. Stimata sul
+    training di ogni fold, non usa mai i target della validazione.
+
+    Args:
+    k: numero di vicini (default 10)
+    colonne: colonne di latitudine e longitudine
+    normalizzazione: metodo del Normalizzatore applicato alla feature
+    """
+
+    def __init__(self, k: int = K_VICINATO, colonne: tuple = COLONNE_COORDINATE,
+                 normalizzazione: str = "minmax"):
+        self.k = k
+        self.colonne = tuple(colonne)
+        self.normalizzatore = Normalizzatore(normalizzazione)
+        self.indice = None
+        self.target = None
+
+    def _mediane(self, indici) -> np.ndarray:
+        return np.median(self.target[indici], axis=1)
+
+    def fit_transform(self, coordinate, y) -> np.ndarray:
+        """
+        Costruisce l'indice dei distretti di training e restituisce la
+        feature (senza la riga stessa) delle loro righe.
+
+        Returns:
+        np.ndarray float64 (n,)
+        """
+        self.indice = IndiceGeografico(coordinate, self.colonne)
+        self.target = np.asarray(y, dtype=np.float64)
+        if len(self.target) != len(self.indice):
+            raise ValueError("coordinate e y devono avere la stessa lunghezza")
+        _, indici = self.indice.vicini(None, self.k, escludi_se_stessi=True)
+        mediane = self._mediane(indici)
+        self.normalizzatore.fit(mediane[:, None])
+        return self.normalizzatore.transform(mediane[:, None], in_place=True)[:, 0]
+
+    def fit(self, coordinate, y) -> "FeatureVicinato":
+        self.fit_transform(coordinate, y)
+        return self
+
+    def transform(self, coordinate) -> np.ndarray:
+        """
+        Feature di nuove righe; le righe con coordinate mancanti ricevono NaN.
+
+        Returns:
+        np.ndarray float64 (m,)
+        """
+        punti = _coordinate(coordinate, self.colonne)
+        mediane = np.full(len(punti), np.nan)
+        valide = np.isfinite(punti).all(axis=1)
+        if valide.any():
+            _, indici = self.indice.vicini(punti[valide], self.k)
+            mediane[valide] = self._mediane(indici)
+        return self.normalizzatore.transform(mediane[:, None], in_place=True)[:, 0]
+
+
+def feature_vicinato_per_fold(coordinate, y, fold: list, k: int = K_VICINATO,
+                              normalizzazione: str = "minmax") -> list:
+    """
+    Feature di vicinato di ogni fold di una cross-validation, senza
+    leakage: per ogni fold una FeatureVicinato viene stimata sulle sole
+    righe di training e applicata alla validazione. Costo O(n log n) per fold.
+
+    Args:
+    coordinate: coordinate delle righe (DataFrame o array (n, 2) in gradi)
+    y: target delle righe
+    fold: lista di coppie (indici di training, indici di validazione)
+    k: numero di vicini
+
+    Returns:
+    list con una coppia (feature di training, feature di validazione) per fold
+    """
+    punti = _coordinate(coordinate)
+    y = np.asarray(y, dtype=np.float64)
+    risultati = []
+    for train, val in fold:
+        feature = FeatureVicinato(k, normalizzazione=normalizzazione)
+        risultati.append((feature.fit_transform(punti[train], y[train]), feature.transform(punti[val])))
+    return risultati
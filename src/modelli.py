@@ -1,9 +1,26 @@
-from sklearn.model_selection import train_test_split
+from concurrent.futures import ProcessPoolExecutor
+import time
+
+from sklearn.base import BaseEstimator, RegressorMixin, clone
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import train_test_split, KFold
 from sklearn.neighbors import KNeighborsRegressor
 from sklearn.tree import DecisionTreeRegressor
-from sklearn.linear_model import LinearRegression
-from sklearn.svm import SVR
-from src.valutazione import cross_validation_modello
+from sklearn.svm import SVR, LinearSVR
+from src.valutazione import riassumi_cv
+from src.data_loader import FeatureStore, carica_csv
+from src.geospaziale import COLONNA_VICINATO, K_VICINATO, FeatureVicinato, feature_vicinato_per_fold
+from src.utils import numero_processi, span, traccia
+import numpy as np
+
+
+# Griglie di iperparametri predefinite
+K_LIST = [3, 5, 7, 9, 11]
+MAX_DEPTH_LIST = [3, 5, 7, 10, None]
+KERNEL_LIST = ['linear', 'rbf']
+C_LIST_SVR_APPROSSIMATO = [0.3, 1.0, 3.0]
+MODALITA_SVR = ("esatto", "approssimato", "entrambi")
 
 
 def dividi_dataset(df, colonna_target: str,
@@ -11,8 +28,12 @@ def dividi_dataset(df, colonna_target: str,
     """
     Divide il dataset in training set e test set.
 
+    Accetta anche un FeatureStore memory-mapped: in questo caso vengono
+    copiate solo le righe di ciascuna partizione e X/y sono restituiti come
+    array NumPy float32, utilizzabili direttamente dalle funzioni addestra_*.
+
     Args:
-    df: DataFrame completo
+    df: DataFrame completo (o FeatureStore)
     colonna_target: nome della colonna target
     test_size: proporzione del test set ( default 0.2)
     random_state: seed per la riproducibilita
@@ -27,45 +48,570 @@ def dividi_dataset(df, colonna_target: str,
 
     if not (0 < test_size < 1):
         raise ValueError("test_size deve essere tra 0 e 1.")
-    if colonna_target not in df.columns:
+    colonne = df.colonne if isinstance(df, FeatureStore) else df.columns
+    if colonna_target not in colonne:
         raise KeyError(f"Colonna target '{colonna_target}' non trovata nel DataFrame.")
 
+    if isinstance(df, FeatureStore):
+        indici_train, indici_test = train_test_split(np.arange(len(df)), test_size=test_size, random_state=random_state)
+        feature = [c for c in colonne if c != colonna_target]
+        X_train = df.matrice(indici_train, feature)
+        X_test = df.matrice(indici_test, feature)
+        y_train = np.asarray(df[colonna_target][indici_train], dtype="float32")
+        y_test = np.asarray(df[colonna_target][indici_test], dtype="float32")
+        return X_train, X_test, y_train, y_test
+
     X = df.drop(columns=[colonna_target])
     y = df[colonna_target]
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
     return X_train, X_test, y_train, y_test
 
 
-def addestra_regressione_lineare(X_train, y_train, X_test) -> dict:
-    modello = LinearRegression()
-    # Eseguiamo la CV solo per avere una stima della performance sul training set
-    risultati_cv = cross_validation_modello(modello, X_train, y_train)
+class ValutatoreStimatore:
+    """
+    Compito elementare della ricerca degli iperparametri: addestra una copia
+    dello stimatore sul training di un fold e ne misura l'MSE sulla
+    validazione. Deve essere serializzabile (pickle) per il pool di processi.
+
+    Args:
+    chiave: identificativo del candidato nei risultati (es. ("KNN", 5))
+    stimatore: stimatore scikit-learn non addestrato
+    """
+
+    def __init__(self, chiave, stimatore):
+        self.chiave = chiave
+        self.stimatore = stimatore
+
+    def __call__(self, X_train, y_train, X_val, y_val) -> dict:
+        nome, parametro = self.chiave
+        with span(str(nome) if parametro is None else f"{nome} {parametro}"):
+            modello = clone(self.stimatore).fit(X_train, y_train)
+            return {self.chiave: mean_squared_error(y_val, modello.predict(X_val))}
+
+
+class ValutatoreKNN:
+    """
+    Valuta tutti i k di una griglia KNN con una sola ricerca dei vicini per
+    fold: kneighbors(max(k_list)) restituisce i vicini ordinati per
+    distanza, e la predizione con k vicini e la media dei primi k target.
+    Le medie cumulative danno quindi gli MSE di ogni k in un colpo solo,
+    con risultati uguali a KNeighborsRegressor(n_neighbors=k) (pesi uniformi).
+
+    Nella traccia la ricerca dei vicini e ogni k sono span figli dello span
+    "KNN" del fold.
+
+    Args:
+    k_list: valori di k da valutare
+    """
+
+    chiave = ("KNN", None)
+
+    def __init__(self, k_list):
+        self.k_list = list(k_list)
+
+    def __call__(self, X_train, y_train, X_val, y_val) -> dict:
+        k_max = max(self.k_list)
+        with span("ricerca vicini", k=k_max):
+            vicini = KNeighborsRegressor(n_neighbors=k_max).fit(X_train, y_train)
+            indici = vicini.kneighbors(X_val, return_distance=False)
+            # Target dei vicini ordinati per distanza e loro somme cumulative
+            somme = np.cumsum(np.asarray(y_train, dtype=np.float64)[indici], axis=1)
+        y_val = np.asarray(y_val, dtype=np.float64)
+        risultati = {}
+        for k in self.k_list:
+            with span(f"KNN {k}", k=k):
+                risultati[("KNN", k)] = float(np.mean((somme[:, k - 1] / k - y_val) ** 2))
+        return risultati
+
+
+class ValutatoreDecisionTree:
+    """
+    Valuta tutte le profondita di una griglia con un solo albero per fold.
+
+    Viene addestrato un albero senza limite di profondita; la predizione di
+    un albero con max_depth=d e il valore (media del target) del nodo in cui
+    il percorso di ogni campione arriva alla profondita d, o della foglia se
+    il percorso e piu corto. I percorsi si ottengono una sola volta con
+    decision_path e ogni profondita costa solo un'indicizzazione vettorizzata.
+    Nei nodi con pochi campioni piu split possono avere lo stesso guadagno:
+    la scelta tra questi dipende dall'ordine casuale delle feature e puo
+    differire da quella di un albero addestrato con max_depth=d. Gli MSE
+    servono quindi solo a scegliere la profondita: la CV riportata e quella
+    di un vero albero con la profondita scelta (vedi valutatore_profondita).
+
+    Nella traccia l'albero completo e ogni profondita sono span figli dello
+    span "Decision Tree" del fold.
+
+    Args:
+    max_depth_list: profondita da valutare (None = albero completo)
+    random_state: seed dell'albero (default 42, come in addestra_decision_tree)
+    """
+
+    chiave = ("Decision Tree", None)
+
+    def __init__(self, max_depth_list, random_state: int = 42):
+        self.max_depth_list = list(max_depth_list)
+        self.random_state = random_state
+
+    def __call__(self, X_train, y_train, X_val, y_val) -> dict:
+        with span("albero completo"):
+            albero = DecisionTreeRegressor(max_depth=None, random_state=self.random_state).fit(X_train, y_train)
+            percorsi = albero.decision_path(X_val)
+        # Gli id dei nodi crescono scendendo nell'albero: indici ordinati = ordine per profondita
+        percorsi.sort_indices()
+        inizi = percorsi.indptr[:-1]
+        lunghezze = np.diff(percorsi.indptr)
+        valori = albero.tree_.value[:, 0, 0]
+        y_val = np.asarray(y_val, dtype=np.float64)
+
+        risultati = {}
+        for depth in self.max_depth_list:
+            with span(f"Decision Tree {depth}", depth=depth):
+                passi = lunghezze - 1 if depth is None else np.minimum(depth, lunghezze - 1)
+                predizioni = valori[percorsi.indices[inizi + passi]]
+                risultati[("Decision Tree", depth)] = float(np.mean((predizioni - y_val) ** 2))
+        return risultati
+
+
+# Dati condivisi dai processi del pool: inviati una sola volta per processo
+_DATI_WORKER = {}
+
+
+def _inizializza_worker(X, y, fold, feature_fold=None):
+    _DATI_WORKER['X'], _DATI_WORKER['y'], _DATI_WORKER['fold'] = X, y, fold
+    _DATI_WORKER['feature_fold'] = feature_fold
+
+
+def _esegui_compito(valutatore, indice_fold: int) -> dict:
+    X, y = _DATI_WORKER['X'], _DATI_WORKER['y']
+    train, val = _DATI_WORKER['fold'][indice_fold]
+    X_train, X_val = _righe(X, train), _righe(X, val)
+    if _DATI_WORKER['feature_fold'] is not None:
+        feature_train, feature_val = _DATI_WORKER['feature_fold'][indice_fold]
+        X_train, X_val = aggiungi_vicinato(X_train, feature_train), aggiungi_vicinato(X_val, feature_val)
+    # Span modello (con il fold come attributo) -> iperparametro, aperto dal valutatore
+    # (registrato solo nel processo principale)
+    modello, _ = getattr(valutatore, 'chiave', (type(valutatore).__name__, None))
+    with span(str(modello), fold=indice_fold):
+        return valutatore(X_train, _righe(y, train), X_val, _righe(y, val))
+
+
+def _righe(dati, indici):
+    return dati.iloc[indici] if hasattr(dati, "iloc") else dati[indici]
+
+
+def fold_cv(n_righe: int, cv: int = 5) -> list:
+    """Fold di valuta_griglia: coppie (indici di training, indici di validazione) di KFold senza shuffle."""
+    return list(KFold(n_splits=cv).split(np.zeros((n_righe, 1))))
+
+
+def aggiungi_vicinato(X, feature):
+    """
+    Aggiunge a X (DataFrame o array) la feature di vicinato come ultima
+    colonna (COLONNA_VICINATO nei DataFrame).
+    """
+    if hasattr(X, "iloc"):
+        return X.assign(**{COLONNA_VICINATO: feature})
+    X = np.asarray(X)
+    return np.column_stack([X, np.asarray(feature, dtype=X.dtype)])
+
+
+@traccia()
+def valuta_griglia(valutatori: list, X, y, cv: int = 5, n_jobs: int = 1, feature_fold: list = None) -> dict:
+    """
+    Esegue la cross-validation di tutti i candidati di una griglia di
+    iperparametri, distribuendo le coppie (candidato, fold) su un pool di
+    processi. I fold sono quelli di cross_val_score (KFold senza shuffle),
+    quindi i risultati coincidono con cross_validation_modello.
+
+    Args:
+    valutatori: lista di compiti (es. ValutatoreStimatore); ognuno riceve
+    X_train, y_train, X_val, y_val di un fold e restituisce { chiave: mse }
+    X: feature di training
+    y: target di training
+    cv: numero di fold (default 5)
+    n_jobs: numero di processi (1 = sequenziale, -1 = tutti i core)
+    feature_fold: feature di vicinato di ogni fold di fold_cv(len(y), cv)
+    (vedi feature_vicinato_per_fold), aggiunte a X_train e X_val del fold
+
+    Returns:
+    dict { chiave: { 'scores', 'media', 'deviazione_standard' } }
+    """
+
+    fold = fold_cv(len(y), cv)
+    if feature_fold is not None and len(feature_fold) != len(fold):
+        raise ValueError(f"feature_fold deve avere una voce per ciascuno dei {len(fold)} fold")
+    compiti = [(valutatore, f) for valutatore in valutatori for f in range(len(fold))]
+    n_jobs = numero_processi(n_jobs)
+
+    if n_jobs == 1 or len(compiti) == 1:
+        _inizializza_worker(X, y, fold, feature_fold)
+        try:
+            risultati = [_esegui_compito(v, f) for v, f in compiti]
+        finally:
+            _DATI_WORKER.clear()
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(compiti)),
+                                 initializer=_inizializza_worker, initargs=(X, y, fold, feature_fold)) as pool:
+            risultati = list(pool.map(_esegui_compito, *zip(*compiti)))
+
+    scores = {}
+    for (_, f), risultato in zip(compiti, risultati):
+        for chiave, mse in risultato.items():
+            scores.setdefault(chiave, [None] * len(fold))[f] = mse
+    return {chiave: riassumi_cv(valori) for chiave, valori in scores.items()}
+
+
+def valutatori_regressione_lineare() -> list:
+    return [ValutatoreStimatore(("Linear Regression", None), RegressioneLineareGram())]
+
+
+def valutatori_knn(k_list=K_LIST) -> list:
+    return [ValutatoreKNN(k_list)]
+
+
+def valutatori_decision_tree(max_depth_list=MAX_DEPTH_LIST) -> list:
+    return [ValutatoreDecisionTree(max_depth_list)]
+
+
+def valutatore_profondita(max_depth) -> ValutatoreStimatore:
+    """CV di un DecisionTreeRegressor con la profondita scelta da ValutatoreDecisionTree."""
+    return ValutatoreStimatore(("Decision Tree verificato", max_depth),
+                               DecisionTreeRegressor(max_depth=max_depth, random_state=42))
+
+
+def miglior_profondita(risultati_cv: dict, max_depth_list=MAX_DEPTH_LIST):
+    """Profondita con l'MSE medio piu basso nella griglia di ValutatoreDecisionTree."""
+    miglior_mse = float('inf')
+    miglior_depth = None
+    for depth in max_depth_list:
+        cv_res = risultati_cv[("Decision Tree", depth)]
+
+        if cv_res['media'] < miglior_mse:
+            miglior_mse = cv_res['media']
+            miglior_depth = depth
+    return miglior_depth
+
+
+def valutatori_svr(kernel_list=KERNEL_LIST) -> list:
+    return [ValutatoreStimatore(("SVR", k), SVR(kernel=k)) for k in kernel_list]
+
+
+def valutatori_svr_approssimato(C_list=C_LIST_SVR_APPROSSIMATO, n_componenti: int = 300) -> list:
+    return [ValutatoreStimatore(("SVR approssimato", C), SVRApprossimato(n_componenti=n_componenti, C=C))
+            for C in C_list]
+
+
+class SVRApprossimato(BaseEstimator, RegressorMixin):
+    """
+    SVR con kernel rbf approssimato: una mappa di feature esplicita
+    (Nystroem o random Fourier features) seguita da una SVR lineare.
+    Il costo di addestramento cresce linearmente con il numero di righe,
+    invece che tra O(n^2) e O(n^3) come per SVR(kernel="rbf").
+
+    Args:
+    metodo: "nystroem" o "fourier" (RBFSampler)
+    n_componenti: dimensione della mappa di feature (default 300)
+    gamma: parametro del kernel rbf; "scale" come in SVR, 1 / (n_feature * var(X))
+    C: regolarizzazione della SVR lineare
+    epsilon: ampiezza del tubo epsilon-insensitive (come in SVR, default 0.1)
+    random_state: seed della mappa di feature
+    """
+
+    def __init__(self, metodo: str = "nystroem", n_componenti: int = 300, gamma="scale",
+                 C: float = 1.0, epsilon: float = 0.1, max_iter: int = 5000, random_state: int = 42):
+        self.metodo = metodo
+        self.n_componenti = n_componenti
+        self.gamma = gamma
+        self.C = C
+        self.epsilon = epsilon
+        self.max_iter = max_iter
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        gamma = 1.0 / (X.shape[1] * X.var()) if self.gamma == "scale" else self.gamma
+        if self.metodo == "nystroem":
+            self.mappa_ = Nystroem(kernel="rbf", gamma=gamma, n_components=min(self.n_componenti, len(X)),
+                                   random_state=self.random_state)
+        elif self.metodo == "fourier":
+            self.mappa_ = RBFSampler(gamma=gamma, n_components=self.n_componenti, random_state=self.random_state)
+        else:
+            raise ValueError(f"Metodo non supportato: {self.metodo}")
+        Z = self.mappa_.fit_transform(X)
+        self.svr_ = LinearSVR(C=self.C, epsilon=self.epsilon, max_iter=self.max_iter,
+                              random_state=self.random_state).fit(Z, y)
+        return self
+
+    def predict(self, X):
+        return self.svr_.predict(self.mappa_.transform(np.asarray(X, dtype=np.float64)))
+
+
+def matrice_gram(X, y, centro=None) -> np.ndarray:
+    """
+    Calcola le statistiche sufficienti della regressione lineare: la matrice
+    di Gram Z^T Z della matrice aumentata Z = [1, X, y]. Contiene il numero
+    di righe, le somme, X^T X, X^T y e y^T y; le matrici di blocchi diversi
+    si sommano e quelle di un sottoinsieme si sottraggono dal totale.
+
+    Args:
+    X: feature
+    y: target
+    centro: valori (p + 1,) sottratti alle colonne di X e a y prima di
+    accumulare, ad esempio le loro medie: con feature lontane da zero le
+    somme non centrate perdono le cifre significative nelle sottrazioni.
+    Le matrici da sommare o sottrarre devono avere lo stesso centro
+
+    Returns:
+    np.ndarray (float64) di forma (n_feature + 2, n_feature + 2)
+    """
+
+    X = np.asarray(X, dtype=np.float64)
+    Z = np.empty((X.shape[0], X.shape[1] + 2))
+    Z[:, 0] = 1.0
+    Z[:, 1:-1] = X
+    Z[:, -1] = np.asarray(y, dtype=np.float64)
+    if centro is not None:
+        Z[:, 1:] -= centro
+    return Z.T @ Z
+
+
+def _centro(X, y) -> np.ndarray:
+    """Medie delle colonne di X e di y, usate come centro di matrice_gram."""
+    return np.append(np.asarray(X, dtype=np.float64).mean(axis=0), np.asarray(y, dtype=np.float64).mean())
+
+
+def mse_da_gram(gram: np.ndarray, coefficienti, intercetta: float, centro=None) -> float:
+    """
+    MSE di un modello lineare sulle righe riassunte da gram, senza i dati:
+    il residuo e Z @ theta con theta = [intercetta, coefficienti, -1],
+    quindi la somma dei quadrati e theta^T (Z^T Z) theta. Se gram e
+    costruita attorno a centro, l'intercetta viene riportata su Z centrata.
+    """
+
+    if centro is not None:
+        intercetta = intercetta - centro[-1] + centro[:-1] @ coefficienti
+    theta = np.concatenate(([intercetta], coefficienti, [-1.0]))
+    return max(float(theta @ gram @ theta), 0.0) / gram[0, 0]
+
+
+class RegressioneLineareGram(BaseEstimator, RegressorMixin):
+    """
+    Regressione lineare ai minimi quadrati risolta dalla matrice di Gram
+    (vedi matrice_gram), equivalente a LinearRegression. Il sistema e
+    risolto sulle statistiche centrate con lstsq, che come LinearRegression
+    restituisce la soluzione a norma minima se X^T X e singolare.
+    """
+
+    def fit(self, X, y):
+        centro = _centro(X, y)
+        return self.fit_gram(matrice_gram(X, y, centro), centro)
+
+    def fit_gram(self, gram: np.ndarray, centro=None):
+        n = gram[0, 0]
+        medie = gram[0, 1:] / n
+        centrata = gram[1:, 1:] - n * np.outer(medie, medie)
+        self.coef_ = np.linalg.lstsq(centrata[:-1, :-1], centrata[:-1, -1], rcond=None)[0]
+        if centro is not None:
+            medie = medie + centro
+        self.intercept_ = float(medie[-1] - medie[:-1] @ self.coef_)
+        return self
+
+    def predict(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef_ + self.intercept_
+
+
+def cv_da_gram(gram_fold: np.ndarray, centro=None) -> tuple:
+    """
+    Cross-validation della regressione lineare dalle matrici di Gram dei
+    fold: il modello di ogni fold e risolto dal totale meno il fold, e il
+    suo MSE e calcolato dalla matrice del fold stesso. Il costo non dipende
+    dal numero di righe, che vengono lette una sola volta per costruire gram_fold.
+
+    Args:
+    gram_fold: array (cv, p + 2, p + 2) con la matrice di Gram di ogni fold
+    centro: centro comune delle matrici (vedi matrice_gram); serve solo a
+    riportare l'intercetta del modello finale sulle feature originali
+
+    Returns:
+    tuple (modello addestrato su tutte le righe, riassunto della CV come riassumi_cv)
+    """
+
+    totale = gram_fold.sum(axis=0)
+    mse_scores = []
+    for gram in gram_fold:
+        # Modello e MSE restano entrambi sulle colonne centrate
+        modello = RegressioneLineareGram().fit_gram(totale - gram)
+        mse_scores.append(mse_da_gram(gram, modello.coef_, modello.intercept_))
+    return RegressioneLineareGram().fit_gram(totale, centro), riassumi_cv(mse_scores)
+
+
+def gram_per_fold(X, y, cv: int = 5) -> tuple:
+    """
+    Matrici di Gram dei fold di KFold(cv) (senza shuffle, come valuta_griglia),
+    centrate sulle medie di tutte le righe.
+
+    Returns:
+    tuple (gram_fold, centro) da passare a cv_da_gram
+    """
+
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    centro = _centro(X, y)
+    gram_fold = np.stack([matrice_gram(X[indici], y[indici], centro)
+                          for _, indici in KFold(n_splits=cv).split(X)])
+    return gram_fold, centro
+
+
+def gram_per_fold_a_blocchi(percorso: str, colonna_target: str, cv: int = 5,
+                            dimensione_blocco: int = 100_000) -> tuple:
+    """
+    Costruisce le matrici di Gram dei fold leggendo il CSV a blocchi con
+    carica_csv, senza caricarlo in memoria. Il numero di righe non e noto in
+    anticipo, quindi la riga i-esima del file e assegnata al fold i % cv
+    (i fold non coincidono con quelli contigui di KFold). Le righe con
+    valori mancanti vengono scartate. Le matrici sono centrate sulle medie
+    del primo blocco con righe valide, una stima sufficiente a evitare la
+    perdita di cifre con feature lontane da zero.
+
+    Returns:
+    tuple (gram_fold, nomi delle feature, centro) oppure None se il file non esiste
+    """
+
+    blocchi = carica_csv(percorso, dimensione_blocco=dimensione_blocco)
+    if blocchi is None:
+        return None
+    gram_fold = None
+    colonne = None
+    centro = None
+    inizio = 0
+    for blocco in blocchi:
+        if colonne is None:
+            colonne = [c for c in blocco.columns if c != colonna_target]
+            gram_fold = np.zeros((cv, len(colonne) + 2, len(colonne) + 2))
+        fold = (inizio + np.arange(len(blocco))) % cv
+        inizio += len(blocco)
+        valide = blocco[colonne + [colonna_target]].notna().all(axis=1).to_numpy()
+        X = blocco[colonne].to_numpy(dtype=np.float64)[valide]
+        y = blocco[colonna_target].to_numpy(dtype=np.float64)[valide]
+        fold = fold[valide]
+        if centro is None and len(y):
+            centro = _centro(X, y)
+        for k in range(cv):
+            gram_fold[k] += matrice_gram(X[fold == k], y[fold == k], centro)
+    return gram_fold, colonne, centro
+
+
+def addestra_regressione_lineare_a_blocchi(percorso: str, colonna_target: str, cv: int = 5,
+                                           dimensione_blocco: int = 100_000) -> dict:
+    """
+    Addestra e valuta la regressione lineare su un CSV anche piu grande della
+    memoria: una sola lettura a blocchi (gram_per_fold_a_blocchi) fornisce
+    sia la cross-validation sia il modello finale.
+
+    Returns:
+    dict con: 'modello', 'coefficienti', 'intercetta', 'feature', 'cv_stats'
+    oppure None se il file non esiste
+    """
+
+    letti = gram_per_fold_a_blocchi(percorso, colonna_target, cv=cv, dimensione_blocco=dimensione_blocco)
+    if letti is None:
+        return None
+    gram_fold, colonne, centro = letti
+    modello, cv_stats = cv_da_gram(gram_fold, centro)
+    return {
+        'modello': modello,
+        'coefficienti': modello.coef_,
+        'intercetta': modello.intercept_,
+        'feature': colonne,
+        'cv_stats': cv_stats
+    }
+
+
+def campione_stratificato(y, dimensione: int, n_strati: int = 10, random_state: int = 42):
+    """
+    Estrae gli indici di un sottocampione stratificato sui quantili del
+    target, cosi la distribuzione di y resta quella del dataset completo.
+    Le fasce con una sola riga (ad esempio per valori ripetuti del target)
+    vengono unite alla fascia precedente; se le fasce restano piu delle
+    righe da estrarre o da escludere, il campione e casuale semplice.
+
+    Args:
+    y: target
+    dimensione: numero di righe del sottocampione
+    n_strati: numero di fasce di quantili del target (default 10)
+    random_state: seed per la riproducibilita
+
+    Returns:
+    np.ndarray con gli indici (posizionali) selezionati
+    """
+
+    y = np.asarray(y, dtype=np.float64)
+    if dimensione >= len(y):
+        return np.arange(len(y))
+    limiti = np.quantile(y, np.linspace(0, 1, n_strati + 1)[1:-1])
+    strati = np.searchsorted(limiti, y, side="right")
+
+    # Fasce con almeno 2 righe (richiesto da train_test_split): ogni fascia troppo
+    # piccola si unisce alla successiva, l'ultima alla precedente
+    conteggi = np.bincount(strati)
+    unione = np.zeros(len(conteggi), dtype=np.intp)
+    gruppo, righe_gruppo = 0, 0
+    for strato, conteggio in enumerate(conteggi):
+        unione[strato] = gruppo
+        righe_gruppo += conteggio
+        if righe_gruppo >= 2:
+            gruppo, righe_gruppo = gruppo + 1, 0
+    if righe_gruppo:
+        unione[unione == gruppo] = max(gruppo - 1, 0)
+    strati = unione[strati]
+
+    n_gruppi = len(np.unique(strati))
+    stratifica = strati if n_gruppi <= min(dimensione, len(y) - dimensione) else None
+    indici, _ = train_test_split(np.arange(len(y)), train_size=dimensione,
+                                 stratify=stratifica, random_state=random_state)
+    return np.sort(indici)
+
+
+@traccia()
+def addestra_regressione_lineare(X_train, y_train, X_test, n_jobs: int = 1, risultati_cv: dict = None) -> dict:
+    """
+    Addestra la regressione lineare. Senza risultati_cv la cross-validation
+    e il modello finale sono ottenuti dalle matrici di Gram dei fold (vedi
+    cv_da_gram), con una sola passata sui dati; n_jobs e mantenuto per
+    uniformita con le altre funzioni addestra_*.
+    """
+    if risultati_cv is not None and ("Linear Regression", None) in risultati_cv:
+        modello = RegressioneLineareGram().fit(X_train, y_train)
+        cv_stats = risultati_cv[("Linear Regression", None)]
+    else:
+        modello, cv_stats = cv_da_gram(*gram_per_fold(X_train, y_train))
 
-    modello.fit(X_train, y_train)
     return {
         'modello': modello,
         'predizioni': modello.predict(X_test),
         'coefficienti': modello.coef_,
         'intercetta': modello.intercept_,
-        'cv_stats': risultati_cv
+        'cv_stats': cv_stats
     }
 
 
-def addestra_knn(X_train, y_train, X_test, k_list=[3, 5, 7, 9, 11]) -> dict:
+@traccia()
+def addestra_knn(X_train, y_train, X_test, k_list=K_LIST, n_jobs: int = 1, risultati_cv: dict = None) -> dict:
     miglior_mse = float('inf')
     miglior_k = None
-    miglior_modello = None
 
+    if risultati_cv is None:
+        risultati_cv = valuta_griglia(valutatori_knn(k_list), X_train, y_train, n_jobs=n_jobs)
     for k in k_list:
-        modello = KNeighborsRegressor(n_neighbors=k)
-        cv_res = cross_validation_modello(modello, X_train, y_train)
+        cv_res = risultati_cv[("KNN", k)]
 
         if cv_res['media'] < miglior_mse:
             miglior_mse = cv_res['media']
             miglior_k = k
-            miglior_modello = modello
 
     # Addestramento finale con il miglior k trovato
+    miglior_modello = KNeighborsRegressor(n_neighbors=miglior_k)
     miglior_modello.fit(X_train, y_train)
     return {
         'modello': miglior_modello,
@@ -75,17 +621,23 @@ def addestra_knn(X_train, y_train, X_test, k_list=[3, 5, 7, 9, 11]) -> dict:
     }
 
 
-def addestra_decision_tree(X_train, y_train, X_test, max_depth_list=[3, 5, 7, 10, None]) -> dict:
-    miglior_mse = float('inf')
-    miglior_depth = None
-
-    for depth in max_depth_list:
-        modello = DecisionTreeRegressor(max_depth=depth, random_state=42)
-        cv_res = cross_validation_modello(modello, X_train, y_train)
-
-        if cv_res['media'] < miglior_mse:
-            miglior_mse = cv_res['media']
-            miglior_depth = depth
+@traccia()
+def addestra_decision_tree(X_train, y_train, X_test, max_depth_list=MAX_DEPTH_LIST,
+                           n_jobs: int = 1, risultati_cv: dict = None) -> dict:
+    """
+    Sceglie la profondita con la griglia di ValutatoreDecisionTree e
+    addestra l'albero finale. cv_stats e la CV di un vero albero con la
+    profondita scelta: se risultati_cv non la contiene gia (chiave
+    ("Decision Tree verificato", profondita)) viene calcolata su X_train.
+    """
+    if risultati_cv is None:
+        risultati_cv = valuta_griglia(valutatori_decision_tree(max_depth_list), X_train, y_train, n_jobs=n_jobs)
+    miglior_depth = miglior_profondita(risultati_cv, max_depth_list)
+    chiave = ("Decision Tree verificato", miglior_depth)
+    if chiave in risultati_cv:
+        cv_stats = risultati_cv[chiave]
+    else:
+        cv_stats = valuta_griglia([valutatore_profondita(miglior_depth)], X_train, y_train, n_jobs=n_jobs)[chiave]
 
     # Addestramento finale
     modello_finale = DecisionTreeRegressor(max_depth=miglior_depth, random_state=42)
@@ -95,37 +647,175 @@ def addestra_decision_tree(X_train, y_train, X_test, max_depth_list=[3, 5, 7, 10
         'modello': modello_finale,
         'predizioni': modello_finale.predict(X_test),
         'miglior_profondita': miglior_depth,
+        'mse_minimo': cv_stats['media'],
+        'cv_stats': cv_stats,
         'importanza_feature': modello_finale.feature_importances_
     }
 
 
-def addestra_svr(X_train, y_train, X_test, kernel_list=['linear', 'rbf']) -> dict:
+@traccia()
+def addestra_svr(X_train, y_train, X_test, kernel_list=KERNEL_LIST, n_jobs: int = 1, risultati_cv: dict = None) -> dict:
     miglior_mse = float('inf')
     miglior_kernel = None
 
+    if risultati_cv is None:
+        risultati_cv = valuta_griglia(valutatori_svr(kernel_list), X_train, y_train, n_jobs=n_jobs)
     for k in kernel_list:
-        modello = SVR(kernel=k)
-        cv_res = cross_validation_modello(modello, X_train, y_train)
+        cv_res = risultati_cv[("SVR", k)]
 
         if cv_res['media'] < miglior_mse:
             miglior_mse = cv_res['media']
             miglior_kernel = k
 
     modello_finale = SVR(kernel=miglior_kernel)
+    inizio = time.perf_counter()
     modello_finale.fit(X_train, y_train)
+    tempo = time.perf_counter() - inizio
 
     return {
         'modello': modello_finale,
         'predizioni': modello_finale.predict(X_test),
-        'miglior_kernel': miglior_kernel
+        'miglior_kernel': miglior_kernel,
+        'tempo_addestramento': tempo
     }
 
 
-def addestra_tutti_i_modelli(X_train, y_train, X_test) -> dict:
+@traccia()
+def addestra_svr_approssimato(X_train, y_train, X_test, C_list=C_LIST_SVR_APPROSSIMATO,
+                              n_componenti: int = 300, dimensione_campione_tuning: int = None,
+                              n_jobs: int = 1, risultati_cv: dict = None) -> dict:
+    """
+    Addestra una SVR approssimata (SVRApprossimato, mappa di Nystroem + SVR
+    lineare). La scelta di C puo essere fatta su un sottocampione
+    stratificato del training set, mentre il modello finale usa tutti i dati.
+
+    Args:
+    C_list: valori di C da valutare in cross-validation
+    n_componenti: dimensione della mappa di Nystroem
+    dimensione_campione_tuning: righe del sottocampione per la ricerca di C
+    (default None = tutto il training set)
+    n_jobs: processi per la ricerca degli iperparametri
+    risultati_cv: risultati di valuta_griglia gia calcolati (la ricerca di C
+    non viene ripetuta)
+    """
+    miglior_mse = float('inf')
+    miglior_C = None
+
+    if risultati_cv is None:
+        X_tuning, y_tuning = X_train, y_train
+        if dimensione_campione_tuning is not None:
+            indici = campione_stratificato(y_train, dimensione_campione_tuning)
+            X_tuning, y_tuning = _righe(X_train, indici), _righe(y_train, indici)
+        risultati_cv = valuta_griglia(valutatori_svr_approssimato(C_list, n_componenti),
+                                      X_tuning, y_tuning, n_jobs=n_jobs)
+    for C in C_list:
+        cv_res = risultati_cv[("SVR approssimato", C)]
+
+        if cv_res['media'] < miglior_mse:
+            miglior_mse = cv_res['media']
+            miglior_C = C
+
+    modello_finale = SVRApprossimato(n_componenti=n_componenti, C=miglior_C)
+    inizio = time.perf_counter()
+    modello_finale.fit(X_train, y_train)
+    tempo = time.perf_counter() - inizio
+
+    return {
+        'modello': modello_finale,
+        'predizioni': modello_finale.predict(X_test),
+        'miglior_C': miglior_C,
+        'tempo_addestramento': tempo
+    }
+
+
+@traccia()
+def addestra_tutti_i_modelli(X_train, y_train, X_test, n_jobs: int = 1, modalita_svr: str = "esatto",
+                             coordinate_train=None, coordinate_test=None, k_vicinato: int = K_VICINATO,
+                             dimensione_campione_tuning: int = None, normalizzazione: str = "minmax") -> dict:
+    """
+    Addestra e seleziona tutti i modelli. La cross-validation dell'intera
+    griglia (modello, iperparametro, fold) viene eseguita in un'unica
+    chiamata a valuta_griglia, quindi con n_jobs > 1 tutti i compiti
+    condividono lo stesso pool di processi.
+
+    Con le coordinate i modelli ricevono anche la feature di vicinato
+    (mediana del target dei k_vicinato distretti di training piu vicini,
+    vedi FeatureVicinato). In cross-validation viene ricalcolata sul
+    training di ogni fold, quindi la validazione non vede i propri target.
+
+    Args:
+    modalita_svr: "esatto" (SVR con kernel), "approssimato" (solo
+    SVRApprossimato, per dataset grandi) o "entrambi" (per confrontarli nel report)
+    coordinate_train: latitudini e longitudini in gradi delle righe di
+    X_train (DataFrame con le colonne di coordinate o array (n, 2));
+    None = nessuna feature di vicinato
+    coordinate_test: coordinate delle righe di X_test
+    k_vicinato: vicini usati dalla feature di vicinato
+    dimensione_campione_tuning: righe del sottocampione stratificato su cui
+    scegliere C della SVR approssimata (default None = tutto il training
+    set, nello stesso pool degli altri modelli)
+    normalizzazione: metodo del Normalizzatore della feature di vicinato,
+    lo stesso usato per le altre feature (default "minmax")
+
+    Returns:
+    dict { nome modello: risultati di addestra_* }; con le coordinate ogni
+    voce contiene anche 'vicinato', la FeatureVicinato stimata sul training
+
+    Raises:
+    ValueError: se modalita_svr non e supportata o se coordinate_test manca
+    """
+    if modalita_svr not in MODALITA_SVR:
+        raise ValueError(f"Modalita SVR non supportata: {modalita_svr}")
+    if coordinate_train is not None and coordinate_test is None:
+        raise ValueError("coordinate_test e necessario insieme a coordinate_train")
+    svr_esatto = modalita_svr in ("esatto", "entrambi")
+
+    # I compiti piu costosi (SVR) per primi, per bilanciare il carico del pool
+    svr_approssimato = modalita_svr != "esatto"
+    tuning_su_campione = svr_approssimato and dimensione_campione_tuning is not None
+    valutatori = ((valutatori_svr() if svr_esatto else [])
+                  + (valutatori_svr_approssimato() if svr_approssimato and not tuning_su_campione else [])
+                  + valutatori_knn() + valutatori_decision_tree())
+    feature_fold = vicinato = None
+    if coordinate_train is not None:
+        # La feature cambia da fold a fold: la CV della regressione lineare passa dal pool
+        # invece che dalle matrici di Gram di X_train
+        valutatori = valutatori + valutatori_regressione_lineare()
+        with span("feature di vicinato per fold"):
+            feature_fold = feature_vicinato_per_fold(coordinate_train, y_train, fold_cv(len(y_train)), k_vicinato,
+                                                     normalizzazione=normalizzazione)
+    risultati_cv = valuta_griglia(valutatori, X_train, y_train, n_jobs=n_jobs, feature_fold=feature_fold)
+
+    if tuning_su_campione:
+        indici = campione_stratificato(y_train, dimensione_campione_tuning)
+        X_tuning, y_tuning = _righe(X_train, indici), _righe(y_train, indici)
+        feature_tuning = None
+        if coordinate_train is not None:
+            feature_tuning = feature_vicinato_per_fold(_righe(coordinate_train, indici), y_tuning,
+                                                       fold_cv(len(indici)), k_vicinato,
+                                                       normalizzazione=normalizzazione)
+        risultati_cv.update(valuta_griglia(valutatori_svr_approssimato(), X_tuning, y_tuning,
+                                           n_jobs=n_jobs, feature_fold=feature_tuning))
+
+    # CV di un vero albero con la profondita scelta, sugli stessi fold (e feature di vicinato)
+    risultati_cv.update(valuta_griglia([valutatore_profondita(miglior_profondita(risultati_cv))], X_train, y_train,
+                                       n_jobs=n_jobs, feature_fold=feature_fold))
+
+    if coordinate_train is not None:
+        vicinato = FeatureVicinato(k_vicinato, normalizzazione=normalizzazione)
+        X_train = aggiungi_vicinato(X_train, vicinato.fit_transform(coordinate_train, y_train))
+        X_test = aggiungi_vicinato(X_test, vicinato.transform(coordinate_test))
+
     risultati = {
-        "Linear Regression": addestra_regressione_lineare(X_train, y_train, X_test),
-        "KNN": addestra_knn(X_train, y_train, X_test),
-        "Decision Tree": addestra_decision_tree(X_train, y_train, X_test),
-        "SVR": addestra_svr(X_train, y_train, X_test)
+        "Linear Regression": addestra_regressione_lineare(X_train, y_train, X_test, risultati_cv=risultati_cv),
+        "KNN": addestra_knn(X_train, y_train, X_test, risultati_cv=risultati_cv),
+        "Decision Tree": addestra_decision_tree(X_train, y_train, X_test, risultati_cv=risultati_cv)
     }
+    if svr_esatto:
+        risultati["SVR"] = addestra_svr(X_train, y_train, X_test, risultati_cv=risultati_cv)
+    if svr_approssimato:
+        risultati["SVR approssimato"] = addestra_svr_approssimato(X_train, y_train, X_test, risultati_cv=risultati_cv)
+    if vicinato is not None:
+        for risultato in risultati.values():
+            risultato['vicinato'] = vicinato
     return risultati
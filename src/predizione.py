@@ -0,0 +1,224 @@
+import json
+import os
+import pickle
+import platform
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from src.data_cleaning import Normalizzatore
+from src.data_loader import carica_csv
+from src.geospaziale import COLONNA_VICINATO
+
+
+# Versione del formato del pacchetto: va incrementata se cambia la sua struttura
+VERSIONE_FORMATO = 2
+
+
+def crea_pacchetto(nome: str, modello, feature: list, target: str, normalizzatore: Normalizzatore,
+                   valori_riempimento: dict, metriche: dict, parametri: dict = None, vicinato=None) -> dict:
+    """
+    Riunisce in un dizionario tutto cio che serve per usare un modello
+    addestrato su dati nuovi: il modello, le colonne attese nell'ordine del
+    training, i valori con cui riempire i dati mancanti, i parametri della
+    normalizzazione e i metadati di versione.
+
+    Args:
+    nome: nome del modello (es. "KNN")
+    modello: stimatore addestrato
+    feature: colonne di input nell'ordine usato in addestramento
+    target: nome della colonna target
+    normalizzatore: Normalizzatore stimato sul training set
+    valori_riempimento: valore di riempimento dei NaN per colonna (vedi
+    valori_riempimento in data_cleaning), oppure None se le righe vanno scartate
+    metriche: metriche sul test set (vedi calcola_metriche)
+    parametri: parametri della pipeline usati in addestramento
+    vicinato: FeatureVicinato stimata sul training, se il modello usa la
+    feature di vicinato (vedi addestra_tutti_i_modelli)
+
+    Returns:
+    dict con: 'modello', 'nome', 'feature', 'target', 'normalizzatore',
+    'valori_riempimento', 'vicinato', 'metriche', 'parametri', 'versione'
+    """
+    return {
+        'modello': modello,
+        'nome': nome,
+        'feature': list(feature),
+        'target': target,
+        'normalizzatore': normalizzatore.a_dizionario(),
+        'valori_riempimento': valori_riempimento,
+        'vicinato': vicinato,
+        'metriche': {chiave: float(valore) for chiave, valore in metriche.items()},
+        'parametri': dict(parametri or {}),
+        'versione': {
+            'formato': VERSIONE_FORMATO,
+            'creato_il': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'scikit-learn': sklearn.__version__
+        }
+    }
+
+
+def percorso_metadati(percorso: str) -> str:
+    """Percorso del file JSON con i metadati leggibili del pacchetto."""
+    return os.path.splitext(percorso)[0] + ".json"
+
+
+def salva_modello(pacchetto: dict, percorso: str) -> None:
+    """
+    Salva il pacchetto (pickle) e, accanto, i suoi metadati in JSON: tutto
+    tranne lo stimatore e l'indice della feature di vicinato (di cui
+    restano k e colonne), cosi versione e metriche si leggono senza
+    caricarlo. La scrittura e atomica, come per gli artefatti.
+    """
+    os.makedirs(os.path.dirname(percorso) or ".", exist_ok=True)
+    with open(percorso + ".tmp", "wb") as f:
+        pickle.dump(pacchetto, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(percorso + ".tmp", percorso)
+
+    metadati = {chiave: valore for chiave, valore in pacchetto.items() if chiave != 'modello'}
+    vicinato = pacchetto['vicinato']
+    metadati['vicinato'] = None if vicinato is None else {'k': vicinato.k, 'colonne': list(vicinato.colonne)}
+    with open(percorso_metadati(percorso), "w", encoding="utf-8") as f:
+        json.dump(metadati, f, indent=2)
+
+
+def leggi_metadati(percorso: str):
+    """
+    Legge i metadati JSON di un modello salvato con salva_modello.
+
+    Returns:
+    dict con i metadati oppure None se il file non esiste
+    """
+    if not os.path.exists(percorso_metadati(percorso)):
+        return None
+    with open(percorso_metadati(percorso), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def carica_modello(percorso: str):
+    """
+    Carica un pacchetto salvato con salva_modello.
+
+    Returns:
+    dict del pacchetto oppure None se il file non esiste
+
+    Raises:
+    ValueError: se il pacchetto e stato salvato con un formato diverso
+    """
+    if not os.path.exists(percorso):
+        print(f"Errore : il modello {percorso} non esiste.")
+        return None
+    with open(percorso, "rb") as f:
+        pacchetto = pickle.load(f)
+
+    versione = pacchetto['versione']
+    if versione['formato'] != VERSIONE_FORMATO:
+        raise ValueError(f"Formato del modello non supportato: {versione['formato']}")
+    if versione['scikit-learn'] != sklearn.__version__:
+        print(f"Attenzione: modello salvato con scikit-learn {versione['scikit-learn']}, "
+              f"in uso la versione {sklearn.__version__}")
+    return pacchetto
+
+
+def colonne_modello(pacchetto: dict) -> list:
+    """Colonne viste dal modello: le feature di input piu, se usata, la feature di vicinato."""
+    return pacchetto['feature'] + ([COLONNA_VICINATO] if pacchetto['vicinato'] is not None else [])
+
+
+def prepara_feature(pacchetto: dict, dati) -> np.ndarray:
+    """
+    Applica a nuovi dati la stessa preparazione del training: selezione e
+    ordinamento delle colonne, riempimento dei valori mancanti,
+    normalizzazione e, se usata, feature di vicinato (calcolata dalle
+    coordinate riempite). Le colonne in piu (ad esempio il target) sono ignorate.
+
+    Returns:
+    np.ndarray float64 con una riga per riga di dati e una colonna per
+    colonna di colonne_modello (NaN dove un valore mancante non puo essere
+    riempito)
+
+    Raises:
+    KeyError: se manca una delle colonne usate in addestramento
+    """
+    mancanti = [colonna for colonna in pacchetto['feature'] if colonna not in dati.columns]
+    if mancanti:
+        raise KeyError(f"Colonne mancanti: {mancanti}")
+
+    X = dati[pacchetto['feature']].to_numpy(dtype=np.float64, copy=True)
+    if pacchetto['valori_riempimento'] is not None:
+        riempimento = np.array([pacchetto['valori_riempimento'][c] for c in pacchetto['feature']])
+        righe, colonne = np.nonzero(np.isnan(X))
+        X[righe, colonne] = riempimento[colonne]
+
+    vicinato = pacchetto['vicinato']
+    if vicinato is not None:
+        coordinate = X[:, [pacchetto['feature'].index(c) for c in vicinato.colonne]]
+        return np.column_stack([
+            Normalizzatore.da_dizionario(pacchetto['normalizzatore']).transform(X, in_place=True),
+            vicinato.transform(coordinate)
+        ])
+    return Normalizzatore.da_dizionario(pacchetto['normalizzatore']).transform(X, in_place=True)
+
+
+def predici(pacchetto: dict, dati) -> np.ndarray:
+    """
+    Predice il target per le righe di un DataFrame. Le righe con valori
+    mancanti non riempibili (strategia "elimina") ricevono NaN.
+    """
+    X = prepara_feature(pacchetto, dati)
+    predizioni = np.full(len(X), np.nan)
+    valide = ~np.isnan(X).any(axis=1)
+    if valide.any():
+        X = X[valide]
+        if hasattr(pacchetto['modello'], 'feature_names_in_'):
+            # Modello addestrato su un DataFrame: stessi nomi di colonna, senza copiare i dati
+            X = pd.DataFrame(X, columns=colonne_modello(pacchetto), copy=False)
+        predizioni[valide] = pacchetto['modello'].predict(X)
+    return predizioni
+
+
+def predici_csv(pacchetto: dict, percorso_input: str, percorso_output: str,
+                dimensione_blocco: int = 100_000, includi_input: bool = False):
+    """
+    Predice il target per tutte le righe di un CSV leggendolo a blocchi:
+    ogni blocco viene preparato, predetto e accodato al CSV di output, quindi
+    la memoria usata dipende da dimensione_blocco e non dalla dimensione del file.
+
+    Args:
+    pacchetto: modello caricato con carica_modello
+    percorso_input: CSV con (almeno) le colonne pacchetto['feature']
+    percorso_output: CSV di output, una riga per riga di input nello stesso ordine
+    dimensione_blocco: righe lette e predette per volta (default 100000)
+    includi_input: se True l'output contiene anche le colonne di input
+
+    Returns:
+    int: numero di righe predette, oppure None se il file di input non esiste
+    """
+    blocchi = carica_csv(percorso_input, dimensione_blocco=dimensione_blocco)
+    if blocchi is None:
+        return None
+
+    colonna = f"{pacchetto['target']}_predetto"
+    os.makedirs(os.path.dirname(percorso_output) or ".", exist_ok=True)
+    n_righe = 0
+    scritto = False
+    with open(percorso_output + ".tmp", "w", encoding="utf-8", newline="") as f:
+        for blocco in blocchi:
+            uscita = blocco.copy() if includi_input else pd.DataFrame(index=blocco.index)
+            uscita[colonna] = predici(pacchetto, blocco)
+            uscita.to_csv(f, header=not scritto, index=False)
+            scritto = True
+            n_righe += len(blocco)
+        if not scritto:
+            # CSV senza righe e nessun blocco letto: l'intestazione viene scritta comunque
+            intestazione = pd.read_csv(percorso_input, nrows=0)
+            uscita = intestazione.copy() if includi_input else pd.DataFrame()
+            uscita[colonna] = predici(pacchetto, intestazione)
+            uscita.to_csv(f, index=False)
+    os.replace(percorso_output + ".tmp", percorso_output)
+    return n_righe
@@ -0,0 +1,299 @@
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as TimeoutFuturo
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Queue, Empty
+
+import numpy as np
+import pandas as pd
+
+from src.data_cleaning import Normalizzatore
+from src.predizione import predici
+
+
+class StatisticheServizio:
+    """
+    Raccoglie latenze e volumi del servizio di predizione. Le latenze sono
+    conservate in una finestra delle ultime n richieste, cosi i percentili
+    descrivono il comportamento recente e la memoria resta costante.
+
+    Args:
+    dimensione_finestra: numero di latenze conservate (default 10000)
+    """
+
+    def __init__(self, dimensione_finestra: int = 10_000):
+        self.latenze = deque(maxlen=dimensione_finestra)
+        self.n_richieste = 0
+        self.n_righe = 0
+        self.n_batch = 0
+        self.n_errori = 0
+        self.inizio = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def registra_richiesta(self, latenza: float, n_righe: int) -> None:
+        with self._lock:
+            self.latenze.append(latenza)
+            self.n_richieste += 1
+            self.n_righe += n_righe
+
+    def registra_batch(self) -> None:
+        with self._lock:
+            self.n_batch += 1
+
+    def registra_errore(self) -> None:
+        with self._lock:
+            self.n_errori += 1
+
+    def riassunto(self) -> dict:
+        """
+        Returns:
+        dict con: 'richieste', 'righe', 'batch', 'righe_per_batch', 'errori',
+        'latenza_p50_ms', 'latenza_p99_ms', 'throughput_righe_s', 'attivo_da_s'
+        """
+        with self._lock:
+            latenze = np.array(self.latenze, dtype=np.float64)
+            durata = time.perf_counter() - self.inizio
+            return {
+                'richieste': self.n_richieste,
+                'righe': self.n_righe,
+                'batch': self.n_batch,
+                'righe_per_batch': self.n_righe / self.n_batch if self.n_batch else 0.0,
+                'errori': self.n_errori,
+                'latenza_p50_ms': float(np.percentile(latenze, 50) * 1000) if len(latenze) else None,
+                'latenza_p99_ms': float(np.percentile(latenze, 99) * 1000) if len(latenze) else None,
+                'throughput_righe_s': self.n_righe / durata if durata > 0 else 0.0,
+                'attivo_da_s': durata
+            }
+
+
+class RaggruppatoreRichieste:
+    """
+    Micro-batching delle predizioni: le righe inviate da richieste diverse
+    vengono accodate e un unico thread le predice insieme con una sola
+    chiamata a predict. Un batch parte quando raggiunge dimensione_massima
+    righe o quando la prima riga in coda ha atteso attesa_massima secondi.
+
+    Dopo chiudi le righe gia accodate vengono predette, mentre le nuove
+    richieste ricevono subito un Future con RuntimeError.
+
+    Args:
+    pacchetto: modello caricato con carica_modello (vedi src.predizione)
+    attesa_massima: attesa massima in secondi prima di predire (default 0.005)
+    dimensione_massima: righe massime per batch (default 256)
+    statistiche: StatisticheServizio su cui registrare i batch
+    """
+
+    def __init__(self, pacchetto: dict, attesa_massima: float = 0.005, dimensione_massima: int = 256,
+                 statistiche: StatisticheServizio = None):
+        self.pacchetto = pacchetto
+        self.attesa_massima = attesa_massima
+        self.dimensione_massima = dimensione_massima
+        self.statistiche = statistiche if statistiche is not None else StatisticheServizio()
+        self._coda = Queue()
+        self._attivo = True
+        self.chiuso = False
+        self._lock_chiusura = threading.Lock()
+        self._thread = threading.Thread(target=self._esegui, daemon=True)
+        self._thread.start()
+
+    def sottometti(self, righe: np.ndarray) -> Future:
+        """
+        Accoda le righe (array 2-D con le colonne pacchetto['feature']) e
+        restituisce un Future con l'array delle loro predizioni.
+        """
+        futuro = Future()
+        with self._lock_chiusura:
+            if self.chiuso:
+                futuro.set_exception(RuntimeError("Il servizio di predizione e stato chiuso"))
+            else:
+                self._coda.put((righe, futuro))
+        return futuro
+
+    def chiudi(self) -> None:
+        with self._lock_chiusura:
+            if self.chiuso:
+                return
+            self.chiuso = True
+            self._coda.put(None)
+        self._thread.join()
+        # Nessun elemento dovrebbe restare dopo il segnale di chiusura: per sicurezza si fanno fallire
+        while True:
+            try:
+                elemento = self._coda.get_nowait()
+            except Empty:
+                break
+            if elemento is not None:
+                elemento[1].set_exception(RuntimeError("Il servizio di predizione e stato chiuso"))
+
+    def _esegui(self) -> None:
+        while self._attivo:
+            elemento = self._coda.get()
+            if elemento is None:
+                break
+            batch = [elemento]
+            n_righe = len(elemento[0])
+            scadenza = time.perf_counter() + self.attesa_massima
+            while n_righe < self.dimensione_massima:
+                residuo = scadenza - time.perf_counter()
+                try:
+                    elemento = self._coda.get(timeout=residuo) if residuo > 0 else self._coda.get_nowait()
+                except Empty:
+                    break
+                if elemento is None:
+                    self._attivo = False
+                    break
+                batch.append(elemento)
+                n_righe += len(elemento[0])
+            self._predici_batch(batch)
+
+    def _predici_batch(self, batch: list) -> None:
+        X = pd.DataFrame(np.concatenate([righe for righe, _ in batch]), columns=self.pacchetto['feature'])
+        try:
+            predizioni = predici(self.pacchetto, X)
+        except Exception as errore:
+            for _, futuro in batch:
+                futuro.set_exception(errore)
+            return
+        self.statistiche.registra_batch()
+        inizio = 0
+        for righe, futuro in batch:
+            futuro.set_result(predizioni[inizio:inizio + len(righe)])
+            inizio += len(righe)
+
+
+class _ServerPredizione(ThreadingHTTPServer):
+    # La coda di ascolto predefinita (5) rifiuta le connessioni sotto carico concorrente
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def righe_da_json(pacchetto: dict, corpo) -> np.ndarray:
+    """
+    Converte il corpo JSON di una richiesta (un oggetto {colonna: valore} o
+    una lista di oggetti) in un array con le colonne nell'ordine del modello.
+    I valori null diventano NaN e vengono riempiti in predizione.
+
+    Raises:
+    ValueError: se il corpo non e un oggetto o una lista di oggetti, o se un
+    valore non e numerico
+    KeyError: se manca una colonna usata in addestramento
+    """
+    oggetti = [corpo] if isinstance(corpo, dict) else corpo
+    if not isinstance(oggetti, list) or not oggetti or not all(isinstance(o, dict) for o in oggetti):
+        raise ValueError("Il corpo deve essere un oggetto JSON o una lista non vuota di oggetti")
+    mancanti = [c for c in pacchetto['feature'] if any(c not in o for o in oggetti)]
+    if mancanti:
+        raise KeyError(f"Colonne mancanti: {mancanti}")
+    try:
+        return np.array([[np.nan if o[c] is None else o[c] for c in pacchetto['feature']] for o in oggetti],
+                        dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError("I valori delle feature devono essere numerici")
+
+
+def riga_riscaldamento(pacchetto: dict) -> pd.DataFrame:
+    """
+    Riga valida per scaldare il modello: i valori di riempimento o, se le
+    righe incomplete vengono scartate (strategia "elimina"), il centro della
+    normalizzazione (minimo o media del training).
+    """
+    if pacchetto['valori_riempimento'] is not None:
+        valori = [pacchetto['valori_riempimento'][c] for c in pacchetto['feature']]
+    else:
+        normalizzatore = Normalizzatore.da_dizionario(pacchetto['normalizzatore'])
+        colonne = normalizzatore.colonne or pacchetto['feature']
+        centro = dict(zip(colonne, normalizzatore.centro))
+        valori = [centro[c] for c in pacchetto['feature']]
+    return pd.DataFrame([valori], columns=pacchetto['feature'], dtype=np.float64)
+
+
+def crea_servizio(pacchetto: dict, host: str = "127.0.0.1", porta: int = 8000,
+                  attesa_massima: float = 0.005, dimensione_massima: int = 256,
+                  timeout_predizione: float = 30.0) -> ThreadingHTTPServer:
+    """
+    Crea il server HTTP/JSON di predizione (non ancora avviato). Il modello
+    viene caricato una volta e scaldato con una predizione di prova
+    (riga_riscaldamento), cosi la prima richiesta reale non paga costi di
+    inizializzazione.
+
+    Endpoint:
+    POST /predici: oggetto o lista di oggetti {colonna: valore}; risponde
+    {"predizione": x} o {"predizioni": [...]}
+    GET /statistiche: latenze p50/p99, throughput e dati del modello
+    (nome, metriche sul test set calcolate con calcola_metriche, versione)
+
+    Args:
+    pacchetto: modello caricato con carica_modello
+    host: indirizzo di ascolto (default solo locale)
+    porta: porta TCP (0 = scelta dal sistema)
+    attesa_massima: attesa massima del micro-batching in secondi
+    dimensione_massima: righe massime per batch
+    timeout_predizione: attesa massima in secondi di una predizione; oltre,
+    o a servizio chiuso, la richiesta riceve 503
+
+    Returns:
+    ThreadingHTTPServer, con il raggruppatore nell'attributo raggruppatore
+    """
+    predici(pacchetto, riga_riscaldamento(pacchetto))
+
+    statistiche = StatisticheServizio()
+    raggruppatore = RaggruppatoreRichieste(pacchetto, attesa_massima, dimensione_massima, statistiche)
+
+    class GestoreRichieste(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, formato, *args):
+            pass
+
+        def _rispondi(self, codice: int, contenuto: dict) -> None:
+            corpo = json.dumps(contenuto).encode("utf-8")
+            self.send_response(codice)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def do_GET(self):
+            if self.path != "/statistiche":
+                self._rispondi(404, {'errore': f"Percorso non trovato: {self.path}"})
+                return
+            self._rispondi(200, {
+                **statistiche.riassunto(),
+                'modello': pacchetto['nome'],
+                'metriche': pacchetto['metriche'],
+                'versione': pacchetto['versione']
+            })
+
+        def do_POST(self):
+            if self.path != "/predici":
+                self._rispondi(404, {'errore': f"Percorso non trovato: {self.path}"})
+                return
+            inizio = time.perf_counter()
+            try:
+                lunghezza = int(self.headers.get("Content-Length", 0))
+                corpo = json.loads(self.rfile.read(lunghezza))
+                righe = righe_da_json(pacchetto, corpo)
+            except (ValueError, KeyError) as errore:
+                statistiche.registra_errore()
+                self._rispondi(400, {'errore': str(errore).strip("'\"")})
+                return
+            try:
+                predizioni = raggruppatore.sottometti(righe).result(timeout=timeout_predizione)
+            except TimeoutFuturo:
+                statistiche.registra_errore()
+                self._rispondi(503, {'errore': f"Predizione non completata entro {timeout_predizione} s"})
+                return
+            except Exception as errore:
+                statistiche.registra_errore()
+                self._rispondi(503 if raggruppatore.chiuso else 500, {'errore': str(errore)})
+                return
+            statistiche.registra_richiesta(time.perf_counter() - inizio, len(righe))
+            predizioni = [None if np.isnan(p) else float(p) for p in predizioni]
+            self._rispondi(200, {'predizione': predizioni[0]} if isinstance(corpo, dict)
+                           else {'predizioni': predizioni})
+
+    server = _ServerPredizione((host, porta), GestoreRichieste)
+    server.raggruppatore = raggruppatore
+    return server
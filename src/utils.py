@@ -1,5 +1,11 @@
+import functools
+import json
 import math
+import os
 import random
+import threading
+import time
+import tracemalloc
 from datetime import datetime, timedelta
 
 
@@ -57,20 +63,238 @@ def genera_colori_casuali(n: int, seed: int = 42) -> list:
     return colori
 
 
+class _SpanNullo:
+    """Span restituito quando il tracciatore e disattivo: non misura nulla."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *eccezione):
+        return False
+
+
+_SPAN_NULLO = _SpanNullo()
+
+
+class _Span:
+    """Intervallo misurato da Tracciatore.span (vedi Tracciatore)."""
+
+    def __init__(self, tracciatore, nome: str, attributi: dict):
+        self.tracciatore = tracciatore
+        self.nome = nome
+        self.attributi = attributi
+        self.picco_figli = 0
+
+    def __enter__(self):
+        pila = self.tracciatore._pila()
+        self.genitore = pila[-1] if pila else None
+        self.profondita = len(pila)
+        self.memoria = self.tracciatore.memoria and tracemalloc.is_tracing()
+        if self.memoria:
+            attuale, picco = tracemalloc.get_traced_memory()
+            # Il picco di tracemalloc e globale: lo si conserva nel genitore prima di azzerarlo
+            if self.genitore is not None:
+                self.genitore.picco_figli = max(self.genitore.picco_figli, picco)
+            tracemalloc.reset_peak()
+            self.memoria_iniziale = attuale
+        pila.append(self)
+        self.inizio_cpu = time.process_time()
+        self.inizio = time.perf_counter()
+        return self
+
+    def __exit__(self, *eccezione):
+        fine = time.perf_counter()
+        cpu = time.process_time() - self.inizio_cpu
+        self.tracciatore._pila().pop()
+        record = {
+            'nome': self.nome,
+            'percorso': self.percorso,
+            'profondita': self.profondita,
+            'inizio': self.inizio - self.tracciatore.origine,
+            'durata': fine - self.inizio,
+            'cpu': cpu,
+            'thread': threading.get_ident(),
+            'attributi': self.attributi
+        }
+        if self.memoria:
+            picco = max(tracemalloc.get_traced_memory()[1], self.picco_figli)
+            record['memoria_picco'] = picco - self.memoria_iniziale
+            if self.genitore is not None:
+                self.genitore.picco_figli = max(self.genitore.picco_figli, picco)
+        self.tracciatore.span_registrati.append(record)
+        return False
+
+    @property
+    def percorso(self) -> tuple:
+        return (self.genitore.percorso if self.genitore else ()) + (self.nome,)
+
+
+class Tracciatore:
+    """
+    Registra intervalli di esecuzione (span) annidati: fase -> modello
+    (uno per fold, con il fold come attributo) -> iperparametro. Ogni span
+    misura tempo reale (perf_counter), tempo CPU del processo e, se
+    richiesto, il picco di memoria allocata (tracemalloc).
+
+    Da disattivo span() restituisce uno span vuoto condiviso e il decoratore
+    traccia chiama direttamente la funzione, quindi il costo e un solo
+    controllo di un attributo. Gli span eseguiti in altri processi (ad
+    esempio il pool di valuta_griglia con n_jobs > 1) non vengono registrati.
+    """
+
+    def __init__(self):
+        self.attivo = False
+        self.memoria = False
+        self.span_registrati = []
+        self.origine = time.perf_counter()
+        self._locale = threading.local()
+
+    def attiva(self, memoria: bool = False) -> None:
+        """
+        Azzera gli span registrati e inizia a tracciare.
+
+        Args:
+        memoria: se True misura anche il picco di memoria con tracemalloc
+        (rallenta sensibilmente il codice che alloca molti oggetti)
+        """
+        self.span_registrati = []
+        self.origine = time.perf_counter()
+        self.memoria = memoria
+        if memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.attivo = True
+
+    def disattiva(self) -> None:
+        self.attivo = False
+        if self.memoria and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.memoria = False
+
+    def _pila(self) -> list:
+        if not hasattr(self._locale, 'pila'):
+            self._locale.pila = []
+        return self._locale.pila
+
+    def span(self, nome: str, **attributi):
+        """
+        Context manager che misura il blocco di codice come span figlio
+        dello span aperto nello stesso thread.
+
+        Args:
+        nome: nome dello span (es. "fase_modelli")
+        attributi: valori aggiuntivi da registrare (es. fold=2)
+        """
+        if not self.attivo:
+            return _SPAN_NULLO
+        return _Span(self, nome, attributi)
+
+    def riassunto(self) -> list:
+        """
+        Aggrega gli span con lo stesso percorso (nomi degli span antenati).
+
+        Returns:
+        list di dict con: 'percorso', 'conteggio', 'totale', 'media', 'cpu',
+        'memoria_picco' (None senza tracemalloc), nell'ordine di prima apertura
+        """
+        gruppi = {}
+        for record in sorted(self.span_registrati, key=lambda r: r['inizio']):
+            gruppo = gruppi.setdefault(record['percorso'], {
+                'percorso': record['percorso'], 'conteggio': 0, 'totale': 0.0,
+                'cpu': 0.0, 'memoria_picco': None
+            })
+            gruppo['conteggio'] += 1
+            gruppo['totale'] += record['durata']
+            gruppo['cpu'] += record['cpu']
+            if 'memoria_picco' in record:
+                gruppo['memoria_picco'] = max(gruppo['memoria_picco'] or 0, record['memoria_picco'])
+        for gruppo in gruppi.values():
+            gruppo['media'] = gruppo['totale'] / gruppo['conteggio']
+        return list(gruppi.values())
+
+    def salva_riassunto(self, percorso: str) -> None:
+        """Scrive il riassunto degli span in un file di testo, indentato per livello."""
+        os.makedirs(os.path.dirname(percorso) or ".", exist_ok=True)
+        with open(percorso, "w", encoding="utf-8") as f:
+            f.write(f"{'span':50s} {'n':>5s} {'totale s':>10s} {'media s':>10s} {'cpu s':>10s} {'mem MB':>8s}\n")
+            f.write(crea_separatore("-", 98) + "\n")
+            for gruppo in self.riassunto():
+                nome = "  " * (len(gruppo['percorso']) - 1) + gruppo['percorso'][-1]
+                memoria = "" if gruppo['memoria_picco'] is None else f"{gruppo['memoria_picco'] / 2 ** 20:8.1f}"
+                f.write(f"{nome[:50]:50s} {gruppo['conteggio']:5d} {gruppo['totale']:10.3f} "
+                        f"{gruppo['media']:10.4f} {gruppo['cpu']:10.3f} {memoria:>8s}\n")
+
+    def esporta_chrome(self, percorso: str) -> None:
+        """
+        Esporta gli span nel formato trace-event di Chrome (eventi completi
+        "X", tempi in microsecondi), visualizzabile in chrome://tracing o Perfetto.
+        """
+        eventi = []
+        for record in self.span_registrati:
+            argomenti = {chiave: str(valore) for chiave, valore in record['attributi'].items()}
+            argomenti['cpu_ms'] = round(record['cpu'] * 1000, 3)
+            if 'memoria_picco' in record:
+                argomenti['memoria_picco_mb'] = round(record['memoria_picco'] / 2 ** 20, 3)
+            eventi.append({
+                'name': record['nome'], 'ph': 'X', 'pid': os.getpid(), 'tid': record['thread'],
+                'ts': record['inizio'] * 1e6, 'dur': record['durata'] * 1e6, 'args': argomenti
+            })
+        os.makedirs(os.path.dirname(percorso) or ".", exist_ok=True)
+        with open(percorso, "w", encoding="utf-8") as f:
+            json.dump({'traceEvents': eventi, 'displayTimeUnit': 'ms'}, f)
+
+
+# Tracciatore globale usato da traccia() e span()
+TRACCIATORE = Tracciatore()
+
+
+def span(nome: str, **attributi):
+    """Apre uno span sul tracciatore globale (vedi Tracciatore.span)."""
+    if not TRACCIATORE.attivo:
+        return _SPAN_NULLO
+    return _Span(TRACCIATORE, nome, attributi)
+
+
+def traccia(nome: str = None):
+    """
+    Decoratore che registra ogni chiamata della funzione come span del
+    tracciatore globale.
+
+    Args:
+    nome: nome dello span (default il nome della funzione)
+    """
+
+    def decoratore(func):
+        nome_span = nome or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not TRACCIATORE.attivo:
+                return func(*args, **kwargs)
+            with _Span(TRACCIATORE, nome_span, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decoratore
+
+
 def calcola_tempo_esecuzione(func):
     """
     Decoratore che misura e stampa il tempo di esecuzione
-    di una funzione . Usa datetime per il calcolo .
+    di una funzione . Usa perf_counter e registra la chiamata anche
+    come span del tracciatore globale; per misure annidate senza stampe
+    usare traccia.
 
     Args :
     func : funzione da decorare
     """
 
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        start_time = datetime.now()
-        result = func(*args, **kwargs)
-        end_time = datetime.now()
-        tempo_esecuzione = end_time - start_time
+        inizio = time.perf_counter()
+        with span(func.__name__):
+            result = func(*args, **kwargs)
+        tempo_esecuzione = timedelta(seconds=time.perf_counter() - inizio)
         print(f"Tempo di esecuzione di {func.__name__}: {tempo_esecuzione}")
         return result
 
@@ -181,6 +405,29 @@ def calcola_distanza_euclidea(punto1: list, punto2: list) -> float:
     return distanza
 
 
+def numero_processi(n_jobs: int) -> int:
+    """
+    Numero di processi da usare per un parametro n_jobs.
+
+    Args:
+    n_jobs: intero positivo, -1 per tutti i core o None per uno solo
+
+    Returns:
+    int : numero di processi (almeno 1)
+
+    Raises:
+    ValueError: se n_jobs e 0 o minore di -1
+    """
+
+    if n_jobs is None:
+        return 1
+    if n_jobs == -1:
+        return os.cpu_count() or 1
+    if n_jobs < 1:
+        raise ValueError(f"n_jobs deve essere positivo o -1 (tutti i core), non {n_jobs}")
+    return n_jobs
+
+
 # Funzione placeholder per future implementazioni
 def esporta_in_json(dati, percorso: str) -> None:
     """ Placeholder per futura implementazione ."""
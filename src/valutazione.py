@@ -1,6 +1,6 @@
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score, mean_absolute_percentage_error
 from sklearn.model_selection import cross_val_score
 import numpy as np
+from src.utils import traccia
 
 
 def cross_validation_modello(modello, X, y, cv: int = 5) -> dict:
@@ -13,6 +13,18 @@ def cross_validation_modello(modello, X, y, cv: int = 5) -> dict:
 
     scores = cross_val_score(modello, X, y, cv=cv, scoring='neg_mean_squared_error')
     mse_scores = -scores  # Convertiamo in MSE positivo
+    return riassumi_cv(mse_scores)
+
+
+def riassumi_cv(mse_scores) -> dict:
+    """
+    Riassume gli MSE dei fold di una cross-validation.
+
+    Returns:
+    dict con: ’scores’, ’media’, ’deviazione_standard’
+    """
+
+    mse_scores = np.asarray(mse_scores, dtype=np.float64)
     media_mse = np.mean(mse_scores)
     std_mse = np.std(mse_scores)
 
@@ -24,36 +36,119 @@ def cross_validation_modello(modello, X, y, cv: int = 5) -> dict:
     return risultati_cv
 
 
-def calcola_metriche(y_true, y_pred) -> dict:
-    """Calcola le principali metriche di valutazione per la regressione."""
-    mse = mean_squared_error(y_true, y_pred)
+# Colonne della matrice delle predizioni elaborate per volta in metriche_matrice
+DIMENSIONE_BLOCCO_METRICHE = 65_536
+
+METRICHE = ('MAE', 'MSE', 'RMSE', 'R2', 'MAPE')
+
+
+def metriche_matrice(y_true, predizioni, dimensione_blocco: int = DIMENSIONE_BLOCCO_METRICHE) -> dict:
+    """
+    Calcola MAE, MSE, RMSE, R2 e MAPE di piu modelli con un unico passaggio
+    vettorizzato sulla matrice delle predizioni (una riga per modello). La
+    matrice viene impilata ed elaborata a blocchi di colonne, quindi la
+    memoria aggiuntiva e modelli x dimensione_blocco anche con test set grandi.
+    Le definizioni coincidono con quelle di sklearn.metrics (R2 = 1 se il
+    target e costante e le predizioni esatte, 0 altrimenti; MAPE con
+    denominatore max(|y|, eps)).
+
+    Args:
+    y_true: valori reali (n)
+    predizioni: array (modelli x n) oppure lista di array di lunghezza n
+    dimensione_blocco: colonne elaborate per volta
+
+    Returns:
+    dict {metrica: np.ndarray con un valore per modello}
+
+    Raises:
+    ValueError: se le predizioni non hanno la lunghezza di y_true
+    """
+    y = np.asarray(y_true, dtype=np.float64).ravel()
+    righe = [np.asarray(p, dtype=np.float64).ravel() for p in predizioni]
+    n = len(y)
+    if any(len(p) != n for p in righe):
+        raise ValueError(f"Le predizioni devono avere {n} valori, come y_true")
+
+    n_modelli = len(righe)
+    somma_assoluti = np.zeros(n_modelli)
+    somma_quadrati = np.zeros(n_modelli)
+    somma_percentuali = np.zeros(n_modelli)
+    for inizio in range(0, n, dimensione_blocco):
+        fine = min(inizio + dimensione_blocco, n)
+        y_blocco = y[inizio:fine]
+        errori = np.stack([p[inizio:fine] for p in righe])
+        errori -= y_blocco
+        np.abs(errori, out=errori)
+        somma_assoluti += errori.sum(axis=1)
+        somma_percentuali += (errori / np.maximum(np.abs(y_blocco), np.finfo(np.float64).eps)).sum(axis=1)
+        errori *= errori
+        somma_quadrati += errori.sum(axis=1)
+
+    mse = somma_quadrati / n
+    totale = np.sum((y - y.mean()) ** 2)
+    if totale > 0:
+        r2 = 1 - somma_quadrati / totale
+    else:
+        r2 = np.where(somma_quadrati == 0, 1.0, 0.0)
     return {
-        'MAE': mean_absolute_error(y_true, y_pred),
+        'MAE': somma_assoluti / n,
         'MSE': mse,
         'RMSE': np.sqrt(mse),
-        'R2': r2_score(y_true, y_pred),
-        'MAPE': mean_absolute_percentage_error(y_true, y_pred)
+        'R2': r2,
+        'MAPE': somma_percentuali / n
     }
 
 
-def confronta_modelli(risultati: dict, y_test) -> str:
-    """Determina il modello migliore basandosi sul punteggio R2 più alto."""
+def calcola_metriche(y_true, y_pred) -> dict:
+    """Calcola le principali metriche di valutazione per la regressione."""
+    metriche = metriche_matrice(y_true, [y_pred])
+    return {nome: float(valori[0]) for nome, valori in metriche.items()}
+
+
+def metriche_modelli(risultati: dict, y_test) -> dict:
+    """
+    Metriche di tutti i modelli di risultati (vedi addestra_tutti_i_modelli),
+    calcolate insieme con metriche_matrice. Il risultato si puo passare a
+    confronta_modelli e genera_report_modelli per non ricalcolarlo.
+
+    Returns:
+    dict {nome modello: dict con 'MAE', 'MSE', 'RMSE', 'R2', 'MAPE'}
+    """
+    nomi = list(risultati)
+    matrice = metriche_matrice(y_test, [dati['predizioni'] for dati in risultati.values()])
+    metriche = {nome: {metrica: float(matrice[metrica][i]) for metrica in METRICHE}
+                for i, nome in enumerate(nomi)}
+    return metriche
+
+
+def confronta_modelli(risultati: dict, y_test, metriche: dict = None) -> str:
+    """
+    Determina il modello migliore basandosi sul punteggio R2 più alto.
+    metriche, se gia calcolate con metriche_modelli, evita di ricalcolarle.
+    """
     miglior_score = -float('inf')
     miglior_nome = ""
+    if metriche is None:
+        metriche = metriche_modelli(risultati, y_test)
 
-    for nome, dati in risultati.items():
-        metriche = calcola_metriche(y_test, dati['predizioni'])
+    for nome, metriche_modello in metriche.items():
         # Usiamo l'R2 come discriminante (più è vicino a 1, meglio è)
-        if metriche['R2'] > miglior_score:
-            miglior_score = metriche['R2']
+        if metriche_modello['R2'] > miglior_score:
+            miglior_score = metriche_modello['R2']
             miglior_nome = nome
 
     return miglior_nome
 
 
-def genera_report_modelli(risultati: dict, y_test, percorso_output: str) -> None:
-    """Genera un file di testo con il confronto dettagliato e il verdetto finale."""
-    migliore = confronta_modelli(risultati, y_test)
+@traccia()
+def genera_report_modelli(risultati: dict, y_test, percorso_output: str, metriche: dict = None) -> None:
+    """
+    Genera un file di testo con il confronto dettagliato e il verdetto finale.
+    metriche, se gia calcolate con metriche_modelli, evita di ricalcolarle.
+    """
+    if metriche is None:
+        metriche = metriche_modelli(risultati, y_test)
+    migliore = confronta_modelli(risultati, y_test, metriche)
 
     with open(percorso_output, 'w', encoding='utf-8') as f:
         f.write("==============================================\n")
@@ -61,13 +156,17 @@ def genera_report_modelli(risultati: dict, y_test, percorso_output: str) -> None
         f.write("==============================================\n\n")
 
         for nome, dati in risultati.items():
-            m = calcola_metriche(y_test, dati['predizioni'])
+            m = metriche[nome]
 
             f.write(f"--- MODELLO: {nome} ---\n")
             # Se presente, riportiamo il parametro ottimale trovato
             if 'miglior_k' in dati: f.write(f"Parametro scelto: k={dati['miglior_k']}\n")
             if 'miglior_profondita' in dati: f.write(f"Parametro scelto: depth={dati['miglior_profondita']}\n")
             if 'miglior_kernel' in dati: f.write(f"Parametro scelto: kernel={dati['miglior_kernel']}\n")
+            if 'miglior_C' in dati: f.write(f"Parametro scelto: C={dati['miglior_C']}\n")
+            if 'tempo_addestramento' in dati: f.write(f"Tempo addestramento: {dati['tempo_addestramento']:.2f} s\n")
+            if 'cv_stats' in dati:
+                f.write(f"MSE CV: {dati['cv_stats']['media']:.4f} (+/- {dati['cv_stats']['deviazione_standard']:.4f})\n")
 
             f.write(f"MAE:  {m['MAE']:.4f}\n")
             f.write(f"MSE:  {m['MSE']:.4f}\n")
@@ -76,6 +175,19 @@ def genera_report_modelli(risultati: dict, y_test, percorso_output: str) -> None
             f.write(f"MAPE: {m['MAPE']:.2%}\n")
             f.write("-" * 30 + "\n\n")
 
+        if 'SVR' in risultati and 'SVR approssimato' in risultati:
+            esatto = metriche['SVR']
+            approssimato = metriche['SVR approssimato']
+            accelerazione = (risultati['SVR']['tempo_addestramento']
+                             / risultati['SVR approssimato']['tempo_addestramento'])
+            f.write("--- CONFRONTO SVR ESATTO / APPROSSIMATO ---\n")
+            f.write(f"R2 esatto:        {esatto['R2']:.4f}\n")
+            f.write(f"R2 approssimato:  {approssimato['R2']:.4f}\n")
+            f.write(f"Perdita di R2:    {esatto['R2'] - approssimato['R2']:+.4f}\n")
+            f.write(f"RMSE esatto / approssimato: {esatto['RMSE']:.4f} / {approssimato['RMSE']:.4f}\n")
+            f.write(f"Accelerazione addestramento: {accelerazione:.1f}x\n")
+            f.write("-" * 30 + "\n\n")
+
         f.write("==============================================\n")
         f.write(f" RACCOMANDAZIONE FINALE: {migliore.upper()} \n")
         f.write("==============================================\n")
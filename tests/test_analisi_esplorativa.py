@@ -0,0 +1,290 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.analisi_esplorativa import (
+    statistiche_descrittive, statistiche_descrittive_a_blocchi,
+    AccumulatoreMomenti, coppie_correlate,
+    coppie_correlate_a_blocchi, CampioneQuantili, StatoReport,
+    aggiorna_report_testuale, sketch_feature_store,
+    batteria_normalita, analisi_distribuzione, genera_report_testuale,
+)
+from scipy import stats
+from src.data_loader import salva_feature_store
+
+
+class TestStatisticheABlocchi(unittest.TestCase):
+
+    def setUp(self):
+        """Crea un CSV temporaneo con valori casuali e alcuni nulli."""
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({
+            'A': rng.normal(5, 2, 500),
+            'B': rng.exponential(3, 500),
+            'C': rng.integers(0, 10, 500).astype(float)
+        })
+        self.df.loc[[3, 50, 400], 'B'] = np.nan
+        self.cartella = tempfile.TemporaryDirectory()
+        self.percorso = os.path.join(self.cartella.name, "dati.csv")
+        self.df.to_csv(self.percorso, index=False)
+
+    def tearDown(self):
+        self.cartella.cleanup()
+
+    def test_stessa_forma_e_valori(self):
+        """Verifica che la modalita a blocchi coincida con quella in memoria."""
+        attese = statistiche_descrittive(pd.read_csv(self.percorso))
+        ottenute = statistiche_descrittive_a_blocchi(self.percorso, dimensione_blocco=64)
+
+        self.assertEqual(list(attese.keys()), list(ottenute.keys()))
+        for colonna in attese:
+            self.assertEqual(list(attese[colonna].keys()), list(ottenute[colonna].keys()))
+            for nome, valore in attese[colonna].items():
+                self.assertAlmostEqual(valore, ottenute[colonna][nome], places=9, msg=f"{colonna}.{nome}")
+
+    def test_campione_limitato(self):
+        """Verifica che con un campione ridotto le statistiche d'ordine restino plausibili."""
+        ottenute = statistiche_descrittive_a_blocchi(self.percorso, dimensione_blocco=64, dimensione_campione=100)
+        self.assertAlmostEqual(ottenute['A']['media'], self.df['A'].mean(), places=9)
+        self.assertLess(abs(ottenute['A']['mediana'] - self.df['A'].median()), 1.0)
+
+    def test_sketch_quantili(self):
+        """Verifica che con lo sketch KLL i quartili restino entro l'errore di rango."""
+        ottenute = statistiche_descrittive_a_blocchi(self.percorso, dimensione_blocco=64, errore_quantili=0.05)
+        valori = np.sort(self.df['A'].to_numpy())
+        rango = np.searchsorted(valori, ottenute['A']['mediana']) / len(valori)
+
+        self.assertAlmostEqual(ottenute['A']['media'], self.df['A'].mean(), places=9)
+        self.assertLessEqual(abs(rango - 0.5), 0.05)
+
+    def test_sketch_feature_store_parallelo(self):
+        """Verifica che gli sketch calcolati in parallelo e uniti diano gli stessi limiti in sequenza."""
+        cartella = os.path.join(self.cartella.name, "store")
+        salva_feature_store(self.df, cartella, compatta=False)
+
+        sequenziale = sketch_feature_store(cartella, ['A', 'C'], dimensione_blocco=100)
+        parallelo = sketch_feature_store(cartella, ['A', 'C'], dimensione_blocco=100, n_jobs=2)
+
+        np.testing.assert_allclose(sequenziale.limiti_iqr(), parallelo.limiti_iqr())
+        self.assertEqual(sequenziale.statistiche()['conteggio'].tolist(), [500, 500])
+        with self.assertRaises(ValueError):
+            sketch_feature_store(cartella, ['A', 'C'], n_jobs=0)
+
+    def test_file_inesistente(self):
+        """Verifica che un file inesistente restituisca un dizionario vuoto."""
+        self.assertEqual(statistiche_descrittive_a_blocchi(os.path.join(self.cartella.name, "manca.csv")), {})
+
+
+class TestStatoReport(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.df = pd.DataFrame({
+            'A': rng.normal(5, 2, 600),
+            'B': rng.exponential(3, 600),
+        })
+        self.df['C'] = 2 * self.df['A'] + rng.normal(0, 0.5, 600)
+        self.df.loc[[7, 300], 'B'] = np.nan
+        self.cartella = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.cartella.cleanup()
+
+    def _confronta(self, stato):
+        attese = statistiche_descrittive(self.df)
+        ottenute = stato.statistiche()
+        for colonna in attese:
+            for nome in ('media', 'deviazione_standard', 'minimo', 'massimo', 'mediana', 'Q1', 'Q3'):
+                self.assertAlmostEqual(attese[colonna][nome], ottenute[colonna][nome], places=9,
+                                       msg=f"{colonna}.{nome}")
+        np.testing.assert_allclose(stato.correlazione().to_numpy(), self.df.dropna().corr().to_numpy(),
+                                   atol=1e-12)
+
+    def test_aggiornamenti_a_lotti(self):
+        """Verifica che aggiornare lo stato lotto per lotto dia le statistiche dell'intero dataset."""
+        stato = StatoReport(self.df.columns)
+        for lotto in (self.df.iloc[:100], self.df.iloc[100:450], self.df.iloc[450:]):
+            stato.aggiorna(lotto)
+
+        self.assertEqual(stato.n_campioni, 600)
+        self._confronta(stato)
+
+    def test_unione_di_stati(self):
+        """Verifica che unire gli stati di due porzioni equivalga a un solo stato."""
+        stato, altro = StatoReport(self.df.columns), StatoReport(self.df.columns)
+        stato.aggiorna(self.df.iloc[:250])
+        altro.aggiorna(self.df.iloc[250:])
+        stato.unisci(altro)
+
+        self._confronta(stato)
+
+    def test_aggiorna_report_persistente(self):
+        """Verifica che il report incrementale riprenda lo stato salvato a ogni lotto."""
+        percorso_stato = os.path.join(self.cartella.name, "stato.pkl")
+        percorso_report = os.path.join(self.cartella.name, "report.txt")
+        for i, lotto in enumerate((self.df.iloc[:300], self.df.iloc[300:])):
+            percorso_lotto = os.path.join(self.cartella.name, f"lotto{i}.csv")
+            lotto.to_csv(percorso_lotto, index=False)
+            aggiorna_report_testuale(percorso_lotto, percorso_stato, percorso_report)
+
+        self.assertEqual(StatoReport.carica(percorso_stato).n_campioni, 600)
+        with open(percorso_report, encoding="utf-8") as f:
+            self.assertIn("Numero di campioni: 600", f.read())
+
+    def test_lotto_inesistente(self):
+        """Verifica che senza lotto non vengano salvati stato e report, anche con lo storico."""
+        storico = os.path.join(self.cartella.name, "storico.csv")
+        percorso_stato = os.path.join(self.cartella.name, "stato.pkl")
+        percorso_report = os.path.join(self.cartella.name, "report.txt")
+        self.df.to_csv(storico, index=False)
+
+        stato = aggiorna_report_testuale(os.path.join(self.cartella.name, "manca.csv"), percorso_stato,
+                                         percorso_report, percorso_iniziale=storico)
+
+        self.assertIsNone(stato)
+        self.assertFalse(os.path.exists(percorso_stato))
+        self.assertFalse(os.path.exists(percorso_report))
+
+    def test_lotto_senza_colonne(self):
+        """Verifica che un lotto senza le colonne dello stato sollevi KeyError."""
+        stato = StatoReport(self.df.columns)
+        with self.assertRaises(KeyError):
+            stato.aggiorna(self.df[['A', 'B']])
+
+    def test_unione_campioni_limitati(self):
+        """Verifica che l'unione di due campioni pieni resti della dimensione massima."""
+        campione, altro = CampioneQuantili(1, dimensione=50), CampioneQuantili(1, dimensione=50, seed=1)
+        campione.aggiorna(np.zeros((400, 1)))
+        altro.aggiorna(np.ones((100, 1)))
+        campione.unisci(altro)
+
+        self.assertEqual(campione.visti, 500)
+        self.assertEqual(len(campione.campione), 50)
+        self.assertLess(campione.campione.mean(), 0.5)
+
+
+class TestBatteriaNormalita(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        self.df = pd.DataFrame({
+            'normale': rng.normal(size=3000),
+            'esponenziale': rng.exponential(size=3000),
+            'testo': ['x'] * 3000
+        })
+
+    def test_coincide_con_scipy(self):
+        """Verifica statistiche e p-value contro scipy.stats (campione = tutte le righe)."""
+        risultati = batteria_normalita(self.df)
+
+        self.assertEqual(list(risultati), ['normale', 'esponenziale'])
+        for colonna, r in risultati.items():
+            x = self.df[colonna].to_numpy()
+            self.assertAlmostEqual(r['k2_statistic'], stats.normaltest(x).statistic, places=8)
+            self.assertAlmostEqual(r['jb_statistic'], stats.jarque_bera(x).statistic, places=8)
+            self.assertAlmostEqual(r['shapiro_statistic'], stats.shapiro(x).statistic, places=10)
+            self.assertAlmostEqual(r['ad_statistic'], stats.anderson(x, method='interpolate').statistic, places=8)
+        self.assertTrue(risultati['normale']['normale'])
+        self.assertFalse(risultati['esponenziale']['normale'])
+
+    def test_momenti_condivisi_e_campione(self):
+        """Verifica che i momenti di statistiche_descrittive diano lo stesso risultato e che il campione sia limitato."""
+        numeriche = self.df[['normale', 'esponenziale']]
+        condivisi = batteria_normalita(numeriche, statistiche=statistiche_descrittive(numeriche),
+                                       dimensione_campione=500)
+        propri = batteria_normalita(numeriche, dimensione_campione=500)
+
+        self.assertEqual(condivisi['normale']['n_campione'], 500)
+        for colonna in condivisi:
+            for nome, valore in condivisi[colonna].items():
+                self.assertAlmostEqual(valore, propri[colonna][nome], places=9, msg=f"{colonna}.{nome}")
+
+    def test_colonna_corta(self):
+        """Verifica che con meno di 20 valori restino solo Shapiro-Wilk e, da 8 valori, Anderson-Darling."""
+        risultato = analisi_distribuzione(self.df.iloc[:10], 'normale')
+        x = self.df['normale'].to_numpy()[:10]
+
+        self.assertTrue(np.isnan(risultato['k2_pvalue']))
+        self.assertTrue(np.isnan(risultato['jb_pvalue']))
+        self.assertAlmostEqual(risultato['shapiro_statistic'], stats.shapiro(x).statistic, places=10)
+        self.assertAlmostEqual(risultato['ad_statistic'], stats.anderson(x, method='interpolate').statistic, places=8)
+        self.assertTrue(risultato['normale'])
+
+        piccola = analisi_distribuzione(self.df.iloc[:5], 'normale')
+        self.assertTrue(np.isnan(piccola['ad_pvalue']))
+        self.assertFalse(np.isnan(piccola['shapiro_pvalue']))
+
+        minima = analisi_distribuzione(self.df.iloc[:2], 'normale')
+        self.assertTrue(np.isnan(minima['shapiro_pvalue']))
+        self.assertFalse(minima['normale'])
+
+    def test_sezione_nel_report(self):
+        """Verifica che il report testuale contenga la sezione dei test di normalita."""
+        with tempfile.TemporaryDirectory() as cartella:
+            percorso = os.path.join(cartella, "report.txt")
+            genera_report_testuale(self.df[['normale', 'esponenziale']], percorso)
+            with open(percorso, encoding="utf-8") as f:
+                testo = f.read()
+
+        self.assertIn("TEST DI NORMALITA", testo)
+        self.assertIn("esponenziale", testo.split("TEST DI NORMALITA")[1])
+
+
+class TestAccumulatoreMomenti(unittest.TestCase):
+
+    def test_unione_equivale_a_un_solo_blocco(self):
+        """Verifica che unire due accumulatori dia gli stessi momenti di un unico passaggio."""
+        rng = np.random.default_rng(1)
+        X = rng.gamma(2.0, 1.5, size=(300, 2))
+
+        totale = AccumulatoreMomenti(['x', 'y'])
+        totale.aggiorna(X)
+        primo, secondo = AccumulatoreMomenti(['x', 'y']), AccumulatoreMomenti(['x', 'y'])
+        primo.aggiorna(X[:120])
+        secondo.aggiorna(X[120:])
+        primo.unisci(secondo)
+
+        for attributo in ('n', 'media', 'M2', 'M3', 'M4', 'minimo', 'massimo'):
+            np.testing.assert_allclose(getattr(primo, attributo), getattr(totale, attributo), rtol=1e-10)
+
+
+class TestCoppieCorrelate(unittest.TestCase):
+
+    def setUp(self):
+        """Crea un DataFrame con due coppie di colonne fortemente correlate."""
+        rng = np.random.default_rng(2)
+        base = rng.normal(size=(400, 2))
+        self.df = pd.DataFrame({
+            'A': base[:, 0],
+            'B': rng.normal(size=400),
+            'C': base[:, 0] + 0.1 * rng.normal(size=400),
+            'D': -base[:, 1],
+            'E': base[:, 1] + 0.1 * rng.normal(size=400)
+        })
+
+    def test_coppie_dalla_matrice(self):
+        """Verifica che vengano trovate solo le coppie con |r| > 0.7, nell'ordine della matrice."""
+        coppie = coppie_correlate(self.df.corr())
+        self.assertEqual([(a, b) for a, b, _ in coppie], [('A', 'C'), ('D', 'E')])
+        self.assertLess(coppie[1][2], -0.7)
+
+    def test_blocchi_come_matrice_completa(self):
+        """Verifica che la modalita a blocchi dia le stesse coppie della matrice completa."""
+        attese = coppie_correlate(self.df.corr())
+        ottenute = coppie_correlate_a_blocchi(self.df, dimensione_blocco=2)
+        self.assertEqual([c[:2] for c in attese], [c[:2] for c in ottenute])
+        for (_, _, r1), (_, _, r2) in zip(attese, ottenute):
+            self.assertAlmostEqual(r1, r2, places=10)
+
+    def test_blocchi_con_nulli(self):
+        """Verifica che la modalita a blocchi rifiuti dati con valori nulli."""
+        self.df.loc[0, 'A'] = np.nan
+        with self.assertRaises(ValueError):
+            coppie_correlate_a_blocchi(self.df)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_pipeline import dataset_scalato, confronta_benchmark, esegui_benchmark
+
+
+def _esecuzione(*misure):
+    return {'metadati': {}, 'risultati': [
+        {'fase': fase, 'fattore': fattore, 'wall_s': wall, 'rss_picco_mb': rss}
+        for fase, fattore, wall, rss in misure
+    ]}
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_dataset_scalato(self):
+        """Verifica dimensione, prima copia invariata e assenza di duplicati esatti."""
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({'a': rng.lognormal(size=50), 'b': rng.normal(size=50)})
+        scalato = dataset_scalato(df, 10)
+
+        self.assertEqual(len(scalato), 500)
+        np.testing.assert_array_equal(scalato.iloc[:50].to_numpy(), df.to_numpy())
+        self.assertFalse(scalato.duplicated().any())
+
+    def test_confronta_regressioni(self):
+        """Verifica che vengano segnalate solo le variazioni oltre soglia e sopra il tempo minimo."""
+        baseline = _esecuzione(('knn', 1, 1.0, 100.0), ('lr', 1, 0.01, 100.0), ('dt', 1, 2.0, 100.0))
+        corrente = _esecuzione(('knn', 1, 1.5, 100.0), ('lr', 1, 0.03, 100.0), ('dt', 1, 2.1, 200.0))
+
+        regressioni = confronta_benchmark(baseline, corrente, soglia=0.25)
+
+        self.assertEqual({(r['fase'], r['metrica']) for r in regressioni},
+                         {('knn', 'wall_s'), ('dt', 'rss_picco_mb')})
+
+
+    def test_fase_fallita(self):
+        """Verifica che una fase che fallisce nel processo figlio venga registrata senza bloccare il benchmark."""
+        with tempfile.TemporaryDirectory() as cartella:
+            risultati = esegui_benchmark(['statistiche_descrittive'], [1], os.path.join(cartella, "manca.csv"),
+                                         timeout=120)['risultati']
+
+        self.assertEqual(len(risultati), 1)
+        self.assertTrue(risultati[0]['fallita'])
+        self.assertIn("codice di uscita", risultati[0]['errore'])
+
+        baseline = _esecuzione(('statistiche_descrittive', 1, 1.0, 100.0))
+        self.assertEqual(confronta_benchmark(baseline, {'metadati': {}, 'risultati': risultati}), [])
+        self.assertEqual(confronta_benchmark({'metadati': {}, 'risultati': risultati}, baseline), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
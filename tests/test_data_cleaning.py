@@ -1,9 +1,18 @@
+import os
+import tempfile
 import unittest
+import warnings
+import numpy as np
 import pandas as pd
 
 from src.data_cleaning import (
     info_dataset, gestisci_valori_nulli,
     rileva_outlier, normalizza_colonne,
+    statistiche_ordine, maschera_outlier,
+    conta_outlier, righe_con_outlier,
+    Normalizzatore, valori_riempimento,
+    SketchKLL, SketchQuantili, k_per_errore,
+    moda_colonne,
 )
 
 
@@ -86,6 +95,12 @@ class TestGestisciValoriNulli(unittest.TestCase):
         df_risultato = gestisci_valori_nulli(df_pieno, strategia="media")
         pd.testing.assert_frame_equal(df_pieno, df_risultato)
 
+    def test_valori_riempimento(self):
+        """ Verifica che i valori salvati siano quelli usati da gestisci_valori_nulli . """
+        valori = valori_riempimento(self.df, strategia="media")
+        pd.testing.assert_frame_equal(self.df.fillna(valori), gestisci_valori_nulli(self.df, strategia="media"))
+        self.assertIsNone(valori_riempimento(self.df, strategia="elimina"))
+
 
 class TestRilevaOutlier(unittest.TestCase):
 
@@ -102,6 +117,202 @@ class TestRilevaOutlier(unittest.TestCase):
         with self.assertRaises(KeyError):
             rileva_outlier(df, 'colonna_fantasma', metodo="iqr")
 
+    def test_quartili_precalcolati(self):
+        """ Verifica che i quartili passati dall'esterno diano lo stesso risultato. """
+        df = pd.DataFrame({'prezzi': [1, 2, 3, 4, 5, 100]})
+        quartili = (df['prezzi'].quantile(0.25), df['prezzi'].quantile(0.75))
+        self.assertEqual(rileva_outlier(df, 'prezzi', quartili=quartili), [5])
+
+
+class TestMascheraOutlier(unittest.TestCase):
+
+    def setUp(self):
+        """ Crea un DataFrame con outlier in colonne e righe diverse. """
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({
+            'A': rng.normal(size=200),
+            'B': rng.normal(size=200),
+            'C': rng.normal(size=200)
+        })
+        self.df.loc[5, 'A'] = 50.0
+        self.df.loc[7, 'B'] = -40.0
+        self.df.loc[7, 'C'] = 30.0
+
+    def test_forma_maschera(self):
+        """ Verifica che la maschera abbia una riga per campione e una colonna per feature. """
+        maschera = maschera_outlier(self.df)
+        self.assertEqual(maschera.shape, (200, 3))
+        self.assertTrue(maschera.loc[5, 'A'])
+
+    def test_coerente_con_rileva_outlier(self):
+        """ Verifica che la maschera coincida con rileva_outlier per entrambi i metodi. """
+        for metodo in ("iqr", "zscore"):
+            maschera = maschera_outlier(self.df, metodo=metodo)
+            for colonna in self.df.columns:
+                attesi = rileva_outlier(self.df, colonna, metodo=metodo)
+                self.assertEqual(self.df.index[maschera[colonna]].tolist(), attesi)
+
+    def test_conteggi_e_righe(self):
+        """ Verifica le riduzioni per colonna (conteggi) e per riga (almeno un outlier). """
+        conteggi = conta_outlier(self.df, metodo="zscore")
+        self.assertEqual(conteggi, {'A': 1, 'B': 1, 'C': 1})
+        righe = righe_con_outlier(self.df, metodo="zscore")
+        self.assertEqual(self.df.index[righe].tolist(), [5, 7])
+
+    def test_metodo_invalido(self):
+        """ Verifica che un metodo non supportato sollevi ValueError. """
+        with self.assertRaises(ValueError):
+            maschera_outlier(self.df, metodo="invalido")
+
+
+class TestModaColonne(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.matrice = np.column_stack([
+            rng.integers(0, 20, 50_000).astype(float),
+            rng.choice([0.5, 1.5, 2.25], size=50_000, p=[0.2, 0.5, 0.3]),
+            rng.normal(3.0, 2.0, 50_000),
+            rng.lognormal(0.0, 0.5, 50_000)
+        ])
+        self.matrice[::97, 0] = np.nan
+
+    def test_colonne_discrete_esatte(self):
+        """ Verifica la moda esatta di colonne intere (bincount) e discrete non intere (hash). """
+        mode = moda_colonne(self.matrice)
+        valori, conteggi = np.unique(self.matrice[~np.isnan(self.matrice[:, 0]), 0], return_counts=True)
+
+        self.assertEqual(mode[0], valori[np.argmax(conteggi)])
+        self.assertEqual(mode[1], 1.5)
+
+    def test_colonne_continue(self):
+        """ Verifica che per le colonne continue la moda sia vicina al picco della densita. """
+        mode = moda_colonne(self.matrice)
+
+        self.assertAlmostEqual(mode[2], 3.0, delta=0.3)
+        self.assertAlmostEqual(mode[3], np.exp(-0.25), delta=0.1)
+
+    def test_coerente_con_statistiche_ordine(self):
+        """ Verifica che la moda di statistiche_ordine (colonne ordinate) coincida con moda_colonne. """
+        np.testing.assert_allclose(statistiche_ordine(self.matrice)['moda'], moda_colonne(self.matrice))
+
+    def test_colonna_vuota(self):
+        """ Verifica che una colonna di soli NaN abbia moda NaN. """
+        self.assertTrue(np.isnan(moda_colonne(np.full(5, np.nan))[0]))
+
+    def test_colonne_piccole_e_costanti(self):
+        """ Verifica la moda esatta sulle colonne piccole o costanti non intere, senza avvisi. """
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            self.assertEqual(moda_colonne(np.array([0.5] * 4 + [1.5]))[0], 0.5)
+            self.assertEqual(moda_colonne(np.array([2.5]))[0], 2.5)
+            self.assertEqual(statistiche_ordine(np.full((3, 1), 2.5))['moda'][0], 2.5)
+
+    def test_valori_infiniti(self):
+        """ Verifica che i valori infiniti non alterino la moda di una colonna continua. """
+        colonna = self.matrice[:, 2].copy()
+        colonna[:5] = np.inf
+        colonna[5:8] = -np.inf
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            self.assertAlmostEqual(moda_colonne(colonna)[0], 3.0, delta=0.3)
+
+
+class TestSketchKLL(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.valori = rng.lognormal(size=200_000)
+        self.ordinati = np.sort(self.valori)
+        self.q = np.array([0.25, 0.5, 0.75])
+
+    def _errore_rango(self, sketch):
+        stimati = sketch.quantili(self.q)
+        return np.max(np.abs(np.searchsorted(self.ordinati, stimati) / len(self.valori) - self.q))
+
+    def test_esatto_senza_compressione(self):
+        """ Verifica che con pochi valori i quantili coincidano con np.percentile. """
+        sketch = SketchKLL(0.01)
+        sketch.aggiorna(self.valori[:150])
+        np.testing.assert_allclose(sketch.quantili([0, 0.25, 0.5, 0.75, 1]),
+                                   np.percentile(self.valori[:150], [0, 25, 50, 75, 100]))
+
+    def test_errore_di_rango_e_memoria(self):
+        """ Verifica l'errore di rango entro il limite e la memoria limitata su dati a blocchi. """
+        sketch = SketchKLL(0.01)
+        for blocco in np.array_split(self.valori, 17):
+            sketch.aggiorna(blocco)
+
+        self.assertLessEqual(self._errore_rango(sketch), sketch.errore)
+        self.assertLess(sum(len(livello) for livello in sketch.livelli), 4 * sketch.k)
+        self.assertEqual(sketch.massimo, self.valori.max())
+
+    def test_unione(self):
+        """ Verifica che unire sketch di blocchi diversi rispetti lo stesso limite di errore. """
+        parziali = [SketchKLL(0.01, seed=i) for i in range(6)]
+        for sketch, blocco in zip(parziali, np.array_split(self.valori, 6)):
+            sketch.aggiorna(blocco)
+        for sketch in parziali[1:]:
+            parziali[0].unisci(sketch)
+
+        self.assertEqual(parziali[0].n, len(self.valori))
+        self.assertLessEqual(self._errore_rango(parziali[0]), parziali[0].errore)
+
+    def test_limiti_e_outlier(self):
+        """ Verifica limiti IQR e maschera degli outlier stimati con lo sketch. """
+        df = pd.DataFrame({'x': self.valori})
+        sketch = SketchQuantili(1, 0.01)
+        sketch.aggiorna(df.to_numpy())
+        inferiore, superiore = sketch.limiti_iqr()
+        q1, q3 = np.percentile(self.valori, [25, 75])
+
+        self.assertAlmostEqual(superiore[0], q3 + 1.5 * (q3 - q1), delta=0.05)
+        esatti = maschera_outlier(df)['x'].sum()
+        stimati = maschera_outlier(df, errore_quantili=0.01)['x'].sum()
+        self.assertLess(abs(stimati - esatti) / len(df), 0.01)
+
+    def test_errore_invalido(self):
+        """ Verifica che un errore fuori da (0, 1) sollevi ValueError. """
+        with self.assertRaises(ValueError):
+            k_per_errore(0)
+
+
+class TestStatisticheOrdine(unittest.TestCase):
+
+    def setUp(self):
+        """ Crea una matrice con una colonna discreta e una con valori nulli. """
+        rng = np.random.default_rng(0)
+        self.matrice = np.column_stack([
+            rng.integers(0, 5, 101).astype(float),
+            rng.normal(size=101)
+        ])
+        self.matrice[[0, 10, 20], 1] = np.nan
+
+    def test_quantili_come_numpy(self):
+        """ Verifica che mediana, Q1, Q3, minimo e massimo coincidano con NumPy. """
+        risultato = statistiche_ordine(self.matrice)
+        for j in range(2):
+            colonna = self.matrice[:, j]
+            colonna = colonna[~np.isnan(colonna)]
+            self.assertAlmostEqual(risultato['mediana'][j], np.median(colonna))
+            self.assertAlmostEqual(risultato['Q1'][j], np.percentile(colonna, 25))
+            self.assertAlmostEqual(risultato['Q3'][j], np.percentile(colonna, 75))
+            self.assertEqual(risultato['minimo'][j], colonna.min())
+            self.assertEqual(risultato['massimo'][j], colonna.max())
+        self.assertEqual(list(risultato['conteggio']), [101, 98])
+
+    def test_moda_valore_piu_piccolo(self):
+        """ Verifica che a parita di frequenza venga scelto il valore piu piccolo. """
+        risultato = statistiche_ordine(np.array([3.0, 1.0, 3.0, 1.0, 2.0]))
+        self.assertEqual(risultato['moda'][0], 1.0)
+
+    def test_partition_senza_moda(self):
+        """ Verifica che la variante senza moda dia gli stessi quartili. """
+        completo = statistiche_ordine(self.matrice)
+        parziale = statistiche_ordine(self.matrice, moda=False)
+        self.assertNotIn('moda', parziale)
+        np.testing.assert_allclose(parziale['IQR'], completo['IQR'])
+
 
 
 class TestNormalizzaColonne(unittest.TestCase):
@@ -133,5 +344,50 @@ class TestNormalizzaColonne(unittest.TestCase):
 
 
 
+class TestNormalizzatore(unittest.TestCase):
+
+    def setUp(self):
+        """Crea un training set e un test set con le stesse colonne."""
+        self.train = pd.DataFrame({'A': [0.0, 5.0, 10.0], 'B': [1.0, 2.0, 3.0]})
+        self.test = pd.DataFrame({'A': [20.0], 'B': [2.0]})
+
+    def test_statistiche_del_fit_riusate(self):
+        """ Verifica che transform usi le statistiche del training set. """
+        normalizzatore = Normalizzatore("minmax").fit(self.train)
+        risultato = normalizzatore.transform(self.test)
+        self.assertEqual(risultato.loc[0, 'A'], 2.0)
+        self.assertEqual(risultato.loc[0, 'B'], 0.5)
+
+    def test_come_normalizza_colonne(self):
+        """ Verifica che il risultato coincida con normalizza_colonne. """
+        for metodo in ("minmax", "standard"):
+            attesa = normalizza_colonne(self.train, ['A', 'B'], metodo=metodo)
+            ottenuta = Normalizzatore(metodo).fit_transform(self.train, ['A', 'B'])
+            pd.testing.assert_frame_equal(attesa, ottenuta)
+
+    def test_in_place_float32(self):
+        """ Verifica che transform in place modifichi l'array float32 senza cambiarne il tipo. """
+        normalizzatore = Normalizzatore("standard").fit(self.train)
+        X = np.array(self.test, dtype=np.float32)
+        risultato = normalizzatore.transform(X, in_place=True)
+        self.assertIs(risultato, X)
+        self.assertEqual(X.dtype, np.float32)
+        self.assertAlmostEqual(float(X[0, 0]), 3.0, places=5)
+
+    def test_serializzazione(self):
+        """ Verifica che i parametri salvati in JSON ricostruiscano la stessa trasformazione. """
+        normalizzatore = Normalizzatore("standard").fit(self.train)
+        with tempfile.TemporaryDirectory() as cartella:
+            percorso = os.path.join(cartella, "normalizzatore.json")
+            normalizzatore.salva(percorso)
+            ricaricato = Normalizzatore.carica(percorso)
+        pd.testing.assert_frame_equal(ricaricato.transform(self.test), normalizzatore.transform(self.test))
+
+    def test_metodo_invalido(self):
+        """ Verifica che un metodo non supportato sollevi ValueError. """
+        with self.assertRaises(ValueError):
+            Normalizzatore("log")
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,169 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import (
+    carica_csv, percorso_cache,
+    chiave_artefatto, salva_artefatto, carica_artefatto,
+    salva_feature_store, csv_a_feature_store,
+)
+
+
+class TestCacheBinaria(unittest.TestCase):
+
+    def setUp(self):
+        """Crea un CSV temporaneo di test."""
+        self.cartella = tempfile.TemporaryDirectory()
+        self.percorso = os.path.join(self.cartella.name, "dati.csv")
+        self.df = pd.DataFrame({
+            'A': [1.5, 2.5, 3.5],
+            'B': [10, 20, 30],
+            'Target': [0.1, 0.2, 0.3]
+        })
+        self.df.to_csv(self.percorso, index=False)
+
+    def tearDown(self):
+        self.cartella.cleanup()
+
+    def test_cache_creata(self):
+        """Verifica che il primo caricamento generi la cache .npz."""
+        carica_csv(self.percorso)
+        self.assertTrue(os.path.exists(percorso_cache(self.percorso)))
+
+    def test_cache_equivalente_al_csv(self):
+        """Verifica che la lettura dalla cache restituisca gli stessi dati del CSV."""
+        carica_csv(self.percorso)
+        df_cache = carica_csv(self.percorso)
+        pd.testing.assert_frame_equal(df_cache, pd.read_csv(self.percorso))
+
+    def test_cache_invalidata(self):
+        """Verifica che una modifica al CSV invalidi la cache."""
+        carica_csv(self.percorso)
+        vecchia_cache = percorso_cache(self.percorso)
+        nuovo = pd.DataFrame({'A': [9.0], 'B': [9], 'Target': [9.9]})
+        nuovo.to_csv(self.percorso, index=False)
+        os.utime(self.percorso, ns=(0, 0))
+
+        df = carica_csv(self.percorso)
+        self.assertEqual(len(df), 1)
+        self.assertFalse(os.path.exists(vecchia_cache))
+
+    def test_file_inesistente(self):
+        """Verifica che un file inesistente restituisca None."""
+        self.assertIsNone(carica_csv(os.path.join(self.cartella.name, "manca.csv")))
+
+    def test_cache_di_altre_sorgenti_conservate(self):
+        """Verifica che la cache di dati.csv non rimuova quella di dati-2.csv."""
+        altro = os.path.join(self.cartella.name, "dati-2.csv")
+        self.df.to_csv(altro, index=False)
+        carica_csv(altro)
+        carica_csv(self.percorso)
+
+        self.assertTrue(os.path.exists(percorso_cache(altro)))
+        self.assertTrue(os.path.exists(percorso_cache(self.percorso)))
+
+
+class TestFeatureStore(unittest.TestCase):
+
+    def setUp(self):
+        """Crea un DataFrame e un CSV temporanei di test."""
+        self.cartella = tempfile.TemporaryDirectory()
+        self.df = pd.DataFrame({
+            'Reddito': [1.5, 2.25, 3.5, 4.75, 5.0],
+            'Eta': [10, 20, 30, 40, 50],
+            'Popolazione': [100, 40000, 300, 400, 500],
+            'Target': [0.5, 1.5, 2.5, 3.5, 4.5]
+        })
+        self.percorso = os.path.join(self.cartella.name, "dati.csv")
+        self.df.to_csv(self.percorso, index=False)
+
+    def tearDown(self):
+        self.cartella.cleanup()
+
+    def test_tipi_compatti(self):
+        """Verifica che le colonne intere usino il tipo piu stretto e le altre float32."""
+        store = salva_feature_store(self.df, os.path.join(self.cartella.name, "store"))
+        self.assertEqual(store.tipi_dati['Reddito'], np.float32)
+        self.assertEqual(store.tipi_dati['Eta'], np.int8)
+        self.assertEqual(store.tipi_dati['Popolazione'], np.int32)
+
+    def test_interi_grandi_esatti(self):
+        """Verifica che gli interi oltre int32 e quelli con nulli oltre 2**24 restino esatti."""
+        df = pd.DataFrame({'Id': [2**40 + 1, 2**40 + 3], 'Codice': [2.0**30 + 1, np.nan]})
+        store = salva_feature_store(df, os.path.join(self.cartella.name, "store"))
+
+        self.assertEqual(store.tipi_dati['Id'], np.int64)
+        self.assertEqual(store.tipi_dati['Codice'], np.float64)
+        self.assertEqual(store['Id'].tolist(), [2**40 + 1, 2**40 + 3])
+        self.assertEqual(store['Codice'][0], 2.0**30 + 1)
+
+    def test_colonne_memory_mapped(self):
+        """Verifica che le colonne siano viste np.memmap con i valori originali."""
+        store = salva_feature_store(self.df, os.path.join(self.cartella.name, "store"))
+        self.assertIsInstance(store['Eta'], np.memmap)
+        np.testing.assert_array_equal(store['Eta'], self.df['Eta'].to_numpy())
+
+    def test_matrice_righe_selezionate(self):
+        """Verifica che matrice() estragga solo le righe e le colonne richieste."""
+        store = salva_feature_store(self.df, os.path.join(self.cartella.name, "store"))
+        matrice = store.matrice([4, 0], ['Reddito', 'Eta'])
+        self.assertEqual(matrice.shape, (2, 2))
+        self.assertEqual(matrice.dtype, np.float32)
+        np.testing.assert_array_equal(matrice, [[5.0, 50], [1.5, 10]])
+
+    def test_conversione_csv_a_blocchi(self):
+        """Verifica che la conversione a blocchi produca gli stessi dati del CSV."""
+        store = csv_a_feature_store(self.percorso, os.path.join(self.cartella.name, "store"), dimensione_blocco=2)
+        self.assertEqual(len(store), 5)
+        pd.testing.assert_frame_equal(store.to_dataframe(), self.df.astype('float32'))
+
+    def test_carica_csv_memmap(self):
+        """Verifica che carica_csv(memmap=True) restituisca un feature store riutilizzabile."""
+        store = carica_csv(self.percorso, memmap=True)
+        self.assertEqual(store.colonne, list(self.df.columns))
+        self.assertEqual(carica_csv(self.percorso, memmap=True).cartella, store.cartella)
+
+    def test_store_di_altre_sorgenti_conservati(self):
+        """Verifica che aprire lo store di dati.csv non cancelli quello di dati-2.csv."""
+        altro = os.path.join(self.cartella.name, "dati-2.csv")
+        self.df.to_csv(altro, index=False)
+        store_altro = carica_csv(altro, memmap=True)
+        carica_csv(self.percorso, memmap=True)
+
+        self.assertTrue(os.path.exists(os.path.join(store_altro.cartella, "schema.json")))
+
+
+class TestArtefatti(unittest.TestCase):
+
+    def setUp(self):
+        self.cartella = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.cartella.cleanup()
+
+    def test_chiave_indipendente_dall_ordine_dei_parametri(self):
+        """Verifica che l'ordine delle chiavi dei parametri non cambi la chiave."""
+        self.assertEqual(chiave_artefatto("abc", {'a': 1, 'b': 2}), chiave_artefatto("abc", {'b': 2, 'a': 1}))
+        self.assertNotEqual(chiave_artefatto("abc", {'a': 1}), chiave_artefatto("abc", {'a': 2}))
+
+    def test_salvataggio_e_caricamento(self):
+        """Verifica che un artefatto salvato venga ricaricato solo con la stessa chiave."""
+        df = pd.DataFrame({'A': [1.0, 2.0]})
+        salva_artefatto(df, "pulizia", "chiave1", cartella=self.cartella.name)
+
+        pd.testing.assert_frame_equal(carica_artefatto("pulizia", "chiave1", cartella=self.cartella.name), df)
+        self.assertIsNone(carica_artefatto("pulizia", "chiave2", cartella=self.cartella.name))
+
+    def test_artefatto_precedente_rimosso(self):
+        """Verifica che un nuovo artefatto sostituisca quello con chiave diversa."""
+        salva_artefatto([1], "modelli", "vecchia", cartella=self.cartella.name)
+        salva_artefatto([2], "modelli", "nuova", cartella=self.cartella.name)
+        self.assertIsNone(carica_artefatto("modelli", "vecchia", cartella=self.cartella.name))
+        self.assertEqual(os.listdir(self.cartella.name), ["modelli-nuova.pkl"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import FeatureStore
+from src.generatore import GeneratoreSintetico, genera_dataset
+
+
+class TestGeneratoreSintetico(unittest.TestCase):
+
+    def setUp(self):
+        """Crea un dataset sorgente con colonne correlate, una colonna intera e coordinate."""
+        rng = np.random.default_rng(0)
+        reddito = rng.lognormal(1.0, 0.4, size=500)
+        self.df = pd.DataFrame({
+            'Reddito': reddito,
+            'Eta': rng.integers(1, 53, size=500).astype(float),
+            'Latitude': rng.choice([34.0, 37.7], size=500) + rng.normal(scale=0.05, size=500),
+            'Longitude': rng.choice([-118.2, -122.4], size=500) + rng.normal(scale=0.05, size=500),
+            'Valore': reddito * 0.8 + rng.lognormal(0.0, 0.2, size=500)
+        })
+        self.generatore = GeneratoreSintetico(self.df)
+
+    def test_struttura_preservata(self):
+        """Verifica correlazioni, intervalli e colonne intere del dataset generato."""
+        blocco = self.generatore.genera_blocco(20_000, np.random.default_rng(1))
+
+        self.assertLess((blocco.corr() - self.df.corr()).abs().max().max(), 0.05)
+        self.assertTrue((blocco.min() >= self.df.min()).all() and (blocco.max() <= self.df.max()).all())
+        self.assertTrue((blocco['Eta'] % 1 == 0).all())
+
+    def test_riproducibile(self):
+        """Verifica che lo stesso seed generi gli stessi dati."""
+        primo = pd.concat(self.generatore.blocchi(1000, dimensione_blocco=300, seed=7))
+        secondo = pd.concat(self.generatore.blocchi(1000, dimensione_blocco=300, seed=7))
+        self.assertEqual(len(primo), 1000)
+        pd.testing.assert_frame_equal(primo, secondo)
+
+    def test_nan_e_outlier(self):
+        """Verifica i tassi di NaN e outlier iniettati, escluso il target."""
+        blocco = self.generatore.genera_blocco(50_000, np.random.default_rng(2), tasso_nan=0.02, tasso_outlier=0.01)
+        self.assertAlmostEqual(blocco['Reddito'].isna().mean(), 0.02, delta=0.005)
+        self.assertEqual(blocco['Valore'].isna().sum(), 0)
+        self.assertGreater((blocco['Reddito'] > self.df['Reddito'].max()).mean(), 0.005)
+
+    def test_genera_dataset(self):
+        """Verifica la scrittura a blocchi in CSV e in feature store."""
+        with tempfile.TemporaryDirectory() as cartella:
+            sorgente = os.path.join(cartella, "sorgente.csv")
+            self.df.to_csv(sorgente, index=False)
+            percorso_csv = os.path.join(cartella, "sintetico.csv")
+            genera_dataset(percorso_csv, 2500, sorgente, dimensione_blocco=1000, tasso_nan=0.01)
+            genera_dataset(os.path.join(cartella, "store"), 2500, sorgente, formato="feature_store",
+                           dimensione_blocco=1000)
+
+            csv = pd.read_csv(percorso_csv)
+            store = FeatureStore(os.path.join(cartella, "store"))
+            self.assertEqual(csv.shape, (2500, 5))
+            self.assertGreater(csv['Reddito'].isna().sum(), 0)
+            self.assertEqual(store.righe, 2500)
+            self.assertEqual(store.colonne, list(self.df.columns))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from sklearn.neighbors import BallTree
+
+from src.data_cleaning import Normalizzatore, valori_riempimento
+from src.geospaziale import (
+    IndiceGeografico, FeatureVicinato, feature_vicinato_per_fold, RAGGIO_TERRA_KM, COLONNA_VICINATO,
+)
+from src.modelli import addestra_tutti_i_modelli, valuta_griglia, valutatori_knn, fold_cv
+from src.predizione import crea_pacchetto, salva_modello, carica_modello, leggi_metadati, predici
+
+
+def _distretti(n: int, seed: int = 0) -> pd.DataFrame:
+    """Distretti in California con un prezzo che dipende dalla posizione."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'MedInc': rng.gamma(4.0, 1.0, n),
+        'Latitude': rng.uniform(32.5, 42.0, n).round(2),
+        'Longitude': rng.uniform(-124.3, -114.3, n).round(2)
+    })
+    df['MedHouseVal'] = np.sin(df['Latitude']) + np.cos(df['Longitude']) + 0.1 * df['MedInc']
+    return df
+
+
+class TestIndiceGeografico(unittest.TestCase):
+
+    def setUp(self):
+        self.df = _distretti(2000)
+        self.indice = IndiceGeografico(self.df)
+        self.radianti = np.radians(self.df[['Latitude', 'Longitude']].to_numpy())
+
+    def test_distanza_nota(self):
+        """Verifica la distanza tra Los Angeles e San Francisco (circa 559 km)."""
+        indice = IndiceGeografico(np.array([[37.7749, -122.4194]]))
+        distanze, _ = indice.vicini(np.array([34.0522, -118.2437]), 1)
+        self.assertAlmostEqual(distanze[0, 0], 559.1, delta=1.0)
+
+    def test_vicini_come_haversine(self):
+        """Verifica distanze e vicini rispetto a un BallTree con metrica haversine."""
+        interrogati = _distretti(50, seed=1)
+        distanze, indici = self.indice.vicini(interrogati, 7)
+        attese, _ = BallTree(self.radianti, metric="haversine").query(
+            np.radians(interrogati[['Latitude', 'Longitude']].to_numpy()), k=7)
+
+        np.testing.assert_allclose(distanze, attese * RAGGIO_TERRA_KM, rtol=1e-9, atol=1e-9)
+        self.assertEqual(indici.shape, (50, 7))
+
+    def test_entro_raggio(self):
+        """Verifica la ricerca per raggio contro il calcolo esplicito di tutte le distanze."""
+        centro = np.array([36.0, -119.0])
+        trovati = self.indice.entro_raggio(centro, 80.0)[0]
+        distanze = BallTree(self.radianti, metric="haversine").query(np.radians([centro]), k=len(self.df))
+        attesi = distanze[1][0][distanze[0][0] * RAGGIO_TERRA_KM <= 80.0]
+
+        self.assertEqual(sorted(trovati), sorted(attesi))
+        with self.assertRaises(ValueError):
+            self.indice.entro_raggio(centro, -1.0)
+
+    def test_escludi_se_stessi_con_duplicati(self):
+        """Verifica che ogni punto sia escluso dai propri vicini anche con coordinate duplicate."""
+        indice = IndiceGeografico(np.array([[35.0, -120.0]] * 4 + [[35.1, -120.0]]))
+        distanze, indici = indice.vicini(None, 3, escludi_se_stessi=True)
+
+        self.assertFalse((indici == np.arange(5)[:, None]).any())
+        np.testing.assert_allclose(distanze[:4, :2], 0.0, atol=1e-9)
+
+    def test_coordinate_non_valide(self):
+        """Verifica gli errori su coordinate mancanti o fuori intervallo e su k troppo grande."""
+        with self.assertRaises(ValueError):
+            IndiceGeografico(np.array([[np.nan, -120.0]]))
+        with self.assertRaises(ValueError):
+            IndiceGeografico(np.array([[95.0, -120.0]]))
+        with self.assertRaises(KeyError):
+            IndiceGeografico(self.df.drop(columns=['Latitude']))
+        with self.assertRaises(ValueError):
+            self.indice.vicini(None, len(self.df), escludi_se_stessi=True)
+
+
+class TestFeatureVicinato(unittest.TestCase):
+
+    def setUp(self):
+        self.df = _distretti(1500)
+        self.y = self.df['MedHouseVal'].to_numpy()
+
+    def test_training_esclude_la_riga_stessa(self):
+        """Verifica che la feature di training sia la mediana dei k vicini esclusa la riga."""
+        feature = FeatureVicinato(k=5)
+        valori = feature.fit_transform(self.df, self.y)
+
+        radianti = np.radians(self.df[['Latitude', 'Longitude']].to_numpy())
+        distanze = BallTree(radianti, metric="haversine").query(radianti, k=len(self.df))
+        for i in (0, 10, 700):
+            altri = distanze[1][i][distanze[1][i] != i][:5]
+            mediana = np.median(self.y[altri])
+            self.assertAlmostEqual(valori[i], feature.normalizzatore.transform(np.array([[mediana]]))[0, 0])
+        self.assertAlmostEqual(valori.min(), 0.0)
+        self.assertAlmostEqual(valori.max(), 1.0)
+
+    def test_righe_nuove_e_mancanti(self):
+        """Verifica che le righe nuove usino tutti i distretti e che le coordinate mancanti diano NaN."""
+        feature = FeatureVicinato(k=3).fit(self.df, self.y)
+        nuove = pd.DataFrame({'Latitude': [self.df['Latitude'][0], np.nan], 'Longitude': [self.df['Longitude'][0], 1.0]})
+        valori = feature.transform(nuove)
+
+        self.assertTrue(np.isfinite(valori[0]))
+        self.assertTrue(np.isnan(valori[1]))
+
+    def test_per_fold_senza_leakage(self):
+        """Verifica che la feature di validazione di un fold non dipenda dai target di validazione."""
+        fold = fold_cv(len(self.df), 5)
+        originali = feature_vicinato_per_fold(self.df, self.y, fold, k=5)
+        y_alterato = self.y.copy()
+        y_alterato[fold[2][1]] += 100.0
+        alterati = feature_vicinato_per_fold(self.df, y_alterato, fold, k=5)
+
+        np.testing.assert_array_equal(originali[2][0], alterati[2][0])
+        np.testing.assert_array_equal(originali[2][1], alterati[2][1])
+        self.assertFalse(np.array_equal(originali[0][1], alterati[0][1]))
+
+
+class TestModelliConVicinato(unittest.TestCase):
+
+    def setUp(self):
+        df = _distretti(600)
+        self.X = df.drop(columns=['MedHouseVal'])
+        self.y = df['MedHouseVal']
+
+    def test_addestra_tutti_i_modelli(self):
+        """Verifica che la feature di vicinato migliori la CV della regressione lineare e arrivi ai modelli."""
+        X_train, X_test, y_train = self.X.iloc[:500], self.X.iloc[500:], self.y.iloc[:500]
+        normalizzatore = Normalizzatore().fit(X_train)
+        senza = addestra_tutti_i_modelli(normalizzatore.transform(X_train), y_train, normalizzatore.transform(X_test))
+        con = addestra_tutti_i_modelli(normalizzatore.transform(X_train), y_train, normalizzatore.transform(X_test),
+                                       coordinate_train=X_train, coordinate_test=X_test, k_vicinato=5)
+
+        self.assertLess(con["Linear Regression"]['cv_stats']['media'],
+                        senza["Linear Regression"]['cv_stats']['media'])
+        self.assertIn(COLONNA_VICINATO, con["KNN"]['modello'].feature_names_in_)
+        self.assertIs(con["KNN"]['vicinato'], con["SVR"]['vicinato'])
+        self.assertEqual(len(con["Decision Tree"]['cv_stats']['scores']), 5)
+        self.assertEqual(len(con["SVR"]['predizioni']), 100)
+        with self.assertRaises(ValueError):
+            addestra_tutti_i_modelli(X_train, y_train, X_test, coordinate_train=X_train)
+
+    def test_normalizzazione_della_pipeline(self):
+        """Verifica che la feature di vicinato usi il metodo di normalizzazione richiesto."""
+        X_train, X_test, y_train = self.X.iloc[:500], self.X.iloc[500:], self.y.iloc[:500]
+        normalizzatore = Normalizzatore("standard").fit(X_train)
+        risultati = addestra_tutti_i_modelli(normalizzatore.transform(X_train), y_train,
+                                             normalizzatore.transform(X_test), coordinate_train=X_train,
+                                             coordinate_test=X_test, k_vicinato=5, normalizzazione="standard")
+
+        self.assertEqual(risultati["KNN"]['vicinato'].normalizzatore.metodo, "standard")
+
+    def test_feature_fold_invalide(self):
+        """Verifica l'errore se feature_fold non ha una voce per fold."""
+        with self.assertRaises(ValueError):
+            valuta_griglia(valutatori_knn([3]), self.X, self.y, cv=5, feature_fold=[])
+
+    def test_pacchetto_con_vicinato(self):
+        """Verifica salvataggio, metadati e predizione di un modello che usa la feature di vicinato."""
+        normalizzatore = Normalizzatore().fit(self.X)
+        vicinato = FeatureVicinato(k=5)
+        X = normalizzatore.transform(self.X).assign(**{COLONNA_VICINATO: vicinato.fit_transform(self.X, self.y)})
+        modello = LinearRegression().fit(X, self.y)
+        pacchetto = crea_pacchetto("Linear Regression", modello, list(self.X.columns), 'MedHouseVal',
+                                   normalizzatore, valori_riempimento(self.X), {'R2': 1.0}, vicinato=vicinato)
+
+        with tempfile.TemporaryDirectory() as cartella:
+            percorso = os.path.join(cartella, "modello.pkl")
+            salva_modello(pacchetto, percorso)
+            caricato = carica_modello(percorso)
+            self.assertEqual(leggi_metadati(percorso)['vicinato'], {'k': 5, 'colonne': ['Latitude', 'Longitude']})
+
+        nuovi = self.X.iloc[:20].copy()
+        nuovi.loc[0, 'Latitude'] = np.nan
+        riempiti = nuovi.fillna(self.X.mean())
+        atteso = modello.predict(normalizzatore.transform(riempiti).assign(
+            **{COLONNA_VICINATO: vicinato.transform(riempiti)}))
+        np.testing.assert_allclose(predici(caricato, nuovi), atteso)
+
+
+if __name__ == '__main__':
+    unittest.main()
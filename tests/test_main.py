@@ -0,0 +1,70 @@
+import os
+import subprocess
+import sys
+import time
+import unittest
+
+import main
+
+RADICE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _esegui(*argomenti):
+    return subprocess.run([sys.executable, *argomenti], cwd=RADICE, capture_output=True, text=True)
+
+
+class TestAvvio(unittest.TestCase):
+
+    def test_import_leggero(self):
+        """Verifica che importare main non carichi pandas, scikit-learn o scipy."""
+        risultato = _esegui("-c", "import sys, main; "
+                            "print(','.join(m for m in ('pandas', 'sklearn', 'scipy') if m in sys.modules))")
+
+        self.assertEqual(risultato.returncode, 0, risultato.stderr)
+        self.assertEqual(risultato.stdout.strip(), "")
+
+    def test_help_rapido(self):
+        """Verifica che --help risponda senza importare le dipendenze pesanti."""
+        inizio = time.perf_counter()
+        risultato = _esegui("main.py", "--help")
+        durata = time.perf_counter() - inizio
+
+        self.assertEqual(risultato.returncode, 0, risultato.stderr)
+        self.assertIn("--fase", risultato.stdout)
+        # Soglia larga: l'import di pandas e scikit-learn da solo supera il secondo
+        self.assertLess(durata, 1.0)
+
+    def test_fase_sconosciuta(self):
+        """Verifica che una fase non valida venga segnalata senza eseguire la pipeline."""
+        risultato = _esegui("main.py", "--fase", "inesistente")
+
+        self.assertIn("non riconosciuta", risultato.stdout)
+
+    def test_blocco_non_positivo(self):
+        """Verifica che --blocco 0 o negativo venga segnalato senza traceback."""
+        for valore in ("0", "-5"):
+            risultato = _esegui("main.py", "--fase", "predici", "--input", "lotto.csv", "--blocco", valore)
+
+            self.assertIn("--blocco richiede un numero intero positivo", risultato.stdout)
+            self.assertNotIn("Traceback", risultato.stderr)
+
+
+
+class TestChiaveFase(unittest.TestCase):
+
+    def test_sorgente_della_fase(self):
+        """Verifica che la chiave dell'artefatto cambi se cambia la funzione della fase in main.py."""
+        originale = main.fase_pulizia
+        chiave = main._chiave_fase('pulizia', "dati", main.PARAMETRI_PULIZIA)
+        try:
+            main.fase_pulizia = main.fase_analisi
+            modificata = main._chiave_fase('pulizia', "dati", main.PARAMETRI_PULIZIA)
+        finally:
+            main.fase_pulizia = originale
+
+        self.assertEqual(main._chiave_fase('pulizia', "dati", main.PARAMETRI_PULIZIA), chiave)
+        self.assertNotEqual(modificata, chiave)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,26 @@
 import unittest
-from src.modelli import dividi_dataset
-from src.valutazione import calcola_metriche
+from src.modelli import (
+    dividi_dataset, valuta_griglia, valutatori_knn,
+    valutatori_decision_tree,
+    valutatori_regressione_lineare, SVRApprossimato,
+    campione_stratificato, RegressioneLineareGram, cv_da_gram, gram_per_fold,
+    addestra_regressione_lineare_a_blocchi, addestra_tutti_i_modelli, C_LIST_SVR_APPROSSIMATO,
+    addestra_decision_tree,
+)
+from src.valutazione import (
+    calcola_metriche, cross_validation_modello, metriche_matrice,
+    metriche_modelli, confronta_modelli, genera_report_modelli,
+)
+from sklearn.neighbors import KNeighborsRegressor
+from sklearn.tree import DecisionTreeRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error, mean_absolute_percentage_error, r2_score
+import os
+import tempfile
 import pandas as pd
 import numpy as np
+from src.data_loader import salva_feature_store
+from src.utils import TRACCIATORE
 
 class TestDividiDataset(unittest.TestCase):
 
@@ -54,6 +72,181 @@ class TestDividiDataset(unittest.TestCase):
         # Verifichiamo che gli indici del test set siano identici
         pd.testing.assert_index_equal(res1[1].index, res2[1].index)
 
+    def test_feature_store(self):
+        """Verifica che un FeatureStore venga diviso con le stesse righe del DataFrame."""
+        with tempfile.TemporaryDirectory() as cartella:
+            store = salva_feature_store(self.df, os.path.join(cartella, "store"))
+            X_train, X_test, y_train, y_test = dividi_dataset(store, 'Target', random_state=42)
+            _, X_test_df, _, y_test_df = dividi_dataset(self.df, 'Target', random_state=42)
+
+        self.assertEqual(X_train.shape, (8, 2))
+        np.testing.assert_array_equal(X_test, X_test_df.to_numpy(dtype='float32'))
+        np.testing.assert_array_equal(y_test, y_test_df.to_numpy(dtype='float32'))
+
+
+class TestValutaGriglia(unittest.TestCase):
+
+    def setUp(self):
+        """Crea un piccolo problema di regressione."""
+        rng = np.random.default_rng(0)
+        self.X = pd.DataFrame(rng.normal(size=(60, 3)), columns=['a', 'b', 'c'])
+        self.y = pd.Series(self.X['a'] * 2 + rng.normal(scale=0.1, size=60))
+
+    def test_come_cross_validation_modello(self):
+        """Verifica che gli MSE per fold coincidano con cross_validation_modello."""
+        risultati = valuta_griglia(valutatori_knn([3, 5]), self.X, self.y)
+        atteso = cross_validation_modello(KNeighborsRegressor(n_neighbors=5), self.X, self.y)
+        np.testing.assert_allclose(risultati[("KNN", 5)]['scores'], atteso['scores'])
+        self.assertAlmostEqual(risultati[("KNN", 5)]['media'], atteso['media'])
+
+    def test_knn_una_ricerca_per_fold(self):
+        """Verifica che la valutazione cumulativa dei k coincida con un KNN per ogni k."""
+        risultati = valuta_griglia(valutatori_knn([1, 4, 7]), self.X, self.y)
+        for k in (1, 4, 7):
+            atteso = cross_validation_modello(KNeighborsRegressor(n_neighbors=k), self.X, self.y)
+            np.testing.assert_allclose(risultati[("KNN", k)]['scores'], atteso['scores'])
+
+    def test_decision_tree_un_albero_per_fold(self):
+        """Verifica che le profondita troncate coincidano con alberi addestrati per ogni profondita."""
+        # Nodi numerosi: nessuno split a pari guadagno, quindi gli alberi coincidono
+        rng = np.random.default_rng(1)
+        X = pd.DataFrame(rng.normal(size=(2000, 3)), columns=['a', 'b', 'c'])
+        y = pd.Series(X['a'] * 2 + X['b'] + rng.normal(scale=0.1, size=2000))
+        risultati = valuta_griglia(valutatori_decision_tree([1, 3, 5, None]), X, y)
+        for depth in (1, 3, 5, None):
+            atteso = cross_validation_modello(DecisionTreeRegressor(max_depth=depth, random_state=42), X, y)
+            np.testing.assert_allclose(risultati[("Decision Tree", depth)]['scores'], atteso['scores'])
+
+    def test_span_modello_iperparametro(self):
+        """Verifica che la traccia abbia uno span per modello e fold e uno per iperparametro."""
+        TRACCIATORE.attiva()
+        try:
+            valuta_griglia(valutatori_knn([3, 5]) + valutatori_decision_tree([2, None])
+                           + valutatori_regressione_lineare(), self.X, self.y, cv=3)
+        finally:
+            TRACCIATORE.disattiva()
+        riassunto = {g['percorso'][1:]: g['conteggio'] for g in TRACCIATORE.riassunto()}
+
+        self.assertEqual(riassunto[("KNN",)], 3)
+        self.assertEqual(riassunto[("KNN", "KNN 5")], 3)
+        self.assertEqual(riassunto[("Decision Tree", "Decision Tree None")], 3)
+        self.assertEqual(riassunto[("Linear Regression", "Linear Regression")], 3)
+        self.assertEqual({r['attributi'].get('fold') for r in TRACCIATORE.span_registrati
+                          if r['nome'] == "KNN"}, {0, 1, 2})
+
+    def test_pool_di_processi(self):
+        """Verifica che l'esecuzione parallela dia gli stessi risultati di quella sequenziale."""
+        valutatori = valutatori_knn([3, 5]) + valutatori_regressione_lineare()
+        sequenziale = valuta_griglia(valutatori, self.X, self.y, n_jobs=1)
+        parallela = valuta_griglia(valutatori, self.X, self.y, n_jobs=2)
+        self.assertEqual(set(sequenziale), set(parallela))
+        for chiave in sequenziale:
+            np.testing.assert_allclose(sequenziale[chiave]['scores'], parallela[chiave]['scores'])
+
+    def test_cv_della_profondita_scelta(self):
+        """Verifica che la CV riportata per l'albero sia quella di un vero albero con la profondita scelta."""
+        risultato = addestra_decision_tree(self.X, self.y, self.X.iloc[:5])
+        atteso = cross_validation_modello(
+            DecisionTreeRegressor(max_depth=risultato['miglior_profondita'], random_state=42), self.X, self.y)
+
+        np.testing.assert_allclose(risultato['cv_stats']['scores'], atteso['scores'])
+        self.assertEqual(risultato['mse_minimo'], risultato['cv_stats']['media'])
+
+    def test_n_jobs_non_valido(self):
+        """Verifica che n_jobs = 0 o minore di -1 sollevi ValueError."""
+        for n_jobs in (0, -2):
+            with self.assertRaises(ValueError):
+                valuta_griglia(valutatori_knn([3]), self.X, self.y, n_jobs=n_jobs)
+
+
+class TestRegressioneLineareGram(unittest.TestCase):
+
+    def setUp(self):
+        """Crea un problema lineare con rumore."""
+        rng = np.random.default_rng(0)
+        self.X = pd.DataFrame(rng.normal(size=(200, 3)), columns=['a', 'b', 'c'])
+        self.y = pd.Series(3 + self.X['a'] * 2 - self.X['c'] + rng.normal(scale=0.5, size=200), name='y')
+
+    def test_come_linear_regression(self):
+        """Verifica che coefficienti e predizioni coincidano con LinearRegression."""
+        atteso = LinearRegression().fit(self.X, self.y)
+        modello = RegressioneLineareGram().fit(self.X, self.y)
+
+        np.testing.assert_allclose(modello.coef_, atteso.coef_)
+        self.assertAlmostEqual(modello.intercept_, atteso.intercept_)
+        np.testing.assert_allclose(modello.predict(self.X), atteso.predict(self.X))
+
+    def test_cv_per_sottrazione_dei_fold(self):
+        """Verifica che la CV dalle matrici di Gram coincida con cross_validation_modello."""
+        _, cv_stats = cv_da_gram(*gram_per_fold(self.X, self.y))
+        atteso = cross_validation_modello(LinearRegression(), self.X, self.y)
+
+        np.testing.assert_allclose(cv_stats['scores'], atteso['scores'])
+
+    def test_feature_lontane_da_zero(self):
+        """Verifica che una feature spostata di 1e6 non alteri CV e intercetta."""
+        X = self.X.assign(a=self.X['a'] + 1e6)
+        modello, cv_stats = cv_da_gram(*gram_per_fold(X, self.y))
+        atteso = cross_validation_modello(LinearRegression(), X, self.y)
+
+        np.testing.assert_allclose(cv_stats['scores'], atteso['scores'], rtol=1e-6)
+        self.assertAlmostEqual(modello.intercept_, LinearRegression().fit(X, self.y).intercept_, places=4)
+
+    def test_a_blocchi(self):
+        """Verifica che la lettura a blocchi dia lo stesso modello del DataFrame completo."""
+        with tempfile.TemporaryDirectory() as cartella:
+            percorso = os.path.join(cartella, "dati.csv")
+            pd.concat([self.X, self.y], axis=1).to_csv(percorso, index=False)
+            risultato = addestra_regressione_lineare_a_blocchi(percorso, 'y', dimensione_blocco=37)
+
+        atteso = LinearRegression().fit(self.X, self.y)
+        self.assertEqual(risultato['feature'], ['a', 'b', 'c'])
+        np.testing.assert_allclose(risultato['coefficienti'], atteso.coef_)
+        self.assertEqual(len(risultato['cv_stats']['scores']), 5)
+
+
+class TestSVRApprossimato(unittest.TestCase):
+
+    def setUp(self):
+        """Crea un problema di regressione non lineare."""
+        rng = np.random.default_rng(0)
+        self.X = rng.uniform(-3, 3, size=(300, 2))
+        self.y = np.sin(self.X[:, 0]) + 0.05 * rng.normal(size=300)
+
+    def test_approssima_il_kernel_rbf(self):
+        """Verifica che la SVR approssimata catturi la non linearita (R2 alto)."""
+        for metodo in ("nystroem", "fourier"):
+            modello = SVRApprossimato(metodo=metodo, n_componenti=100).fit(self.X, self.y)
+            self.assertGreater(modello.score(self.X, self.y), 0.9)
+
+    def test_metodo_invalido(self):
+        """Verifica che un metodo non supportato sollevi ValueError."""
+        with self.assertRaises(ValueError):
+            SVRApprossimato(metodo="poly").fit(self.X, self.y)
+
+    def test_campione_stratificato(self):
+        """Verifica dimensione, unicita e rappresentativita del sottocampione."""
+        indici = campione_stratificato(self.y, 100)
+        self.assertEqual(len(indici), 100)
+        self.assertEqual(len(np.unique(indici)), 100)
+        self.assertLess(abs(np.median(self.y[indici]) - np.median(self.y)), 0.2)
+
+    def test_campione_stratificato_fasce_piccole(self):
+        """Verifica che una fascia con una sola riga o troppe fasce non sollevino errori."""
+        y = np.r_[np.zeros(50), 0.5, np.ones(49)]
+        indici = campione_stratificato(y, 30)
+        self.assertEqual(len(indici), 30)
+        self.assertEqual(len(campione_stratificato(self.y, 5, n_strati=10)), 5)
+
+    def test_tuning_su_sottocampione(self):
+        """Verifica che addestra_tutti_i_modelli scelga C sul sottocampione stratificato."""
+        X = pd.DataFrame(self.X, columns=['a', 'b'])
+        y = pd.Series(self.y)
+        risultati = addestra_tutti_i_modelli(X.iloc[:250], y.iloc[:250], X.iloc[250:], modalita_svr="approssimato",
+                                             dimensione_campione_tuning=100)
+        self.assertIn(risultati["SVR approssimato"]['miglior_C'], C_LIST_SVR_APPROSSIMATO)
+        self.assertEqual(len(risultati["SVR approssimato"]['predizioni']), 50)
+
 
 class TestCalcolaMetriche(unittest.TestCase):
 
@@ -94,5 +287,50 @@ class TestCalcolaMetriche(unittest.TestCase):
         self.assertEqual(set(risultati.keys()), chiavi_attese)
 
 
+class TestMetricheMatrice(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.y = rng.lognormal(size=1000)
+        self.predizioni = self.y + rng.normal(scale=[[0.1], [0.5], [1.0]], size=(3, 1000))
+
+    def test_coincide_con_sklearn(self):
+        """Verifica che il calcolo a blocchi su tutti i modelli coincida con sklearn.metrics."""
+        metriche = metriche_matrice(self.y, self.predizioni, dimensione_blocco=128)
+
+        for i, p in enumerate(self.predizioni):
+            self.assertAlmostEqual(metriche['MAE'][i], mean_absolute_error(self.y, p), places=12)
+            self.assertAlmostEqual(metriche['R2'][i], r2_score(self.y, p), places=12)
+            self.assertAlmostEqual(metriche['MAPE'][i], mean_absolute_percentage_error(self.y, p), places=12)
+
+    def test_target_costante(self):
+        """Verifica la convenzione di sklearn per R2 con target costante."""
+        y = np.ones(5)
+        metriche = metriche_matrice(y, [y, y + 1])
+
+        np.testing.assert_array_equal(metriche['R2'], [1.0, 0.0])
+
+    def test_lunghezza_diversa(self):
+        """Verifica che predizioni di lunghezza diversa sollevino ValueError."""
+        with self.assertRaises(ValueError):
+            metriche_matrice(self.y, [self.y[:-1]])
+
+    def test_metriche_condivise_e_confronto(self):
+        """Verifica che confronto e report usino le metriche passate e che il migliore sia il meno rumoroso."""
+        risultati = {nome: {'predizioni': p} for nome, p in zip(("A", "B", "C"), self.predizioni)}
+
+        metriche = metriche_modelli(risultati, self.y)
+        self.assertEqual(confronta_modelli(risultati, self.y), "A")
+        self.assertEqual(confronta_modelli(risultati, self.y, metriche=metriche), "A")
+
+        risultati["A"] = {'predizioni': self.predizioni[2]}
+        self.assertEqual(metriche_modelli(risultati, self.y)["A"], metriche["C"])
+        with tempfile.TemporaryDirectory() as cartella:
+            percorso = os.path.join(cartella, "report.txt")
+            genera_report_modelli(risultati, self.y, percorso, metriche=metriche)
+            with open(percorso, encoding='utf-8') as f:
+                self.assertIn(f"R2:   {metriche['A']['R2']:.4f}", f.read())
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
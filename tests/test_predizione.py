@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from src.data_cleaning import Normalizzatore, valori_riempimento
+from src.predizione import (
+    crea_pacchetto, salva_modello, carica_modello, leggi_metadati,
+    predici, predici_csv,
+)
+
+
+class TestPredizione(unittest.TestCase):
+
+    def setUp(self):
+        """Addestra un piccolo modello lineare e ne crea il pacchetto."""
+        self.cartella = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        self.X = pd.DataFrame(rng.normal(size=(100, 2)) * [1, 10], columns=['a', 'b'])
+        self.y = self.X['a'] * 2 + self.X['b']
+        normalizzatore = Normalizzatore("minmax").fit(self.X)
+        modello = LinearRegression().fit(normalizzatore.transform(self.X), self.y)
+        self.pacchetto = crea_pacchetto(
+            "Linear Regression", modello, ['a', 'b'], 'y', normalizzatore,
+            valori_riempimento(self.X), {'R2': 1.0})
+        self.percorso = os.path.join(self.cartella.name, "modelli", "modello.pkl")
+
+    def tearDown(self):
+        self.cartella.cleanup()
+
+    def test_salva_e_carica(self):
+        """Verifica che il modello salvato dia le stesse predizioni e che i metadati siano leggibili."""
+        salva_modello(self.pacchetto, self.percorso)
+        caricato = carica_modello(self.percorso)
+
+        np.testing.assert_allclose(predici(caricato, self.X), self.y)
+        metadati = leggi_metadati(self.percorso)
+        self.assertEqual(metadati['nome'], "Linear Regression")
+        self.assertNotIn('modello', metadati)
+        self.assertEqual(metadati['versione']['formato'], caricato['versione']['formato'])
+
+    def test_modello_inesistente(self):
+        """Verifica che carica_modello restituisca None se il file non esiste."""
+        self.assertIsNone(carica_modello(self.percorso))
+
+    def test_riempimento_e_colonne(self):
+        """Verifica il riempimento dei NaN, l'ordine delle colonne e le colonne in piu ignorate."""
+        dati = pd.DataFrame({'y': [0.0], 'b': [np.nan], 'a': [1.0]})
+        atteso = predici(self.pacchetto, pd.DataFrame({'a': [1.0], 'b': [self.X['b'].mean()]}))
+        np.testing.assert_allclose(predici(self.pacchetto, dati), atteso)
+
+        with self.assertRaises(KeyError):
+            predici(self.pacchetto, dati.drop(columns=['a']))
+
+    def test_predici_csv_a_blocchi(self):
+        """Verifica che la predizione a blocchi scriva una riga per riga di input, nello stesso ordine."""
+        percorso_input = os.path.join(self.cartella.name, "input.csv")
+        percorso_output = os.path.join(self.cartella.name, "output.csv")
+        self.X.to_csv(percorso_input, index=False)
+
+        n_righe = predici_csv(self.pacchetto, percorso_input, percorso_output, dimensione_blocco=30)
+
+        self.assertEqual(n_righe, 100)
+        predizioni = pd.read_csv(percorso_output)
+        self.assertEqual(list(predizioni.columns), ['y_predetto'])
+        np.testing.assert_allclose(predizioni['y_predetto'], self.y)
+
+    def test_predici_csv_senza_righe(self):
+        """Verifica che un CSV con la sola intestazione produca un output con la sola intestazione."""
+        percorso_input = os.path.join(self.cartella.name, "input.csv")
+        percorso_output = os.path.join(self.cartella.name, "output.csv")
+        self.X.iloc[:0].to_csv(percorso_input, index=False)
+
+        self.assertEqual(predici_csv(self.pacchetto, percorso_input, percorso_output), 0)
+        self.assertEqual(list(pd.read_csv(percorso_output).columns), ['y_predetto'])
+
+        predici_csv(self.pacchetto, percorso_input, percorso_output, includi_input=True)
+        self.assertEqual(list(pd.read_csv(percorso_output).columns), ['a', 'b', 'y_predetto'])
+
+
+if __name__ == '__main__':
+    unittest.main()
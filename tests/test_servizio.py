@@ -0,0 +1,120 @@
+import json
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from src.data_cleaning import Normalizzatore, valori_riempimento
+from src.predizione import crea_pacchetto
+from src.servizio import RaggruppatoreRichieste, crea_servizio
+
+
+def crea_pacchetto_di_prova():
+    """Pacchetto di un modello lineare esatto: y = 2a + b."""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(50, 2)), columns=['a', 'b'])
+    normalizzatore = Normalizzatore("minmax").fit(X)
+    modello = LinearRegression().fit(normalizzatore.transform(X), X['a'] * 2 + X['b'])
+    return crea_pacchetto("Linear Regression", modello, ['a', 'b'], 'y', normalizzatore,
+                          valori_riempimento(X), {'R2': 1.0})
+
+
+class ModelloContato(LinearRegression):
+    """Modello lineare che conta le chiamate a predict."""
+
+    chiamate = 0
+
+    def predict(self, X):
+        self.chiamate += 1
+        return super().predict(X)
+
+
+class TestRaggruppatoreRichieste(unittest.TestCase):
+
+    def test_micro_batch(self):
+        """Verifica che righe accodate entro l'attesa massima vengano predette in un solo batch."""
+        raggruppatore = RaggruppatoreRichieste(crea_pacchetto_di_prova(), attesa_massima=0.5)
+        futuri = [raggruppatore.sottometti(np.array([[float(i), 1.0]])) for i in range(5)]
+        predizioni = [futuro.result(timeout=5)[0] for futuro in futuri]
+        raggruppatore.chiudi()
+
+        np.testing.assert_allclose(predizioni, [2.0 * i + 1.0 for i in range(5)])
+        self.assertEqual(raggruppatore.statistiche.n_batch, 1)
+
+    def test_sottometti_dopo_chiudi(self):
+        """Verifica che dopo chiudi le nuove righe falliscano subito invece di restare in attesa."""
+        raggruppatore = RaggruppatoreRichieste(crea_pacchetto_di_prova())
+        raggruppatore.chiudi()
+        futuro = raggruppatore.sottometti(np.array([[1.0, 1.0]]))
+
+        with self.assertRaises(RuntimeError):
+            futuro.result(timeout=1)
+        raggruppatore.chiudi()
+
+    def test_riscaldamento_senza_riempimento(self):
+        """Verifica che con la strategia "elimina" il modello venga comunque scaldato."""
+        pacchetto = crea_pacchetto_di_prova()
+        pacchetto['valori_riempimento'] = None
+        pacchetto['modello'] = ModelloContato().fit(np.eye(2), [0.0, 1.0])
+        server = crea_servizio(pacchetto, porta=0)
+        server.server_close()
+        server.raggruppatore.chiudi()
+
+        self.assertEqual(pacchetto['modello'].chiamate, 1)
+
+
+class TestServizio(unittest.TestCase):
+
+    def setUp(self):
+        """Avvia il servizio su una porta libera."""
+        self.server = crea_servizio(crea_pacchetto_di_prova(), porta=0, attesa_massima=0.001)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.server.raggruppatore.chiudi()
+
+    def _post(self, corpo):
+        richiesta = urllib.request.Request(self.url + "/predici", data=json.dumps(corpo).encode("utf-8"),
+                                           headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(richiesta, timeout=5) as risposta:
+            return json.loads(risposta.read())
+
+    def test_predizione(self):
+        """Verifica la risposta per una riga singola e per una lista di righe."""
+        self.assertAlmostEqual(self._post({'a': 1.0, 'b': 2.0})['predizione'], 4.0)
+        risposta = self._post([{'a': 0.0, 'b': 1.0}, {'a': 1.0, 'b': 0.0}])
+        np.testing.assert_allclose(risposta['predizioni'], [1.0, 2.0])
+
+    def test_richiesta_invalida(self):
+        """Verifica che una riga senza tutte le feature riceva 400."""
+        with self.assertRaises(urllib.error.HTTPError) as contesto:
+            self._post({'a': 1.0})
+        self.assertEqual(contesto.exception.code, 400)
+
+    def test_servizio_chiuso(self):
+        """Verifica che a raggruppatore chiuso le richieste ricevano 503 senza bloccarsi."""
+        self.server.raggruppatore.chiudi()
+        with self.assertRaises(urllib.error.HTTPError) as contesto:
+            self._post({'a': 1.0, 'b': 2.0})
+        self.assertEqual(contesto.exception.code, 503)
+
+    def test_statistiche(self):
+        """Verifica che /statistiche riporti richieste, latenze e metriche del modello."""
+        self._post({'a': 1.0, 'b': 2.0})
+        with urllib.request.urlopen(self.url + "/statistiche", timeout=5) as risposta:
+            statistiche = json.loads(risposta.read())
+
+        self.assertEqual(statistiche['richieste'], 1)
+        self.assertIsNotNone(statistiche['latenza_p99_ms'])
+        self.assertEqual(statistiche['metriche'], {'R2': 1.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
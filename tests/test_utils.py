@@ -1,10 +1,14 @@
+import json
+import os
+import tempfile
 import unittest
 import math
 
 from src.utils import (
     formatta_numero, formatta_percentuale,
     arrotonda_intelligente, calcola_distanza_euclidea,
-    genera_campione_casuale,
+    genera_campione_casuale, numero_processi,
+    Tracciatore,
 )
 
 
@@ -169,6 +173,75 @@ class TestGeneraCampioneCasuale(unittest.TestCase):
         self.assertEqual(len(campione), len(set(campione)))
 
 
+class TestNumeroProcessi(unittest.TestCase):
+
+    def test_valori_validi(self):
+        """Verifica i valori positivi, -1 (tutti i core) e None (un processo)."""
+        self.assertEqual(numero_processi(3), 3)
+        self.assertEqual(numero_processi(-1), os.cpu_count() or 1)
+        self.assertEqual(numero_processi(None), 1)
+
+    def test_valori_non_validi(self):
+        """Verifica che 0 e i valori minori di -1 sollevino ValueError."""
+        for n_jobs in (0, -2):
+            with self.assertRaises(ValueError):
+                numero_processi(n_jobs)
+
+
+class TestTracciatore(unittest.TestCase):
+
+    def setUp(self):
+        self.tracciatore = Tracciatore()
+
+    def test_disattivo(self):
+        """Verifica che da disattivo non venga registrato nulla."""
+        with self.tracciatore.span("fase"):
+            pass
+        self.assertEqual(self.tracciatore.span_registrati, [])
+
+    def test_span_annidati(self):
+        """Verifica percorsi, profondita e aggregazione degli span annidati."""
+        self.tracciatore.attiva()
+        with self.tracciatore.span("fase"):
+            for fold in range(3):
+                with self.tracciatore.span("modello", fold=fold):
+                    sum(range(1000))
+        self.tracciatore.disattiva()
+
+        riassunto = {g['percorso']: g for g in self.tracciatore.riassunto()}
+        self.assertEqual(list(riassunto), [("fase",), ("fase", "modello")])
+        self.assertEqual(riassunto[("fase", "modello")]['conteggio'], 3)
+        self.assertGreaterEqual(riassunto[("fase",)]['totale'], riassunto[("fase", "modello")]['totale'])
+
+    def test_memoria_picco(self):
+        """Verifica che il picco di memoria di un figlio venga riportato anche nel genitore."""
+        self.tracciatore.attiva(memoria=True)
+        with self.tracciatore.span("fase"):
+            with self.tracciatore.span("allocazione"):
+                blocco = bytearray(10 * 2 ** 20)
+                del blocco
+        self.tracciatore.disattiva()
+
+        picchi = {g['percorso'][-1]: g['memoria_picco'] for g in self.tracciatore.riassunto()}
+        self.assertGreaterEqual(picchi["allocazione"], 10 * 2 ** 20)
+        self.assertGreaterEqual(picchi["fase"], picchi["allocazione"])
+
+    def test_esporta_chrome(self):
+        """Verifica il formato trace-event di Chrome."""
+        self.tracciatore.attiva()
+        with self.tracciatore.span("fase", fold=1):
+            pass
+        with tempfile.TemporaryDirectory() as cartella:
+            percorso = os.path.join(cartella, "traccia.json")
+            self.tracciatore.esporta_chrome(percorso)
+            with open(percorso, "r", encoding="utf-8") as f:
+                eventi = json.load(f)['traceEvents']
+
+        self.assertEqual(len(eventi), 1)
+        self.assertEqual(eventi[0]['ph'], 'X')
+        self.assertEqual(eventi[0]['args']['fold'], '1')
+
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file